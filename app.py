@@ -2,13 +2,14 @@
 import streamlit as st
 import sys
 import os
+from contextlib import closing
 
 # Add project root to path for imports
 ROOT = os.path.dirname(os.path.abspath(__file__))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from src.orchestrator import orchestrate_query
+from src.orchestrator import orchestrate_query_stream
 
 st.title("RAG MVP — Query Interface")
 
@@ -18,11 +19,21 @@ if st.button("Run Query"):
     if not query.strip():
         st.error("Enter a query.")
     else:
-        with st.spinner("Processing your query..."):
-            result = orchestrate_query(query, top_k=3)
-
         st.subheader("Answer")
-        st.write(result.get("answer", ""))
+        answer_box = st.empty()
+        answer_box.markdown("_Processing your query..._")
+
+        # Render tokens as they arrive; the last event carries sources/citations
+        answer = ""
+        result = {}
+        with closing(orchestrate_query_stream(query, top_k=3)) as events:
+            for event in events:
+                if event["type"] == "token":
+                    answer += event["text"]
+                    answer_box.markdown(answer + "▌")
+                else:
+                    result = event["result"]
+        answer_box.markdown(result.get("answer", answer))
 
         st.subheader("Citations")
         for c in result.get("citations", []):
@@ -0,0 +1,703 @@
+# RAG-document-assistant/scripts/benchmark.py
+"""
+Reproducible performance benchmarks for ingestion, retrieval and end-to-end queries.
+
+Purpose:
+    Builds a synthetic corpus of configurable size from docs/input_docs (seeded,
+    so every run sees the same text), times each pipeline stage and writes the
+    results as JSON that can be compared across commits to catch regressions
+    before deploying.
+
+Benchmarks:
+- load_markdown_docs: read + clean the synthetic corpus
+- clean_markdown: the markdown cleaner alone, in memory, on the corpus with
+  front matter, code fences, HTML, images and links mixed in (reports MB/s)
+- chunk_documents: chunk the loaded documents
+- embed_local: batch_embed_chunks with the "local" provider
+- embed_sentence_transformers: batch_embed_chunks with sentence-transformers
+  (skipped when the package is not installed)
+- local_search / local_search_batch: LocalBackend over an ingested store
+- orchestrate_query: full query path against a stub Pinecone client and a
+  stub OpenAI-compatible LLM server (no network access or API keys needed)
+
+Each benchmark reports min/median/mean/max seconds over --repeat runs and a
+median-based throughput.
+
+Inputs:
+    --docs (int): Synthetic documents to generate (default: 200)
+    --doc-kb (float): Approximate size of each document in KB (default: 8)
+    --repeat (int): Timed runs per benchmark (default: 5)
+    --queries (int): Queries for the search benchmarks (default: 50)
+    --e2e-queries (int): Queries per orchestrate_query run (default: 20)
+    --llm-delay-ms / --pinecone-latency-ms: Simulated service latency
+    --only (str): Comma-separated benchmark names to run
+    --output (str): Write JSON results here (default: print to stdout)
+    --compare (str): Baseline JSON; exits 1 if any median regresses by more
+        than --threshold
+
+Usage:
+    python scripts/benchmark.py [options]
+
+Example:
+    python scripts/benchmark.py --docs 1000 --output bench/main.json
+    python scripts/benchmark.py --docs 1000 --output bench/pr.json \
+        --compare bench/main.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add parent directory to path to allow imports
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+BENCHMARKS = (
+    "load_markdown_docs",
+    "clean_markdown",
+    "chunk_documents",
+    "embed_local",
+    "embed_sentence_transformers",
+    "local_search",
+    "local_search_batch",
+    "orchestrate_query",
+)
+
+
+# -------------------------
+# Synthetic corpus
+# -------------------------
+
+def _source_paragraphs(source_dir: str) -> List[str]:
+    paragraphs = []
+    for fp in sorted(Path(source_dir).glob("*.md")):
+        text = fp.read_text(encoding="utf-8")
+        paragraphs.extend(p.strip() for p in text.split("\n\n") if p.strip())
+    if not paragraphs:
+        raise FileNotFoundError(f"No markdown paragraphs found in {source_dir}")
+    return paragraphs
+
+
+def make_corpus(
+    source_dir: str, out_dir: str, n_docs: int, doc_kb: float, seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Write n_docs markdown files of about doc_kb KB each, assembled from random
+    paragraphs of the source documents.
+
+    Returns:
+        Dict with docs, bytes and paragraphs (source paragraph count)
+    """
+    paragraphs = _source_paragraphs(source_dir)
+    rng = random.Random(seed)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    target = int(doc_kb * 1024)
+    total = 0
+    for i in range(n_docs):
+        parts = [f"# Synthetic document {i}"]
+        size = len(parts[0])
+        while size < target:
+            p = rng.choice(paragraphs)
+            parts.append(p)
+            size += len(p) + 2
+        data = "\n\n".join(parts) + "\n"
+        (out / f"doc_{i:05d}.md").write_text(data, encoding="utf-8")
+        total += len(data.encode("utf-8"))
+    return {"docs": n_docs, "bytes": total, "paragraphs": len(paragraphs)}
+
+
+# Markup mixed into the corpus for the clean_markdown benchmark
+_MARKUP_SNIPPETS = (
+    "```python\nscore = weight(a) < 3 and rank > 2\n```",
+    '<div align="center">',
+    "</div>",
+    "![Figure 1](images/figure_1.png)",
+    "[the full policy text](https://example.org/policy)",
+    "[![build](https://ci.example.org/badge.svg)](https://ci.example.org)",
+)
+
+
+def add_markup(text: str, rng: random.Random) -> str:
+    """Front matter plus a markup snippet after about half of the paragraphs."""
+    paragraphs = text.split("\n\n")
+    marked = [
+        p + " " + rng.choice(_MARKUP_SNIPPETS) if rng.random() < 0.5 else p
+        for p in paragraphs
+    ]
+    return "---\ntitle: benchmark\ntags: [synthetic]\n---\n" + "\n\n".join(marked)
+
+
+def make_queries(source_dir: str, n: int, seed: int = 1) -> List[str]:
+    """Queries built from the first words of random source paragraphs."""
+    rng = random.Random(seed)
+    paragraphs = [p for p in _source_paragraphs(source_dir) if len(p.split()) >= 6]
+    queries = []
+    for _ in range(n):
+        words = rng.choice(paragraphs).lstrip("#*- ").split()
+        queries.append(" ".join(words[:rng.randint(6, 12)]))
+    return queries
+
+
+# -------------------------
+# Timing
+# -------------------------
+
+
+def measure(
+    fn: Callable[[], Any],
+    repeat: int,
+    setup: Optional[Callable[[], None]] = None,
+    warmup: int = 1,
+) -> Dict[str, Any]:
+    """
+    Time fn() repeat times (after warmup untimed runs); setup() runs untimed
+    before each call.
+
+    Returns:
+        Dict with runs, min_s, median_s, mean_s, max_s and "value" (last return value)
+    """
+    value = None
+    for _ in range(warmup):
+        if setup:
+            setup()
+        value = fn()
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        value = fn()
+        times.append(time.perf_counter() - t0)
+    return {
+        "runs": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "max_s": max(times),
+        "value": value,
+    }
+
+
+def _report(
+    stats: Dict[str, Any],
+    items: int,
+    unit: str,
+    nbytes: Optional[int] = None,
+    **extra: Any,
+) -> Dict[str, Any]:
+    out = {k: v for k, v in stats.items() if k != "value"}
+    out["items"] = items
+    out["unit"] = unit
+    out[f"{unit}_per_s"] = items / out["median_s"] if out["median_s"] > 0 else None
+    if nbytes is not None:
+        out["mb_per_s"] = (
+            nbytes / 1e6 / out["median_s"] if out["median_s"] > 0 else None
+        )
+    out.update(extra)
+    return out
+
+
+# -------------------------
+# Stub services
+# -------------------------
+
+def start_stub_llm(delay_s: float) -> ThreadingHTTPServer:
+    """OpenAI-compatible /chat/completions server answering after delay_s."""
+
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            n = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(n)
+            time.sleep(delay_s)
+            body = json.dumps(
+                {
+                    "choices": [
+                        {
+                            "message": {
+                                "role": "assistant",
+                                "content": "Stub answer citing [doc_00000.md::0].",
+                            }
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": 100,
+                        "completion_tokens": 10,
+                        "total_tokens": 110,
+                    },
+                }
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class StubPineconeIndex:
+    """In-process Pinecone index stand-in: exact cosine search plus a fixed latency."""
+
+    def __init__(self, records: List[Dict[str, Any]], dim: int, latency_s: float):
+        import numpy as np
+        from src.retrieval.retriever import deterministic_embedding
+        self.latency_s = latency_s
+        self.records = records
+        matrix = np.asarray(
+            [deterministic_embedding(r["text"], dim=dim) for r in records],
+            dtype=np.float32,
+        )
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+    def query(
+        self,
+        vector,
+        top_k: int = 5,
+        include_metadata: bool = True,
+        include_values: bool = False,
+        **kwargs,
+    ):
+        import numpy as np
+        time.sleep(self.latency_s)
+        q = np.asarray(vector, dtype=np.float32)
+        q /= max(float(np.linalg.norm(q)), 1e-12)
+        scores = self.matrix @ q
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return {
+            "matches": [
+                {
+                    "id": self.records[i]["id"],
+                    "score": float(scores[i]),
+                    "metadata": self.records[i]["metadata"],
+                }
+                for i in top
+            ]
+        }
+
+    def describe_index_stats(self, **kwargs) -> Dict[str, Any]:
+        return {"total_vector_count": len(self.records)}
+
+
+class StubPineconeClient:
+    """Control-plane stand-in returned in place of pinecone.Pinecone."""
+
+    def __init__(self, index: StubPineconeIndex):
+        self._index = index
+
+    def describe_index(self, name: str) -> Dict[str, str]:
+        return {"host": f"stub-{name}"}
+
+    def Index(self, host: str) -> StubPineconeIndex:
+        return self._index
+
+
+def _configure_stub_env(llm_url: str) -> None:
+    """Point the app at the stubs; must run before src.config is imported."""
+    for key in ("GEMINI_API_KEY", "GROQ_API_KEY", "ANSWER_CACHE_PATH"):
+        os.environ.pop(key, None)
+    os.environ.update({
+        "RETRIEVAL_BACKEND": "pinecone",
+        "PINECONE_API_KEY": "bench-stub",
+        "PINECONE_INDEX_NAME": "bench",
+        "OPENROUTER_API_KEY": "bench-stub",
+        "OPENROUTER_URL": llm_url,
+        "OPENROUTER_RPM": "0",
+        "OPENROUTER_TPM": "0",
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "LLM_CALL_MODE": "sequential",
+    })
+
+
+# -------------------------
+# Benchmarks
+# -------------------------
+
+def _sentence_transformers_available() -> bool:
+    try:
+        import sentence_transformers  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def run_benchmarks(args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    selected = set(args.only.split(",")) if args.only else set(BENCHMARKS)
+    unknown = selected - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {sorted(unknown)}")
+
+    # The stub LLM must be up before src.config reads the environment
+    llm_server = start_stub_llm(args.llm_delay_ms / 1000.0)
+    _configure_stub_env(
+        f"http://127.0.0.1:{llm_server.server_address[1]}/v1/chat/completions"
+    )
+
+    from src.ingestion.load_docs import load_markdown_docs, _clean_markdown
+    from src.ingestion.chunker import chunk_documents
+    from src.ingestion.embeddings import batch_embed_chunks
+    from src.ingestion.embedding_store import write_store
+
+    corpus_dir = workdir / "corpus"
+    corpus = make_corpus(
+        args.source, str(corpus_dir), args.docs, args.doc_kb, seed=args.seed
+    )
+    queries = make_queries(args.source, args.queries, seed=args.seed + 1)
+    print(
+        f"Corpus: {corpus['docs']} docs, {corpus['bytes'] / 1e6:.2f} MB",
+        file=sys.stderr,
+    )
+
+    results: Dict[str, Any] = {}
+
+    def record(name: str, entry: Dict[str, Any]):
+        results[name] = entry
+        if "skipped" in entry:
+            print(f"{name:<30} skipped: {entry['skipped']}", file=sys.stderr)
+        else:
+            mb = f", {entry['mb_per_s']:.1f} MB/s" if entry.get("mb_per_s") else ""
+            print(
+                f"{name:<30} median {entry['median_s'] * 1000:9.2f} ms  "
+                f"({entry[entry['unit'] + '_per_s']:.1f} {entry['unit']}/s{mb})",
+                file=sys.stderr,
+            )
+
+    # Ingestion stages always run once to feed later benchmarks
+    stats = measure(
+        lambda: load_markdown_docs(str(corpus_dir), max_chars=args.max_chars),
+        args.repeat,
+    )
+    docs = stats["value"]
+    if "load_markdown_docs" in selected:
+        record("load_markdown_docs", _report(stats, len(docs), "docs", corpus["bytes"]))
+
+    if "clean_markdown" in selected:
+        rng = random.Random(args.seed)
+        raw = [
+            add_markup(fp.read_text(encoding="utf-8"), rng)
+            for fp in sorted(corpus_dir.glob("*.md"))
+        ]
+        nbytes = sum(len(t.encode("utf-8")) for t in raw)
+        stats = measure(lambda: [_clean_markdown(t) for t in raw], args.repeat)
+        record("clean_markdown", _report(stats, len(raw), "docs", nbytes))
+
+    stats = measure(
+        lambda: chunk_documents(docs, max_tokens=300, overlap=50), args.repeat
+    )
+    chunks = stats["value"]
+    if "chunk_documents" in selected:
+        record("chunk_documents", _report(stats, len(chunks), "chunks"))
+
+    stats = measure(
+        lambda: batch_embed_chunks(chunks, provider="local", dim=args.dim), args.repeat
+    )
+    embedded = stats["value"]
+    if "embed_local" in selected:
+        record("embed_local", _report(stats, len(chunks), "chunks", dim=args.dim))
+
+    if "embed_sentence_transformers" in selected:
+        if _sentence_transformers_available():
+            sample = chunks[:args.st_chunks]
+            stats = measure(
+                lambda: batch_embed_chunks(sample, provider="sentence-transformers"),
+                args.repeat,
+            )
+            record("embed_sentence_transformers", _report(stats, len(sample), "chunks"))
+        else:
+            record(
+                "embed_sentence_transformers",
+                {"skipped": "sentence-transformers not installed"},
+            )
+
+    texts = {(c["filename"], c["chunk_id"]): c["text"] for c in chunks}
+    for e in embedded:
+        e["text"] = texts.get((e["filename"], e["chunk_id"]), "")
+
+    if selected & {"local_search", "local_search_batch"}:
+        from src.retrieval.backends import LocalBackend
+        from src.retrieval.retriever import QUERY_EMBEDDING_CACHE
+        store_path = workdir / "chunks.store"
+        write_store(str(store_path), embedded)
+        backend = LocalBackend(
+            path=str(store_path), provider="local", index_type="exact"
+        )
+        backend.index  # load outside the timed region
+
+        if "local_search" in selected:
+            stats = measure(
+                lambda: [backend.search(q, top_k=args.top_k) for q in queries],
+                args.repeat,
+                setup=QUERY_EMBEDDING_CACHE.clear,
+            )
+            record(
+                "local_search",
+                _report(stats, len(queries), "queries", chunks=len(embedded)),
+            )
+        if "local_search_batch" in selected:
+            stats = measure(
+                lambda: backend.search_batch(queries, top_k=args.top_k),
+                args.repeat,
+                setup=QUERY_EMBEDDING_CACHE.clear,
+            )
+            record(
+                "local_search_batch",
+                _report(stats, len(queries), "queries", chunks=len(embedded)),
+            )
+
+    if "orchestrate_query" in selected:
+        record("orchestrate_query", _bench_orchestrate(args, embedded, queries))
+
+    llm_server.shutdown()
+    return {"corpus": corpus, "chunks": len(chunks), "results": results}
+
+
+def _bench_orchestrate(
+    args: argparse.Namespace, embedded: List[Dict[str, Any]], queries: List[str]
+) -> Dict[str, Any]:
+    import src.orchestrator as orch
+    from src.retrieval import retriever
+    from src.retrieval.backends import PineconeBackend, register_backend
+    from src.retrieval.retriever import DIM_DETERMINISTIC, QUERY_EMBEDDING_CACHE
+
+    records = [
+        {
+            "id": f"{e['filename']}::{e['chunk_id']}",
+            "text": e["text"],
+            "metadata": {
+                "filename": e["filename"],
+                "chunk_id": e["chunk_id"],
+                "text": e["text"],
+            },
+        }
+        for e in embedded
+    ]
+    index = StubPineconeIndex(
+        records, DIM_DETERMINISTIC, args.pinecone_latency_ms / 1000.0
+    )
+    retriever._new_pinecone_client = lambda api_key: StubPineconeClient(index)
+    retriever.clear_index_cache()
+    # sentence-transformers may be missing here; the stub scores hash embeddings
+    # either way
+    register_backend(
+        "pinecone", lambda: PineconeBackend(index_name="bench", use_semantic=False)
+    )
+
+    e2e_queries = queries[:args.e2e_queries]
+    stage_totals: Dict[str, float] = {}
+
+    def run():
+        for q in e2e_queries:
+            result = orch.orchestrate_query(q, top_k=args.top_k)
+            if result.get("llm_meta", {}).get("error"):
+                raise RuntimeError(
+                    f"orchestrate_query failed: {result['llm_meta']['error']}"
+                )
+            for stage, seconds in result.get("timings", {}).items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+
+    def reset():
+        # Every run is a cold query: no answer or query-embedding cache hits
+        orch.ANSWER_CACHE.clear()
+        QUERY_EMBEDDING_CACHE.clear()
+        stage_totals.clear()
+
+    stats = measure(run, args.repeat, setup=reset)
+    n = len(e2e_queries)
+    # stage_totals holds the last run only (reset() clears it before each run)
+    stages = {stage: seconds / n for stage, seconds in sorted(stage_totals.items())}
+    return _report(
+        stats, n, "queries",
+        llm_delay_ms=args.llm_delay_ms,
+        pinecone_latency_ms=args.pinecone_latency_ms,
+        mean_stage_s=stages,
+    )
+
+
+# -------------------------
+# Reporting
+# -------------------------
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, timeout=10,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def environment_info(args: argparse.Namespace) -> Dict[str, Any]:
+    import numpy as np
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "params": {
+            k: v for k, v in vars(args).items() if k not in ("output", "compare")
+        },
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """
+    Print median ratios against baseline.
+
+    Returns:
+        Names of benchmarks whose median grew by more than threshold
+    """
+    regressions = []
+    print(
+        f"\n{'benchmark':<30} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}",
+        file=sys.stderr,
+    )
+    for name, entry in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not entry or not old or "median_s" not in entry or "median_s" not in old:
+            continue
+        ratio = (
+            entry["median_s"] / old["median_s"] if old["median_s"] > 0 else float("inf")
+        )
+        flag = ""
+        if ratio > 1.0 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<30} {old['median_s'] * 1000:12.2f} "
+            f"{entry['median_s'] * 1000:12.2f} {ratio:7.2f}{flag}",
+            file=sys.stderr,
+        )
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark ingestion, retrieval and end-to-end query latency"
+    )
+    parser.add_argument(
+        "--source",
+        default=str(PROJECT_ROOT / "docs" / "input_docs"),
+        help="Seed markdown documents",
+    )
+    parser.add_argument(
+        "--docs", type=int, default=200, help="Synthetic documents to generate"
+    )
+    parser.add_argument(
+        "--doc-kb",
+        type=float,
+        default=8.0,
+        help="Approximate size of each document in KB",
+    )
+    parser.add_argument(
+        "--max-chars", type=int, default=20000, help="load_markdown_docs max_chars"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Timed runs per benchmark"
+    )
+    parser.add_argument(
+        "--dim", type=int, default=128, help="Dimension of local embeddings"
+    )
+    parser.add_argument(
+        "--st-chunks",
+        type=int,
+        default=256,
+        help="Chunks encoded by the sentence-transformers benchmark",
+    )
+    parser.add_argument(
+        "--queries", type=int, default=50, help="Queries for the search benchmarks"
+    )
+    parser.add_argument(
+        "--e2e-queries", type=int, default=20, help="Queries per orchestrate_query run"
+    )
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument(
+        "--llm-delay-ms", type=float, default=50.0, help="Stub LLM response delay"
+    )
+    parser.add_argument(
+        "--pinecone-latency-ms",
+        type=float,
+        default=20.0,
+        help="Stub Pinecone query latency",
+    )
+    parser.add_argument(
+        "--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}"
+    )
+    parser.add_argument(
+        "--output", help="Write JSON results to this file (default: stdout)"
+    )
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed median slowdown vs baseline (0.10 = 10%%)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    workdir = Path(tempfile.mkdtemp(prefix="rag-bench-"))
+    try:
+        run = run_benchmarks(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"environment": environment_info(args), **run}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        print(f"Results written to: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(
+                f"Regressions over {args.threshold:.0%}: {', '.join(regressions)}",
+                file=sys.stderr,
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,20 +10,32 @@ Pipeline:
 1. Load markdown docs
 2. Chunk them
 3. Generate embeddings (local stub for now)
-4. Save to chunks.jsonl file
+4. Save to a binary embedding store (or chunks.jsonl)
 
 Inputs:
     docs_dir (str): Path to directory containing markdown documents
     provider (str, optional): Embedding provider (default: "local")
     dim (int, optional): Embedding dimension (default: 128)
-    save_to (str, optional): Path to save chunks.jsonl file
+    save_to (str, optional): Embedding store directory to save to; a path ending
+        in ".jsonl" writes the legacy JSONL format instead
 
 Outputs:
     Saves embedded chunks to specified file
     Returns list of embedded chunks with metadata
 
 Usage:
-    python scripts/ingest_documents.py /path/to/docs [provider] [dim]
+    python scripts/ingest_documents.py /path/to/docs [provider] [dim] \
+        [--incremental | --stream]
+
+    --incremental only re-processes documents that changed since the last run
+    (tracked in data/ingest_manifest.json) and updates data/chunks.store in place.
+    --stream processes the corpus in micro-batches with bounded memory and
+    resumes from its checkpoint if a previous --stream run was interrupted
+    (batch size: INGEST_BATCH_SIZE, default 256).
+    The full (non-incremental, non-stream) run loads documents on
+    INGEST_WORKERS processes (default 1; 0 = one per CPU).
+    CHUNK_BY_TOKENS=true (sentence-transformers only) sizes chunks with the
+    model's tokenizer so each one fits its max sequence length.
 
 Example:
     python scripts/ingest_documents.py ./sample_docs sentence-transformers 384
@@ -41,9 +53,36 @@ if str(PROJECT_ROOT) not in sys.path:
 
 from src.ingestion.load_docs import load_markdown_docs
 from src.ingestion.chunker import chunk_documents
-from src.ingestion.embeddings import batch_embed_chunks
-
-def run_ingestion(docs_dir: str, provider: str = "local", dim: int = 128, save_to: str = None):
+from src.ingestion.embeddings import (
+    batch_embed_chunks,
+    get_model_tokenizer,
+    print_progress,
+)
+from src.ingestion.embedding_store import write_store
+from src.ingestion.embedding_cache import EmbeddingCache
+from src.ingestion.incremental import run_incremental
+from src.ingestion.streaming import DEFAULT_BATCH_SIZE, run_streaming_ingestion
+
+def _chunk_settings(provider: str) -> dict:
+    """
+    Chunker arguments: ~4 chars/token estimate, or the model's own tokenizer
+    with CHUNK_BY_TOKENS.
+    """
+    if provider == "sentence-transformers" and os.environ.get(
+        "CHUNK_BY_TOKENS", ""
+    ).lower() in ("1", "true", "yes"):
+        tokenizer, max_tokens = get_model_tokenizer()
+        return {"max_tokens": max_tokens, "overlap": 50, "tokenizer": tokenizer}
+    return {"max_tokens": 300, "overlap": 50, "tokenizer": None}
+
+
+def run_ingestion(
+    docs_dir: str,
+    provider: str = "local",
+    dim: int = 128,
+    save_to: str = None,
+    cache_path: str = None,
+):
     """
     Run full ingestion pipeline: load docs -> chunk -> embed -> optionally save
 
@@ -51,16 +90,26 @@ def run_ingestion(docs_dir: str, provider: str = "local", dim: int = 128, save_t
         docs_dir: Path to directory containing markdown docs
         provider: Embedding provider (default: "local")
         dim: Embedding dimension (default: 128)
-        save_to: Optional path to save chunks.jsonl file
+        save_to: Optional embedding store directory (or legacy .jsonl path)
+        cache_path: Optional SQLite embedding cache; unchanged chunks are not re-encoded
 
     Returns:
         List of embedded chunks with metadata
     """
     import json
 
-    docs = load_markdown_docs(docs_dir)
-    chunks = chunk_documents(docs, max_tokens=300, overlap=50)
-    embedded = batch_embed_chunks(chunks, provider=provider, dim=dim)
+    docs = load_markdown_docs(
+        docs_dir, workers=int(os.environ.get("INGEST_WORKERS", 1))
+    )
+    chunks = chunk_documents(docs, **_chunk_settings(provider))
+    cache = EmbeddingCache(cache_path) if cache_path else None
+    embedded = batch_embed_chunks(
+        chunks, provider=provider, dim=dim, cache=cache, progress=print_progress
+    )
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses")
+        cache.close()
 
     # Merge text back into embedded chunks (embeddings.py strips it)
     chunk_map = {(c["filename"], c["chunk_id"]): c["text"] for c in chunks}
@@ -70,7 +119,10 @@ def run_ingestion(docs_dir: str, provider: str = "local", dim: int = 128, save_t
             e["text"] = chunk_map[key]
 
     # Save to file if requested
-    if save_to:
+    if save_to and not save_to.endswith(".jsonl"):
+        write_store(save_to, embedded)
+        print(f"Saved {len(embedded)} chunks to: {save_to}")
+    elif save_to:
         save_path = Path(save_to)
         save_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -84,23 +136,82 @@ def run_ingestion(docs_dir: str, provider: str = "local", dim: int = 128, save_t
                     "chars": e.get("chars", 0),
                     "embedding": e["embedding"]
                 }
+                if "start" in e:
+                    obj["start"], obj["end"] = e["start"], e["end"]
                 fh.write(json.dumps(obj, ensure_ascii=False) + "\n")
         print(f"Saved {len(embedded)} chunks to: {save_to}")
 
     return embedded
 
+
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) < 2:
-        print("Usage: python3 scripts/ingest_documents.py /path/to/docs [provider] [dim]")
+    incremental = "--incremental" in sys.argv
+    stream = "--stream" in sys.argv
+    argv = [a for a in sys.argv if a not in ("--incremental", "--stream")]
+    if len(argv) < 2 or (incremental and stream):
+        print(
+            "Usage: python3 scripts/ingest_documents.py /path/to/docs [provider] [dim] "
+            "[--incremental | --stream]"
+        )
         raise SystemExit(1)
 
-    docs_dir = sys.argv[1]
-    provider = sys.argv[2] if len(sys.argv) > 2 else "local"
-    dim = int(sys.argv[3]) if len(sys.argv) > 3 else 128
-
-    # Save to data/chunks.jsonl by default
-    save_path = str(PROJECT_ROOT / "data" / "chunks.jsonl")
-
-    out = run_ingestion(docs_dir, provider=provider, dim=dim, save_to=save_path)
-    print(f"Total embedded chunks: {len(out)}")
\ No newline at end of file
+    docs_dir = argv[1]
+    provider = argv[2] if len(argv) > 2 else "local"
+    dim = int(argv[3]) if len(argv) > 3 else 128
+
+    # Save to the data/chunks.store embedding store by default
+    save_path = str(PROJECT_ROOT / "data" / "chunks.store")
+
+    cache_path = str(PROJECT_ROOT / "data" / "embedding_cache.sqlite")
+
+    if incremental:
+        cache = EmbeddingCache(cache_path)
+        summary = run_incremental(
+            docs_dir,
+            store_path=save_path,
+            manifest_path=str(PROJECT_ROOT / "data" / "ingest_manifest.json"),
+            provider=provider,
+            dim=dim,
+            cache=cache,
+            **_chunk_settings(provider)
+        )
+        cache.close()
+        print(
+            f"Changed: {len(summary['changed'])}  "
+            f"Unchanged: {len(summary['unchanged'])}  "
+            f"Removed: {len(summary['removed'])}"
+        )
+        print(
+            f"Embedded chunks: {summary['upserted']}  "
+            f"Deleted chunk ids: {summary['deleted']}"
+        )
+    elif stream:
+        cache = EmbeddingCache(cache_path)
+        summary = run_streaming_ingestion(
+            docs_dir,
+            store_path=save_path,
+            provider=provider,
+            dim=dim,
+            cache=cache,
+            batch_size=int(os.environ.get("INGEST_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+            **_chunk_settings(provider)
+        )
+        cache.close()
+        if summary["resumed"]:
+            print("Resumed an interrupted run")
+        print(
+            f"Files: {summary['files']}  OK: {summary['ok']}  "
+            f"Skipped: {summary['skipped']}  "
+            f"Errors: {summary['errors']}"
+        )
+        print(f"Saved {summary['chunks']} chunks to: {save_path}")
+    else:
+        out = run_ingestion(
+            docs_dir,
+            provider=provider,
+            dim=dim,
+            save_to=save_path,
+            cache_path=cache_path,
+        )
+        print(f"Total embedded chunks: {len(out)}")
@@ -10,7 +10,7 @@ Purpose:
 Process:
 1. Loads documents and chunks them
 2. Generates semantic embeddings (384-dim using all-MiniLM-L6-v2)
-3. Saves to data/chunks_semantic.jsonl
+3. Saves to the data/chunks_semantic.store embedding store
 4. Creates new Pinecone index with 384 dimensions
 5. Uploads semantic embeddings to new index
 
@@ -19,15 +19,24 @@ Inputs:
     PINECONE_API_KEY environment variable
 
 Outputs:
-    Saves embedded chunks to data/chunks_semantic.jsonl
+    Saves embedded chunks to data/chunks_semantic.store
     Creates and populates new Pinecone index
     Prints progress and completion messages
 
 Environment variables required:
     PINECONE_API_KEY: Your Pinecone API key
 
+Optional:
+    CHUNK_BY_TOKENS: "true" sizes chunks with the model tokenizer to its max
+        sequence length instead of 300 estimated tokens
+
 Usage:
     python scripts/regenerate_with_semantic.py
+    python scripts/regenerate_with_semantic.py --incremental
+
+    --incremental keeps the existing index and only embeds/upserts documents that
+    changed since the last incremental run (tracked in data/semantic_manifest.json),
+    deleting vectors of removed or shrunk documents. No index downtime.
 """
 
 import sys
@@ -40,10 +49,57 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 from src.ingestion.load_docs import load_markdown_docs
 from src.ingestion.chunker import chunk_documents
-from src.ingestion.embeddings import batch_embed_chunks, get_embedding
+from src.ingestion.embeddings import (
+    batch_embed_chunks,
+    get_embedding,
+    get_model_tokenizer,
+    print_progress,
+)
+from src.ingestion.embedding_store import write_store
+from src.ingestion.embedding_cache import EmbeddingCache
+from src.ingestion.incremental import run_incremental
 from pinecone import Pinecone, ServerlessSpec
 import src.config as cfg
-import json
+
+INDEX_NAME = "rag-semantic-384"
+UPSERT_BATCH = 100
+DELETE_BATCH = 1000
+
+
+def _chunk_settings() -> dict:
+    """
+    Chunker arguments: ~4 chars/token estimate, or the model's own tokenizer
+    with CHUNK_BY_TOKENS.
+    """
+    if os.environ.get("CHUNK_BY_TOKENS", "").lower() in ("1", "true", "yes"):
+        tokenizer, max_tokens = get_model_tokenizer("all-MiniLM-L6-v2")
+        return {"max_tokens": max_tokens, "overlap": 50, "tokenizer": tokenizer}
+    return {"max_tokens": 300, "overlap": 50, "tokenizer": None}
+
+
+def _upsert_vectors(index, embedded):
+    """Upsert embedded chunks into a Pinecone index in batches."""
+    vectors = []
+    for e in embedded:
+        vec_id = f"{e['filename']}::{e['chunk_id']}"
+        vectors.append({
+            "id": vec_id,
+            "values": e["embedding"],
+            # Character offsets of the chunk in its cleaned source document
+            "metadata": {k: e[k] for k in ("start", "end") if k in e}
+        })
+
+    for i in range(0, len(vectors), UPSERT_BATCH):
+        batch = vectors[i:i+UPSERT_BATCH]
+        index.upsert(vectors=batch)
+        print(f"   Uploaded {min(i+UPSERT_BATCH, len(vectors))}/{len(vectors)} vectors")
+
+
+def _delete_vectors(index, ids):
+    """Delete vectors by id from a Pinecone index in batches."""
+    for i in range(0, len(ids), DELETE_BATCH):
+        index.delete(ids=ids[i:i+DELETE_BATCH])
+    print(f"   Deleted {len(ids)} stale vectors")
 
 
 def main():
@@ -58,7 +114,7 @@ def main():
     print(f"   Loaded {len(docs)} documents")
 
     print("\n[2/5] Chunking documents...")
-    chunks = chunk_documents(docs, max_tokens=300, overlap=50)
+    chunks = chunk_documents(docs, **_chunk_settings())
     print(f"   Generated {len(chunks)} chunks")
 
     # Step 2: Generate semantic embeddings
@@ -66,11 +122,17 @@ def main():
     print("   Using model: all-MiniLM-L6-v2 (384 dimensions)")
     print("   This may take 1-2 minutes...")
 
+    cache = EmbeddingCache(str(PROJECT_ROOT / "data" / "embedding_cache.sqlite"))
     embedded = batch_embed_chunks(
         chunks,
         provider="sentence-transformers",
-        model_name="all-MiniLM-L6-v2"
+        model_name="all-MiniLM-L6-v2",
+        cache=cache,
+        progress=print_progress
     )
+    stats = cache.stats()
+    print(f"   Embedding cache: {stats['hits']} hits, {stats['misses']} misses")
+    cache.close()
 
     # Get actual dimension from first embedding
     actual_dim = len(embedded[0]['embedding'])
@@ -78,22 +140,12 @@ def main():
 
     # Step 3: Save to file
     print("\n[4/5] Saving embeddings...")
-    output_file = PROJECT_ROOT / "data" / "chunks_semantic.jsonl"
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-
-    with output_file.open("w", encoding="utf-8") as f:
-        for i, e in enumerate(embedded):
-            # Merge text back from chunks
-            chunk_text = chunks[i]["text"]
-            obj = {
-                "id": f"{e['filename']}::{e['chunk_id']}",
-                "filename": e["filename"],
-                "chunk_id": e["chunk_id"],
-                "text": chunk_text,
-                "chars": e.get("chars", 0),
-                "embedding": e["embedding"]
-            }
-            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    output_file = PROJECT_ROOT / "data" / "chunks_semantic.store"
+
+    # Merge text back from chunks
+    for i, e in enumerate(embedded):
+        e["text"] = chunks[i]["text"]
+    write_store(str(output_file), embedded)
 
     print(f"   ✓ Saved to: {output_file}")
 
@@ -103,7 +155,7 @@ def main():
 
     pc = Pinecone(api_key=cfg.PINECONE_API_KEY)
 
-    new_index_name = "rag-semantic-384"
+    new_index_name = INDEX_NAME
     print(f"   Creating new index: {new_index_name}")
     print(f"   Dimension: {actual_dim}, Metric: cosine")
 
@@ -134,22 +186,7 @@ def main():
 
     index = pc.Index(new_index_name)
 
-    # Prepare vectors for upsert
-    vectors = []
-    for e in embedded:
-        vec_id = f"{e['filename']}::{e['chunk_id']}"
-        vectors.append({
-            "id": vec_id,
-            "values": e["embedding"],
-            "metadata": {}
-        })
-
-    # Upsert in batches of 100
-    batch_size = 100
-    for i in range(0, len(vectors), batch_size):
-        batch = vectors[i:i+batch_size]
-        index.upsert(vectors=batch)
-        print(f"   Uploaded {min(i+batch_size, len(vectors))}/{len(vectors)} vectors")
+    _upsert_vectors(index, embedded)
 
     # Verify upload
     stats = index.describe_index_stats()
@@ -164,5 +201,45 @@ def main():
     print()
 
 
+def main_incremental():
+    print("=" * 60)
+    print("Incremental Semantic Embedding Refresh")
+    print("=" * 60)
+
+    pc = Pinecone(api_key=cfg.PINECONE_API_KEY)
+    existing_indexes = [idx.name for idx in pc.list_indexes()]
+    if INDEX_NAME not in existing_indexes:
+        print(
+            f"   Index '{INDEX_NAME}' does not exist - run without --incremental first."
+        )
+        raise SystemExit(1)
+    index = pc.Index(INDEX_NAME)
+
+    cache = EmbeddingCache(str(PROJECT_ROOT / "data" / "embedding_cache.sqlite"))
+    summary = run_incremental(
+        str(PROJECT_ROOT / "sample_docs"),
+        store_path=str(PROJECT_ROOT / "data" / "chunks_semantic.store"),
+        manifest_path=str(PROJECT_ROOT / "data" / "semantic_manifest.json"),
+        provider="sentence-transformers",
+        model_name="all-MiniLM-L6-v2",
+        cache=cache,
+        **_chunk_settings(),
+        upsert=lambda embedded: _upsert_vectors(index, embedded),
+        delete=lambda ids: _delete_vectors(index, ids)
+    )
+    cache.close()
+
+    print(
+        f"\n   Changed: {len(summary['changed'])}  "
+        f"Unchanged: {len(summary['unchanged'])}  "
+        f"Removed: {len(summary['removed'])}"
+    )
+    print(f"   Upserted: {summary['upserted']}  Deleted: {summary['deleted']}")
+    print("\n✅ COMPLETE!")
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--incremental" in sys.argv:
+        main_incremental()
+    else:
+        main()
@@ -5,12 +5,15 @@ Local similarity search (cosine) over embeddings.jsonl.
 Purpose:
     Performs local similarity search using cosine similarity over pre-generated embeddings.
     Useful for testing and debugging search functionality without connecting to a vector database.
+    Embeddings are loaded once per file into a normalized NumPy matrix; all scores come
+    from one matrix product and top-k is selected with argpartition. search_batch()
+    scores many queries in a single matrix-matrix multiply.
 
 Inputs:
-    embeddings_path (str): Path to embeddings.jsonl file
+    embeddings_path (str): Path to an embedding store directory or embeddings.jsonl file
     query (str): Search query text
     k (int, optional): Number of results to return (default: 3)
-    dim (int, optional): Embedding dimension (default: 64)
+    dim (int, optional): Query embedding dimension (default: dimension of the file)
 
 Outputs:
     Prints top-k results with id, filename, chunk_id, and similarity score
@@ -23,48 +26,46 @@ Example:
 """
 
 import sys
-import json
-import math
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
+
 from src.ingestion.embeddings import get_embedding
+from src.retrieval.local_index import LocalVectorIndex
+
+# (resolved path, mtime) -> loaded index, so repeated searches skip re-parsing
+_INDEX_CACHE: Dict[Tuple[str, float], LocalVectorIndex] = {}
+
+
+def load_index(path: str) -> LocalVectorIndex:
+    """Load (or reuse) the normalized embedding matrix for path."""
+    pth = Path(path)
+    if not pth.exists():
+        raise FileNotFoundError(pth)
+    key = (str(pth.resolve()), pth.stat().st_mtime)
+    if key not in _INDEX_CACHE:
+        _INDEX_CACHE.clear()
+        _INDEX_CACHE[key] = LocalVectorIndex.from_path(str(pth))
+    return _INDEX_CACHE[key]
+
+
+def _as_items(matches: List[Dict]) -> List[Tuple[float, Dict]]:
+    return [(m["score"], {"id": m["id"], **m["metadata"]}) for m in matches]
+
+
+def search(embeddings_path: str, query: str, k: int = 3, dim: Optional[int] = None):
+    index = load_index(embeddings_path)
+    qvec = get_embedding(query, provider="local", dim=dim or index.dim)
+    return _as_items(index.search(qvec, top_k=k))
+
+
+def search_batch(
+    embeddings_path: str, queries: List[str], k: int = 3, dim: Optional[int] = None
+):
+    """Search several queries at once; returns one result list per query, in order."""
+    index = load_index(embeddings_path)
+    qmat = [get_embedding(q, provider="local", dim=dim or index.dim) for q in queries]
+    return [_as_items(matches) for matches in index.search_batch(qmat, top_k=k)]
 
-def load_embeddings(path: str):
-    path = Path(path)
-    if not path.exists():
-        raise FileNotFoundError(path)
-    items = []
-    with path.open("r", encoding="utf-8") as fh:
-        for line in fh:
-            obj = json.loads(line)
-            items.append(obj)
-    return items
-
-def dot(a: List[float], b: List[float]) -> float:
-    return sum(x*y for x,y in zip(a,b))
-
-def norm(a: List[float]) -> float:
-    return math.sqrt(sum(x*x for x in a))
-
-def cosine_sim(a: List[float], b: List[float]) -> float:
-    na = norm(a)
-    nb = norm(b)
-    if na == 0 or nb == 0:
-        return 0.0
-    return dot(a,b) / (na * nb)
-
-def search(embeddings_path: str, query: str, k: int = 3, dim: int = 64):
-    items = load_embeddings(embeddings_path)
-    qvec = get_embedding(query, provider="local", dim=dim)
-    scored = []
-    for it in items:
-        emb = it.get("embedding")
-        if not emb:
-            continue
-        score = cosine_sim(qvec, emb)
-        scored.append((score, it))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return scored[:k]
 
 def print_results(results):
     print(f"{'SCORE':>8}  {'ID':60}  {'FILENAME':40}  {'CHUNK_ID':>7}")
@@ -72,14 +73,19 @@ def print_results(results):
     for score, it in results:
         print(f"{score:8.4f}  {it['id'][:60]:60}  {it['filename'][:40]:40}  {it['chunk_id']:7d}")
 
-if __name__ == "__main__":
+
+def main():
     if len(sys.argv) < 3:
         print("Usage: python3 scripts/search_documents.py /path/to/embeddings.jsonl \"query text\" [k] [dim]")
         raise SystemExit(1)
     emb_path = sys.argv[1]
     query = sys.argv[2]
     k = int(sys.argv[3]) if len(sys.argv) > 3 else 3
-    dim = int(sys.argv[4]) if len(sys.argv) > 4 else 64
+    dim = int(sys.argv[4]) if len(sys.argv) > 4 else None
 
     results = search(emb_path, query, k=k, dim=dim)
-    print_results(results)
\ No newline at end of file
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,14 @@ __author__ = "AI Portfolio"
 __email__ = "vn6295337@gmail.com"
 
 # Import main functions for easy access
-from .orchestrator import orchestrate_query
+from .orchestrator import (
+    orchestrate_query,
+    orchestrate_queries,
+    orchestrate_query_stream,
+)
 
 __all__ = [
     "orchestrate_query",
-]
\ No newline at end of file
+    "orchestrate_queries",
+    "orchestrate_query_stream",
+]
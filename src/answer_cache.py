@@ -0,0 +1,154 @@
+# src/answer_cache.py
+"""
+End-to-end answer cache for orchestrate_query.
+
+Results are keyed on (normalized query, top_k, LLM params, index fingerprint).
+The fingerprint comes from the retrieval backend and changes whenever ingestion
+rewrites the index, so stale answers are never served after re-ingestion.
+
+Tiers:
+- In-memory LRU (always on, bounded, optional TTL)
+- Optional SQLite file shared across processes/restarts (ANSWER_CACHE_PATH)
+
+Only deterministic calls (temperature 0) are cached; see is_cacheable().
+"""
+
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+def make_answer_key(
+    query: str, top_k: int, llm_params: Dict[str, Any], fingerprint: str
+) -> str:
+    """Stable cache key for an orchestrate_query call."""
+    payload = json.dumps(
+        {
+            "query": " ".join(query.split()),
+            "top_k": top_k,
+            "llm_params": llm_params,
+            "index": fingerprint,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(llm_params: Dict[str, Any]) -> bool:
+    """Only temperature-0 calls produce repeatable answers."""
+    try:
+        return float(llm_params.get("temperature", 0.0)) == 0.0
+    except (TypeError, ValueError):
+        return False
+
+
+class AnswerCache:
+    """
+    Two-tier answer cache. Values are JSON-serializable result dicts; callers
+    always receive a fresh copy.
+
+    Args:
+        maxsize: Entries kept in memory (0 disables the memory tier)
+        ttl_s: Optional entry lifetime in seconds (applies to both tiers)
+        path: Optional SQLite file for the on-disk tier
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl_s: Optional[float] = None,
+        path: Optional[str] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY,"
+                " created REAL NOT NULL,"
+                " value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_s is not None and time.time() - created >= self.ttl_s
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None."""
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None and not self._expired(entry[0]):
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[1])
+            if entry is not None:
+                del self._mem[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT created, value FROM answers WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[0]):
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    return json.loads(row[1])
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result (must be JSON-serializable)."""
+        value = json.dumps(result, default=str)
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, value)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO answers (key, created, value) "
+                    "VALUES (?, ?, ?)",
+                    (key, created, value),
+                )
+                self._conn.commit()
+
+    def _remember(self, key: str, created: float, value: str) -> None:
+        if self.maxsize <= 0:
+            return
+        self._mem[key] = (created, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "size": len(self._mem),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self) -> None:
+        """Drop all entries from both tiers and reset counters."""
+        with self._lock:
+            self._mem.clear()
+            self.hits = 0
+            self.misses = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM answers")
+                self._conn.commit()
@@ -0,0 +1,196 @@
+# src/circuit_breaker.py
+"""
+Circuit breaker with rolling error-rate and latency windows.
+
+States:
+- closed: calls pass; outcomes are recorded in a time-based rolling window
+- open: calls are rejected until the cooldown expires (tripped when the
+  window error rate reaches the threshold over at least min_requests calls)
+- half_open: a single probe call is let through; success closes the breaker,
+  failure re-opens it
+
+Used by src/llm_providers.py to skip dead providers without paying their
+timeout and to order providers by observed health.
+"""
+
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    Args:
+        window_s: Length of the rolling outcome window in seconds
+        min_requests: Calls in the window before the error rate can trip the breaker
+        error_rate: Error rate (0-1] at which the breaker opens
+        cooldown_s: Time spent open before a half-open probe is allowed
+        probe_timeout_s: A half-open probe not reported within this time is
+            considered lost and another probe is allowed
+        clock: Time source (for tests)
+    """
+
+    def __init__(
+        self,
+        window_s: float = 60.0,
+        min_requests: int = 5,
+        error_rate: float = 0.5,
+        cooldown_s: float = 30.0,
+        probe_timeout_s: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if not 0.0 < error_rate <= 1.0:
+            raise ValueError(f"error_rate must be in (0, 1], got {error_rate}")
+        self.window_s = window_s
+        self.min_requests = max(1, min_requests)
+        self.error_rate = error_rate
+        self.cooldown_s = cooldown_s
+        self.probe_timeout_s = probe_timeout_s
+        self._clock = clock
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        # (timestamp, ok, latency_s or None)
+        self._window: deque = deque()
+        self._lock = threading.Lock()
+        self.opens = 0
+        self.rejected = 0
+
+    def _trim(self, now: float) -> None:
+        while self._window and now - self._window[0][0] > self.window_s:
+            self._window.popleft()
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.cooldown_s:
+            self._state = HALF_OPEN
+            self._probe_started = None
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(self._clock())
+
+    def available(self) -> bool:
+        """True if a call would currently be allowed (does not reserve a probe)."""
+        with self._lock:
+            now = self._clock()
+            state = self._current_state(now)
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN:
+                return (
+                    self._probe_started is None
+                    or now - self._probe_started >= self.probe_timeout_s
+                )
+            return False
+
+    def try_acquire(self) -> bool:
+        """Reserve a call: granted when closed, one probe at a time when half-open."""
+        with self._lock:
+            now = self._clock()
+            state = self._current_state(now)
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and (
+                self._probe_started is None
+                or now - self._probe_started >= self.probe_timeout_s
+            ):
+                self._probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self) -> None:
+        """Give back a half-open probe whose call was abandoned (e.g. cancelled)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_started = None
+
+    def record_success(self, latency_s: Optional[float] = None) -> None:
+        with self._lock:
+            now = self._clock()
+            if self._current_state(now) == HALF_OPEN:
+                # Recovered: start a fresh window
+                self._state = CLOSED
+                self._probe_started = None
+                self._window.clear()
+            self._window.append((now, True, latency_s))
+            self._trim(now)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = self._clock()
+            state = self._current_state(now)
+            self._window.append((now, False, None))
+            self._trim(now)
+            if state == HALF_OPEN:
+                self._trip(now)
+                return
+            if state == CLOSED and len(self._window) >= self.min_requests:
+                failures = sum(1 for _, ok, _ in self._window if not ok)
+                if failures / len(self._window) >= self.error_rate:
+                    self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_started = None
+        self.opens += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._probe_started = None
+            self._window.clear()
+            self.opens = 0
+            self.rejected = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Monitoring view: state, window counts, error rate and latency percentiles."""
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            state = self._current_state(now)
+            total = len(self._window)
+            failures = sum(1 for _, ok, _ in self._window if not ok)
+            latencies = sorted(
+                lat for _, ok, lat in self._window if ok and lat is not None
+            )
+            return {
+                "state": state,
+                "requests": total,
+                "failures": failures,
+                "error_rate": (failures / total) if total else 0.0,
+                "latency_p50_s": latencies[len(latencies) // 2] if latencies else None,
+                "latency_p95_s": (
+                    latencies[max(0, -(-95 * len(latencies) // 100) - 1)]
+                    if latencies
+                    else None
+                ),
+                "opens": self.opens,
+                "rejected": self.rejected,
+                "open_for_s": (
+                    max(0.0, self.cooldown_s - (now - self._opened_at))
+                    if state == OPEN
+                    else 0.0
+                ),
+            }
+
+    def expected_cost(self) -> float:
+        """
+        Health score used for ordering (lower is better): median latency divided
+        by the success rate. 0.0 when there is no latency data yet, so untried
+        providers keep their static priority.
+        """
+        snap = self.snapshot()
+        if snap["latency_p50_s"] is None:
+            return 0.0
+        return snap["latency_p50_s"] / max(1.0 - snap["error_rate"], 0.01)
@@ -1,4 +1,6 @@
 import os
+from typing import Any
+
 from dotenv import load_dotenv
 
 # Load local .env for development
@@ -38,7 +40,7 @@ def get_required(key: str) -> str:
         raise RuntimeError(f"Missing required environment variable: {key}")
     return value
 
-def get_optional(key: str, default=None):
+def get_optional(key: str, default: Any = None) -> Any:
     """
     Get optional config value from environment or Streamlit secrets.
     
@@ -60,8 +62,36 @@ def get_optional(key: str, default=None):
     # Fall back to environment variables
     return os.getenv(key, default)
 
-# Pinecone (Required)
-PINECONE_API_KEY = get_required("PINECONE_API_KEY")
+# Retrieval backend: "pinecone" (remote) or "local" (in-process NumPy index)
+RETRIEVAL_BACKEND = (
+    get_optional("RETRIEVAL_BACKEND", "pinecone") or "pinecone"
+).lower()
+LOCAL_INDEX_PATH = get_optional("LOCAL_INDEX_PATH", "data/chunks_semantic.store")
+LOCAL_EMBEDDING_PROVIDER = get_optional(
+    "LOCAL_EMBEDDING_PROVIDER", "sentence-transformers"
+)
+# Local index search: "exact" (brute force) or "ivf" (approximate, for large corpora)
+LOCAL_INDEX_TYPE = get_optional("LOCAL_INDEX_TYPE", "exact")
+LOCAL_IVF_NPROBE = int(get_optional("LOCAL_IVF_NPROBE", 8))
+LOCAL_IVF_N_LISTS = int(get_optional("LOCAL_IVF_N_LISTS", 0)) or None
+
+# End-to-end answer cache for temperature-0 queries (memory LRU + optional SQLite file)
+ANSWER_CACHE_SIZE = int(get_optional("ANSWER_CACHE_SIZE", 256))
+ANSWER_CACHE_TTL_S = float(get_optional("ANSWER_CACHE_TTL_S", 0)) or None
+ANSWER_CACHE_PATH = get_optional("ANSWER_CACHE_PATH")
+
+# Semantic cache: paraphrases that retrieve the same chunks reuse a cached answer
+SEMANTIC_CACHE_ENABLED = str(
+    get_optional("SEMANTIC_CACHE_ENABLED", "false")
+).lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(get_optional("SEMANTIC_CACHE_THRESHOLD", 0.95))
+SEMANTIC_CACHE_SIZE = int(get_optional("SEMANTIC_CACHE_SIZE", 1000))
+
+# Pinecone (Required unless the local backend is selected)
+if RETRIEVAL_BACKEND == "pinecone":
+    PINECONE_API_KEY = get_required("PINECONE_API_KEY")
+else:
+    PINECONE_API_KEY = get_optional("PINECONE_API_KEY")
 PINECONE_INDEX_NAME = get_optional("PINECONE_INDEX_NAME", "rag-semantic-384")
 
 # LLM provider keys (at least one required)
@@ -74,6 +104,22 @@ GEMINI_MODEL = get_optional("GEMINI_MODEL", "gemini-2.5-flash")
 GROQ_MODEL = get_optional("GROQ_MODEL", "llama-3.1-8b-instant")
 OPENROUTER_MODEL = get_optional("OPENROUTER_MODEL", "mistralai/mistral-7b-instruct:free")
 
+# Client-side LLM rate limits per provider (requests/tokens per minute, 0 = unlimited).
+# Defaults follow the free tiers; raise them for paid plans.
+GEMINI_RPM = float(get_optional("GEMINI_RPM", 15))
+GEMINI_TPM = float(get_optional("GEMINI_TPM", 250000))
+GROQ_RPM = float(get_optional("GROQ_RPM", 30))
+GROQ_TPM = float(get_optional("GROQ_TPM", 6000))
+OPENROUTER_RPM = float(get_optional("OPENROUTER_RPM", 20))
+OPENROUTER_TPM = float(get_optional("OPENROUTER_TPM", 0))
+# Longest a call waits for rate-limit capacity, and how many calls may wait,
+# before failing over
+LLM_RATE_LIMIT_MAX_WAIT_S = float(get_optional("LLM_RATE_LIMIT_MAX_WAIT_S", 10))
+LLM_RATE_LIMIT_QUEUE_SIZE = int(get_optional("LLM_RATE_LIMIT_QUEUE_SIZE", 32))
+
+# Prometheus metrics endpoint served by src/metrics.py (0 = disabled)
+METRICS_PORT = int(get_optional("METRICS_PORT", 0))
+
 # Supabase (Optional - not used in current deployment)
 SUPABASE_URL = get_optional("SB_PROJECT_URL")
-SUPABASE_ANON_KEY = get_optional("SB_ANON_KEY")
\ No newline at end of file
+SUPABASE_ANON_KEY = get_optional("SB_ANON_KEY")
@@ -2,62 +2,260 @@
 """
 Text chunking utility for RAG ingestion.
 Inputs: list of docs from load_docs.py
-Output: list of chunks with metadata
+Output: list of chunks with metadata (iter_chunks yields them lazily)
+
+Chunk boundaries are computed as (start, end) offsets snapped to section,
+sentence and word boundaries (chunk_spans); chunks carry those offsets so a
+snippet can be cut from the source document again.
+
+chunk_spans copies no text. The chunk dicts from iter_chunks/chunk_documents
+do hold text[start:end] (one copy per chunk, no strip), because every consumer
+embeds it straight away; callers that only need positions use chunk_spans.
 """
 
-from typing import List, Dict
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-def chunk_text(
+# Bumped whenever chunk boundaries change, so stored chunks can be recognized as stale
+CHUNKER_VERSION = 2
+
+# Places a chunk may end / the next one may start, strongest first. Loaded
+# documents are whitespace-collapsed, so headings show up as "## Title" after a
+# space; blank lines only exist in raw text passed to chunk_text directly.
+_SECTION_RE = re.compile(r"\n[ \t]*\n\s*|\s(?=#{1,6}\s)")
+_SENTENCE_RE = re.compile(r"[.!?][\"')\]]*\s+")
+# A heading this close before a section break would end a chunk on its own
+_HEADING_MAX_CHARS = 120
+
+
+def chunking_key(max_tokens: int, overlap: int, tokenizer: Any = None) -> Dict:
+    """
+    Everything that decides chunk boundaries; ingestion state stores it to detect
+    re-chunking.
+    """
+    name = None
+    if tokenizer is not None:
+        name = getattr(tokenizer, "name_or_path", None) or type(tokenizer).__name__
+    return {
+        "version": CHUNKER_VERSION,
+        "max_tokens": max_tokens,
+        "overlap": overlap,
+        "tokenizer": name,
+    }
+
+
+def _boundaries(pattern: "re.Pattern", text: str) -> List[int]:
+    """Sorted offsets where the next piece of text starts."""
+    return [m.end() for m in pattern.finditer(text)]
+
+
+def _last_between(positions: List[int], low: int, high: int) -> int:
+    """Largest position p with low < p <= high, or -1."""
+    i = bisect_right(positions, high) - 1
+    return positions[i] if i >= 0 and positions[i] > low else -1
+
+
+def _first_between(positions: List[int], low: int, high: int) -> int:
+    """Smallest position p with low <= p < high, or -1."""
+    i = bisect_left(positions, low)
+    return positions[i] if i < len(positions) and positions[i] < high else -1
+
+
+def _section_cut(text: str, sections: List[int], low: int, high: int) -> int:
+    """
+    Last section break in (low, high] that does not leave a heading at the chunk
+    end, or -1.
+    """
+    i = bisect_right(sections, high) - 1
+    while i >= 0 and sections[i] > low:
+        prev = sections[i - 1] if i > 0 else -1
+        if (
+            prev > low
+            and text[prev] == "#"
+            and sections[i] - prev <= _HEADING_MAX_CHARS
+        ):
+            i -= 1
+            continue
+        return sections[i]
+    return -1
+
+
+def _word_cut(text: str, low: int, high: int) -> int:
+    """Last word start in (low, high], or -1 (words are scanned, not indexed)."""
+    p = high
+    while p > low and not text[p - 1].isspace():
+        p -= 1
+    return p if p > low else -1
+
+
+def _word_start(text: str, low: int, high: int) -> int:
+    """First word start in [low, high), or -1."""
+    p = low
+    while p < high and not (text[p - 1].isspace() and not text[p].isspace()):
+        p += 1
+    return p if p < high else -1
+
+
+def _token_offsets(
+    tokenizer: Any, texts: List[str]
+) -> List[List[Tuple[int, int]]]:
+    """(start, end) offsets of every token, one list per text, in one batch call."""
+    enc = tokenizer(
+        texts, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )
+    return [[(int(s), int(e)) for s, e in om] for om in enc["offset_mapping"]]
+
+
+def chunk_spans(
     text: str,
     max_tokens: int = 300,
-    overlap: int = 50
-) -> List[str]:
+    overlap: int = 50,
+    tokenizer: Any = None
+) -> List[Tuple[int, int]]:
     """
-    Simple whitespace-based chunking.
-    Assumes ~1 token ≈ 4 chars (rough approximation).
-    
+    Compute chunk boundaries as (start, end) character offsets into text.
+
+    Each window of ~max_tokens (1 token ≈ 4 chars) ends at the strongest boundary
+    in its second half: a section break (blank line or markdown heading), else a
+    sentence end, else a word gap; only a single word longer than the window is
+    cut. The next window starts ~overlap tokens before the previous end, moved
+    forward to a sentence (or word) start. Spans exclude surrounding whitespace,
+    and no text is copied; slice text[start:end] when the chunk is needed.
+
+    With a tokenizer (a fast HuggingFace tokenizer, see
+    embeddings.get_model_tokenizer), max_tokens and overlap count real tokens:
+    the text is tokenized once and windows are measured on the token offsets,
+    so no chunk exceeds max_tokens tokens.
+
     Args:
         text: Text to chunk
         max_tokens: Maximum tokens per chunk
         overlap: Number of tokens to overlap between chunks
-        
+        tokenizer: Optional tokenizer used to count tokens
+
     Returns:
-        List of text chunks
-        
+        List of (start, end) offsets
+
     Raises:
-        ValueError: If max_tokens or overlap are not positive
+        ValueError: If max_tokens is not positive, or overlap is negative or
+            not less than max_tokens
     """
+    offsets = _token_offsets(tokenizer, [text])[0] if tokenizer is not None else None
+    return _spans(text, max_tokens, overlap, offsets)
+
+
+def _spans(
+    text: str,
+    max_tokens: int,
+    overlap: int,
+    offsets: Optional[List[Tuple[int, int]]]
+) -> List[Tuple[int, int]]:
     if max_tokens <= 0:
         raise ValueError(f"max_tokens must be positive, got {max_tokens}")
     if overlap < 0:
         raise ValueError(f"overlap must be non-negative, got {overlap}")
     if overlap >= max_tokens:
         raise ValueError(f"overlap ({overlap}) must be less than max_tokens ({max_tokens})")
-        
+
     approx_chars = max_tokens * 4
     approx_overlap = overlap * 4
-
-    chunks = []
-    start = 0
     text_len = len(text)
+    sections = _boundaries(_SECTION_RE, text)
+    sentences = _boundaries(_SENTENCE_RE, text)
+    if offsets is not None:
+        tok_starts = [s for s, _ in offsets]
+        tok_ends = [e for _, e in offsets]
 
+    spans = []
+    start = 0
     while start < text_len:
-        end = start + approx_chars
-        chunk = text[start:end]
+        while start < text_len and text[start].isspace():
+            start += 1
+        if start >= text_len:
+            break
+        if offsets is None:
+            limit = start + approx_chars
+            floor = start + approx_chars // 2
+        else:
+            # First token not entirely before start; the window holds max_tokens from
+            # there
+            ti = bisect_right(tok_ends, start)
+            if ti + max_tokens >= len(offsets):
+                limit = text_len
+            else:
+                limit = tok_starts[ti + max_tokens]
+                floor = tok_starts[ti + max_tokens // 2]
+        if limit >= text_len:
+            end = text_len
+        else:
+            # Never end in the first half, so chunks stay close to the budget
+            end = _section_cut(text, sections, floor, limit)
+            if end == -1:
+                end = _last_between(sentences, floor, limit)
+            if end == -1:
+                end = _word_cut(text, floor, limit)
+            if end == -1:
+                end = limit
 
-        if chunk.strip():
-            chunks.append(chunk.strip())
+        e = end
+        while text[e - 1].isspace():
+            e -= 1
+        spans.append((start, e))
+        if end >= text_len:
+            break
 
-        # next window with overlap
-        start = start + approx_chars - approx_overlap
-        # Ensure we don't go backwards
-        if start <= 0:
-            start = approx_chars
+        # next window with overlap, starting at a sentence (or word) start
+        nxt = end
+        if overlap:
+            if offsets is None:
+                target = max(end - approx_overlap, start + 1)
+            else:
+                te = bisect_left(tok_starts, end)
+                target = tok_starts[max(te - overlap, ti + 1)] if te - 1 > ti else end
+            cut = _first_between(sentences, target, end)
+            if cut == -1:
+                cut = _word_start(text, target, end)
+            if cut != -1:
+                nxt = cut
+        start = nxt
 
-    return chunks
+    return spans
 
 
-def chunk_documents(docs: List[Dict], max_tokens: int = 300, overlap: int = 50):
+def chunk_text(
+    text: str,
+    max_tokens: int = 300,
+    overlap: int = 50,
+    tokenizer: Any = None
+) -> List[str]:
+    """
+    Split text into chunks at section, sentence or word boundaries (see chunk_spans).
+    
+    Args:
+        text: Text to chunk
+        max_tokens: Maximum tokens per chunk
+        overlap: Number of tokens to overlap between chunks
+        tokenizer: Optional tokenizer used to count tokens (see chunk_spans)
+        
+    Returns:
+        List of text chunks
+        
+    Raises:
+        ValueError: If max_tokens or overlap are not positive
+    """
+    spans = chunk_spans(
+        text, max_tokens=max_tokens, overlap=overlap, tokenizer=tokenizer
+    )
+    return [text[s:e] for s, e in spans]
+
+
+def chunk_documents(
+    docs: List[Dict],
+    max_tokens: int = 300,
+    overlap: int = 50,
+    tokenizer: Any = None
+) -> List[Dict]:
     """
     Chunk a list of documents into smaller pieces for embedding.
     
@@ -65,9 +263,12 @@ def chunk_documents(docs: List[Dict], max_tokens: int = 300, overlap: int = 50):
         docs: List of document dictionaries with 'filename' and 'text' keys
         max_tokens: Maximum tokens per chunk
         overlap: Number of tokens to overlap between chunks
+        tokenizer: Optional tokenizer used to count tokens (see chunk_spans);
+            documents are tokenized in batches
         
     Returns:
-        List of chunk dictionaries with filename, chunk_id, text, and chars keys
+        List of chunk dictionaries with filename, chunk_id, text, chars, start
+        and end keys (start/end: offsets of the chunk in the document text)
         
     Raises:
         TypeError: If docs is not a list or contains non-dict elements
@@ -75,27 +276,71 @@ def chunk_documents(docs: List[Dict], max_tokens: int = 300, overlap: int = 50):
     """
     if not isinstance(docs, list):
         raise TypeError("docs must be a list")
-        
-    all_chunks = []
+    return list(
+        iter_chunks(docs, max_tokens=max_tokens, overlap=overlap, tokenizer=tokenizer)
+    )
+
+
+# Documents tokenized per tokenizer call in iter_chunks
+_TOKENIZE_BATCH = 64
+
+
+def _ok_docs(docs: Iterable[Dict]) -> Iterator[Dict]:
     for d in docs:
         if not isinstance(d, dict):
             raise TypeError("Each document must be a dictionary")
-            
-        if d.get("status") != "OK":
-            continue
+        if d.get("status") == "OK":
+            yield d
 
-        filename = d["filename"]
-        text = d["text"]
-        raw_chunks = chunk_text(text, max_tokens=max_tokens, overlap=overlap)
 
-        for i, ch in enumerate(raw_chunks):
-            all_chunks.append({
+def iter_chunks(
+    docs: Iterable[Dict],
+    max_tokens: int = 300,
+    overlap: int = 50,
+    tokenizer: Any = None
+) -> Iterator[Dict]:
+    """
+    Generator version of chunk_documents: accepts any iterable of documents
+    (e.g. iter_markdown_docs) and yields chunk dictionaries one at a time.
+
+    Each chunk's text is sliced when the chunk is yielded, not when the
+    document's spans are computed, so only the chunks the caller has pulled
+    exist as strings.
+
+    Raises:
+        TypeError: If a document is not a dictionary
+        KeyError: If required keys are missing from document dictionaries
+    """
+    batch: List[Dict] = []
+    for d in _ok_docs(docs):
+        batch.append(d)
+        if tokenizer is None or len(batch) >= _TOKENIZE_BATCH:
+            yield from _chunk_batch(batch, max_tokens, overlap, tokenizer)
+            batch = []
+    if batch:
+        yield from _chunk_batch(batch, max_tokens, overlap, tokenizer)
+
+
+def _chunk_batch(
+    docs: List[Dict], max_tokens: int, overlap: int, tokenizer: Any
+) -> Iterator[Dict]:
+    texts = [d["text"] for d in docs]
+    all_offsets = (
+        _token_offsets(tokenizer, texts)
+        if tokenizer is not None
+        else [None] * len(docs)
+    )
+    for d, text, offsets in zip(docs, texts, all_offsets):
+        filename = d["filename"]
+        for i, (start, end) in enumerate(_spans(text, max_tokens, overlap, offsets)):
+            yield {
                 "filename": filename,
                 "chunk_id": i,
-                "text": ch,
-                "chars": len(ch)
-            })
-    return all_chunks
+                "text": text[start:end],
+                "chars": end - start,
+                "start": start,
+                "end": end
+            }
 
 
 if __name__ == "__main__":
@@ -103,4 +348,4 @@ if __name__ == "__main__":
     sample = "This is a test text " * 200
     chunks = chunk_text(sample, max_tokens=50, overlap=10)
     print(f"Generated {len(chunks)} chunks")
-    print(chunks[0])
\ No newline at end of file
+    print(chunks[0])
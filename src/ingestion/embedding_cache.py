@@ -0,0 +1,117 @@
+# RAG-document-assistant/ingestion/embedding_cache.py
+"""
+Persistent content-addressed embedding cache for ingestion.
+
+Embeddings are stored in SQLite keyed by sha256(provider, model name, dim, chunk
+text), so re-ingesting a corpus only sends new or changed chunk texts to the
+model. Vectors are stored as raw bytes in the dtype they were produced in, so a
+cache hit returns exactly what the model returned.
+
+Usage:
+    cache = EmbeddingCache("data/embedding_cache.sqlite")
+    embedded = batch_embed_chunks(chunks, provider="sentence-transformers", cache=cache)
+    print(cache.stats())
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def cache_key(text: str, provider: str, model_name: Optional[str], dim: int) -> str:
+    """Content address of an embedding: sha256 over provider, model, dim and text."""
+    h = hashlib.sha256()
+    h.update(f"{provider}\0{model_name or ''}\0{dim}\0".encode("utf-8"))
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed embedding cache, safe to share between threads.
+
+    Args:
+        path: SQLite database file (created if missing)
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " dtype TEXT NOT NULL,"
+            " vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, provider: str, model_name: Optional[str], dim: int) -> str:
+        """Cache key for a chunk text (see cache_key)."""
+        return cache_key(text, provider, model_name, dim)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Return {key: vector} for the keys present in the cache."""
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique), _LOOKUP_BATCH):
+                batch = unique[i:i + _LOOKUP_BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({marks})",
+                    batch,
+                ).fetchall()
+                for key, dtype, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=dtype).tolist()
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        """Store (key, vector) pairs; vector may be a list of floats or an array."""
+        rows = []
+        for key, vec in items:
+            arr = np.asarray(vec)
+            if arr.dtype not in (np.float32, np.float64):
+                arr = arr.astype(np.float64)
+            rows.append((key, arr.dtype.str, arr.tobytes()))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dtype, vector) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters since this cache object was opened."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
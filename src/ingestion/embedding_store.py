@@ -0,0 +1,519 @@
+# RAG-document-assistant/ingestion/embedding_store.py
+"""
+Binary, memory-mapped embedding store.
+
+A store is a directory:
+- embeddings.npy : (N, dim) float32 matrix of L2-normalized vectors, opened with
+                   np.load(mmap_mode="r") so startup is instant and pages are
+                   shared between worker processes through the OS page cache
+- rows.npy       : (N, 7) int64 [filename_idx, chunk_id, chars, text_start, text_end,
+                   doc_start, doc_end]; doc_* are the chunk's character offsets in
+                   the cleaned source document (-1 if unknown). Stores written
+                   before offsets existed have 5 columns and still load.
+- texts.bin      : UTF-8 chunk texts concatenated; rows index byte ranges into it
+- meta.json      : {"version", "dim", "count", "ids", "filenames"}
+
+Writers put these files in a versioned subdirectory ("v1", "v2", ...) and name
+the current one in a CURRENT file, replaced atomically, so a reader always sees
+either the old or the new store, never a missing one. Stores written before
+versioning keep the files directly in the directory and still load.
+
+Compared with chunks.jsonl (JSON arrays of Python floats) this is ~10x smaller
+and needs no parsing.
+
+Functions:
+- write_store(path, records): Write records
+  ({id, filename, chunk_id, text, chars, start, end, embedding})
+- StoreWriter(path): Incremental, resumable writer used by write_store and
+  streaming ingestion
+- is_store(path): True if path is a store directory
+- EmbeddingStore(path): Read-only view (matrix, ids, metadata, lazy texts)
+- convert_jsonl(jsonl_path, store_path): Convert a chunks JSONL file to a store
+
+CLI:
+> python3 embedding_store.py data/chunks.jsonl data/chunks.store
+"""
+
+import os
+import json
+import mmap
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+STORE_VERSION = 1
+_EMBEDDINGS = "embeddings.npy"
+_ROWS = "rows.npy"
+_TEXTS = "texts.bin"
+_META = "meta.json"
+# Names the versioned subdirectory holding the current store files
+_CURRENT = "CURRENT"
+
+
+def _data_dir(path: str) -> str:
+    """Directory holding the store files: the CURRENT version, else path itself."""
+    try:
+        with open(os.path.join(path, _CURRENT), "r", encoding="utf-8") as fh:
+            return os.path.join(path, fh.read().strip())
+    except OSError:
+        return path
+
+
+def is_store(path: str) -> bool:
+    """Return True if path is an embedding store directory."""
+    data = _data_dir(path)
+    return os.path.isfile(os.path.join(data, _META)) and os.path.isfile(
+        os.path.join(data, _EMBEDDINGS)
+    )
+
+
+# Records buffered by write_store between appends
+_WRITE_BATCH = 1024
+
+
+def write_store(path: str, records: Iterable[Dict[str, Any]]) -> Path:
+    """
+    Write embedded chunk records to a store directory, replacing any existing store.
+
+    The store is written to a sibling temp directory and swapped in atomically,
+    so readers never see a half-written or missing store. Records are streamed
+    to disk in batches, so records may be a generator larger than memory.
+
+    Args:
+        path: Store directory
+        records: Dicts with "embedding" and optionally "id", "filename",
+            "chunk_id", "text", "chars", "start", "end"
+
+    Returns:
+        Path to the store directory
+
+    Raises:
+        ValueError: If there are no records or embedding dimensions disagree
+    """
+    writer = StoreWriter(path)
+    try:
+        batch: List[Dict[str, Any]] = []
+        for r in records:
+            batch.append(r)
+            if len(batch) >= _WRITE_BATCH:
+                writer.append(batch)
+                batch = []
+        if batch:
+            writer.append(batch)
+        return writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+_CHECKPOINT = "checkpoint.json"
+# Append-only files in the temp directory, converted to .npy / meta.json by close()
+_VECTORS_RAW = "embeddings.f32"
+_ROWS_RAW = "rows.i64"
+_IDS_RAW = "ids.jsonl"
+# Columns of rows.npy (see module docstring)
+_ROW_WIDTH = 7
+
+
+class StoreWriter:
+    """
+    Append records to a store in batches without holding them in memory.
+
+    Data goes to append-only files in a sibling temp directory ("<path>.tmp");
+    close() converts them to the store format, moves the directory into path as
+    the next version and points CURRENT at it.
+    save_checkpoint() flushes everything and records the file sizes, so after a
+    crash StoreWriter(path, resume=True) truncates any partially written batch
+    and continues from the last checkpoint.
+
+    Args:
+        path: Store directory
+        resume: Continue an interrupted write if a checkpoint exists
+            (otherwise any leftover temp directory is discarded)
+
+    Attributes:
+        count: Records written so far
+        checkpoint: The "extra" dict saved with the resumed checkpoint, or None
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = Path(path)
+        self.tmp = self.path.with_name(self.path.name + ".tmp")
+        self.count = 0
+        self.dim: Optional[int] = None
+        self.checkpoint: Optional[Dict[str, Any]] = None
+        self._filenames: List[str] = []
+        self._filename_idx: Dict[str, int] = {}
+        self._text_bytes = 0
+        self._ids_bytes = 0
+
+        state = self._load_checkpoint() if resume else None
+        if state is None:
+            if self.tmp.exists():
+                shutil.rmtree(self.tmp)
+            self.tmp.mkdir(parents=True)
+        else:
+            w = state["writer"]
+            self.count, self.dim = w["count"], w["dim"]
+            self._filenames = list(w["filenames"])
+            self._filename_idx = {f: i for i, f in enumerate(self._filenames)}
+            self._text_bytes, self._ids_bytes = w["text_bytes"], w["ids_bytes"]
+            self.checkpoint = state.get("extra")
+            # Drop anything written after the checkpoint
+            dim = self.dim or 0
+            for name, size in (
+                (_VECTORS_RAW, self.count * dim * 4),
+                (_ROWS_RAW, self.count * _ROW_WIDTH * 8),
+                (_TEXTS, self._text_bytes),
+                (_IDS_RAW, self._ids_bytes),
+            ):
+                fp = self.tmp / name
+                if fp.exists():
+                    os.truncate(fp, size)
+
+        self._fh = {
+            name: (self.tmp / name).open("ab")
+            for name in (_VECTORS_RAW, _ROWS_RAW, _TEXTS, _IDS_RAW)
+        }
+
+    def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        try:
+            with (self.tmp / _CHECKPOINT).open("r", encoding="utf-8") as fh:
+                state = json.load(fh)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if (
+            state.get("version") != STORE_VERSION
+            or state.get("writer", {}).get("row_width") != _ROW_WIDTH
+        ):
+            return None
+        return state
+
+    def append(self, records: Sequence[Dict[str, Any]]) -> None:
+        """
+        Append a batch of records (same shape as write_store).
+
+        Raises:
+            ValueError: If embedding dimensions disagree
+        """
+        if not records:
+            return
+        matrix = np.asarray([r["embedding"] for r in records], dtype=np.float32)
+        if matrix.ndim != 2 or (self.dim is not None and matrix.shape[1] != self.dim):
+            raise ValueError("Inconsistent embedding dimensions")
+        self.dim = int(matrix.shape[1])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+
+        rows = np.empty((len(records), _ROW_WIDTH), dtype=np.int64)
+        ids = []
+        texts = []
+        for i, r in enumerate(records):
+            fname = str(r.get("filename") or "")
+            if fname not in self._filename_idx:
+                self._filename_idx[fname] = len(self._filenames)
+                self._filenames.append(fname)
+            chunk_id = int(r.get("chunk_id") or 0)
+            ids.append(
+                json.dumps(
+                    str(r.get("id") or f"{fname}::{chunk_id}"), ensure_ascii=False
+                )
+            )
+            data = (r.get("text") or "").encode("utf-8")
+            texts.append(data)
+            doc_start, doc_end = r.get("start"), r.get("end")
+            if doc_start is None or doc_end is None:
+                doc_start = doc_end = -1
+            rows[i] = (
+                self._filename_idx[fname],
+                chunk_id,
+                int(r.get("chars") or 0),
+                self._text_bytes,
+                self._text_bytes + len(data),
+                int(doc_start),
+                int(doc_end),
+            )
+            self._text_bytes += len(data)
+
+        id_data = ("\n".join(ids) + "\n").encode("utf-8")
+        self._fh[_VECTORS_RAW].write(matrix.tobytes())
+        self._fh[_ROWS_RAW].write(rows.tobytes())
+        self._fh[_TEXTS].write(b"".join(texts))
+        self._fh[_IDS_RAW].write(id_data)
+        self._ids_bytes += len(id_data)
+        self.count += len(records)
+
+    def save_checkpoint(self, extra: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Flush all data and atomically record how much of it is complete, plus
+        caller state.
+        """
+        for fh in self._fh.values():
+            fh.flush()
+            os.fsync(fh.fileno())
+        state = {
+            "version": STORE_VERSION,
+            "writer": {
+                "count": self.count,
+                "dim": self.dim,
+                "row_width": _ROW_WIDTH,
+                "filenames": self._filenames,
+                "text_bytes": self._text_bytes,
+                "ids_bytes": self._ids_bytes,
+            },
+            "extra": extra or {},
+        }
+        tmp = self.tmp / (_CHECKPOINT + ".tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            json.dump(state, fh, ensure_ascii=False)
+        os.replace(tmp, self.tmp / _CHECKPOINT)
+
+    def _close_files(self) -> None:
+        for fh in self._fh.values():
+            fh.close()
+
+    def suspend(self) -> None:
+        """
+        Close the files but keep the temp directory and checkpoint for
+        StoreWriter(path, resume=True).
+        """
+        self._close_files()
+
+    def abort(self) -> None:
+        """Stop writing and discard the temp directory (the existing store stays)."""
+        self._close_files()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def close(self) -> Path:
+        """
+        Finish the store and swap it into place.
+
+        Returns:
+            Path to the store directory
+
+        Raises:
+            ValueError: If no records were written
+        """
+        self._close_files()
+        if not self.count:
+            shutil.rmtree(self.tmp, ignore_errors=True)
+            raise ValueError("No records to write")
+
+        # Raw files -> .npy, copied in blocks so memory stays bounded
+        for raw, final, width, dtype in (
+            (_VECTORS_RAW, _EMBEDDINGS, self.dim, np.float32),
+            (_ROWS_RAW, _ROWS, _ROW_WIDTH, np.int64),
+        ):
+            src = np.memmap(
+                self.tmp / raw, dtype=dtype, mode="r", shape=(self.count, width)
+            )
+            dst = np.lib.format.open_memmap(
+                self.tmp / final, mode="w+", dtype=dtype, shape=(self.count, width)
+            )
+            step = max(1, (64 << 20) // (width * np.dtype(dtype).itemsize))
+            for start in range(0, self.count, step):
+                dst[start:start + step] = src[start:start + step]
+            dst.flush()
+            del src, dst
+            os.remove(self.tmp / raw)
+
+        with (self.tmp / _IDS_RAW).open("r", encoding="utf-8") as fh:
+            ids = [json.loads(line) for line in fh]
+        os.remove(self.tmp / _IDS_RAW)
+        with (self.tmp / _META).open("w", encoding="utf-8") as fh:
+            json.dump({
+                "version": STORE_VERSION,
+                "dim": int(self.dim),
+                "count": self.count,
+                "ids": ids,
+                "filenames": self._filenames,
+            }, fh, ensure_ascii=False)
+        if (self.tmp / _CHECKPOINT).exists():
+            os.remove(self.tmp / _CHECKPOINT)
+
+        # Move the finished store in as the next version, then switch CURRENT
+        # to it with a single rename
+        out = self.path
+        out.mkdir(parents=True, exist_ok=True)
+        previous = (
+            os.path.basename(_data_dir(str(out))) if (out / _CURRENT).exists() else None
+        )
+        gen = 1
+        for entry in out.iterdir():
+            if entry.is_dir() and entry.name[:1] == "v" and entry.name[1:].isdigit():
+                gen = max(gen, int(entry.name[1:]) + 1)
+        version = f"v{gen}"
+        os.replace(self.tmp, out / version)
+        pointer = out / (_CURRENT + ".tmp")
+        pointer.write_text(version, encoding="utf-8")
+        os.replace(pointer, out / _CURRENT)
+
+        # Keep the previous version (or the files of an unversioned store) for
+        # readers that resolved it just before the switch; drop anything older
+        for entry in out.iterdir():
+            if entry.name in (_CURRENT, version, previous):
+                continue
+            if entry.is_dir():
+                if entry.name[:1] == "v" and entry.name[1:].isdigit():
+                    shutil.rmtree(entry, ignore_errors=True)
+            elif previous is not None and entry.name in (
+                _EMBEDDINGS,
+                _ROWS,
+                _TEXTS,
+                _META,
+            ):
+                os.remove(entry)
+        return out
+
+
+class _TextMap(Mapping):
+    """Read-only id -> text mapping that decodes texts from the store on access."""
+
+    def __init__(self, store: "EmbeddingStore"):
+        self._store = store
+
+    def __getitem__(self, cid: str) -> str:
+        return self._store.text(self._store.row_of(cid))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.ids)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, cid: object) -> bool:
+        return cid in self._store.id_to_row
+
+
+class _MetadataView(Sequence):
+    """Read-only per-row metadata sequence built on demand from rows.npy."""
+
+    def __init__(self, store: "EmbeddingStore"):
+        self._store = store
+
+    def __getitem__(self, row: Any) -> Any:  # type: ignore[override]
+        if isinstance(row, slice):
+            return [self._store.metadata(i) for i in range(*row.indices(len(self)))]
+        return self._store.metadata(row)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+
+class EmbeddingStore:
+    """
+    Read-only view of a store directory.
+
+    Attributes:
+        matrix: (N, dim) float32 memmap of normalized embeddings
+        ids: Chunk ids, one per row
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        if not is_store(str(self.path)):
+            raise FileNotFoundError(f"Embedding store not found: {self.path}")
+        data = Path(_data_dir(str(self.path)))
+        with (data / _META).open("r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError(
+                f"Unsupported store version {meta.get('version')} in {self.path}"
+            )
+        self.ids: List[str] = meta["ids"]
+        self.filenames: List[str] = meta["filenames"]
+        self.matrix = np.load(data / _EMBEDDINGS, mmap_mode="r")
+        self.rows = np.load(data / _ROWS, mmap_mode="r")
+        self._id_to_row: Optional[Dict[str, int]] = None
+        self._texts: Optional[mmap.mmap] = None
+        texts_path = data / _TEXTS
+        if texts_path.stat().st_size > 0:
+            with texts_path.open("rb") as fh:
+                self._texts = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def id_to_row(self) -> Dict[str, int]:
+        if self._id_to_row is None:
+            self._id_to_row = {cid: i for i, cid in enumerate(self.ids)}
+        return self._id_to_row
+
+    def row_of(self, cid: str) -> int:
+        """Row index of a chunk id. Raises KeyError if unknown."""
+        return self.id_to_row[cid]
+
+    def text(self, row: int) -> str:
+        """Decode the chunk text stored for row."""
+        start, end = int(self.rows[row, 3]), int(self.rows[row, 4])
+        if self._texts is None or start == end:
+            return ""
+        return self._texts[start:end].decode("utf-8")
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        """Metadata for row: filename, chunk_id, chars (+ start, end if recorded)."""
+        r = self.rows[row]
+        meta = {
+            "filename": self.filenames[int(r[0])],
+            "chunk_id": int(r[1]),
+            "chars": int(r[2]),
+        }
+        if len(r) > 5 and r[5] >= 0:
+            meta["start"] = int(r[5])
+            meta["end"] = int(r[6])
+        return meta
+
+    def metadata_view(self) -> Sequence:
+        """Lazy per-row metadata sequence (no per-row dicts built up front)."""
+        return _MetadataView(self)
+
+    def text_map(self) -> Mapping:
+        """Lazy id -> text mapping (used for citation snippets)."""
+        return _TextMap(self)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Yield records in the same shape as chunks.jsonl lines."""
+        for i, cid in enumerate(self.ids):
+            rec = {"id": cid, **self.metadata(i), "text": self.text(i)}
+            rec["embedding"] = self.matrix[i].tolist()
+            yield rec
+
+
+def read_jsonl_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield records with embeddings from a chunks JSONL file, skipping bad lines."""
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if obj.get("embedding"):
+                yield obj
+
+
+def convert_jsonl(jsonl_path: str, store_path: str) -> Path:
+    """Convert a chunks JSONL file into a store directory."""
+    return write_store(store_path, read_jsonl_records(jsonl_path))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print(
+            "Usage: python3 embedding_store.py /path/to/chunks.jsonl "
+            "/path/to/chunks.store"
+        )
+        raise SystemExit(1)
+    out = convert_jsonl(sys.argv[1], sys.argv[2])
+    print("Wrote embedding store:", out)
@@ -8,16 +8,20 @@ Supported providers:
 - "openai", "claude": Placeholders for future API-based embeddings
 
 Default model: all-MiniLM-L6-v2 (384 dimensions, good balance of speed/quality)
+
+sentence-transformers inputs are sorted by token length and encoded in batches
+under a padded-token budget (encode_texts), so short chunks are not padded to
+the length of long ones and memory per encode() call is bounded.
 """
 
 import hashlib
 import struct
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, Sequence, Tuple
 
 # Lazy-load sentence-transformers to avoid import errors if not installed
-_MODEL_CACHE = {}
+_MODEL_CACHE: Dict[str, Any] = {}
 
-def _get_sentence_transformer_model(model_name: str = "all-MiniLM-L6-v2"):
+def _get_sentence_transformer_model(model_name: str = "all-MiniLM-L6-v2") -> Any:
     """Lazy load and cache sentence transformer model."""
     if model_name not in _MODEL_CACHE:
         try:
@@ -30,6 +34,142 @@ def _get_sentence_transformer_model(model_name: str = "all-MiniLM-L6-v2"):
             )
     return _MODEL_CACHE[model_name]
 
+def get_model_tokenizer(model_name: str = "all-MiniLM-L6-v2") -> Tuple[Any, int]:
+    """
+    Tokenizer and token budget of a sentence-transformers model, for chunking
+    by real tokens (chunker.chunk_documents(..., tokenizer=...)).
+
+    Returns:
+        (tokenizer, max_tokens): the model's fast HuggingFace tokenizer (cached
+        with the model) and how many text tokens fit one sequence, i.e.
+        max_seq_length minus the special tokens the model adds
+
+    Raises:
+        ValueError: If the model's tokenizer cannot report character offsets
+    """
+    model = _get_sentence_transformer_model(model_name)
+    tokenizer = model.tokenizer
+    if not getattr(tokenizer, "is_fast", False):
+        raise ValueError(
+            f"Tokenizer of {model_name} is not a fast tokenizer; "
+            "offsets are unavailable"
+        )
+    return tokenizer, model.max_seq_length - tokenizer.num_special_tokens_to_add(
+        pair=False
+    )
+
+# Padded tokens (batch size x longest input) per sentence-transformers encode() call
+DEFAULT_TOKEN_BUDGET = 16384
+# Upper bound on inputs per encode() call, however short they are
+_MAX_BATCH_ITEMS = 512
+
+
+def _token_lengths(model: Any, texts: Sequence[str]) -> List[int]:
+    """Tokens per text as the model sees them (special tokens included, truncated)."""
+    tokenizer = getattr(model, "tokenizer", None)
+    max_len = getattr(model, "max_seq_length", None) or 512
+    if tokenizer is None:
+        # ~4 chars per token plus the special tokens
+        return [min(len(t) // 4 + 2, max_len) for t in texts]
+    enc = tokenizer(
+        list(texts),
+        add_special_tokens=True,
+        truncation=True,
+        max_length=max_len,
+        verbose=False,
+    )
+    return [len(ids) for ids in enc["input_ids"]]
+
+
+def plan_batches(
+    lengths: Sequence[int],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_items: int = _MAX_BATCH_ITEMS
+) -> List[List[int]]:
+    """
+    Group input indices into batches of similar length.
+
+    Indices are sorted by length, so each batch pads to nearly the same size,
+    and a batch grows while batch size x its longest input stays within
+    token_budget (an input longer than the budget gets a batch of its own).
+
+    Returns:
+        Lists of indices into lengths, shortest inputs first
+
+    Raises:
+        ValueError: If token_budget or max_items is not positive
+    """
+    if token_budget <= 0:
+        raise ValueError(f"token_budget must be positive, got {token_budget}")
+    if max_items <= 0:
+        raise ValueError(f"max_items must be positive, got {max_items}")
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        # Sorted ascending, so this input is the longest in the batch
+        if batch and (
+            (len(batch) + 1) * max(1, lengths[i]) > token_budget
+            or len(batch) >= max_items
+        ):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def encode_texts(
+    model: Any,
+    texts: Sequence[str],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> list:
+    """
+    Encode texts with a sentence-transformers model in length-bucketed batches
+    (see plan_batches). Results come back in the order of texts.
+
+    Args:
+        model: SentenceTransformer (anything with encode(), tokenizer, max_seq_length)
+        texts: Texts to encode
+        token_budget: Padded tokens per encode() call; bounds peak memory
+        progress: Optional callback(done, total) after each batch
+
+    Returns:
+        List of numpy vectors, one per text
+
+    Raises:
+        RuntimeError: If the model returns the wrong number of vectors
+    """
+    out: list = [None] * len(texts)
+    done = 0
+    for batch in plan_batches(_token_lengths(model, texts), token_budget):
+        encoded = model.encode([texts[i] for i in batch], batch_size=len(batch),
+                               convert_to_numpy=True, show_progress_bar=False)
+        if len(encoded) != len(batch):
+            raise RuntimeError(
+                f"Embedding count mismatch: expected {len(batch)}, got {len(encoded)}"
+            )
+        for i, vec in zip(batch, encoded):
+            out[i] = vec
+        done += len(batch)
+        if progress is not None:
+            progress(done, len(texts))
+    return out
+
+
+def print_progress(done: int, total: int) -> None:
+    """
+    Progress callback for encode_texts / batch_embed_chunks that rewrites one
+    console line.
+    """
+    print(
+        f"\r   Encoded {done}/{total} chunks",
+        end="\n" if done >= total else "",
+        flush=True,
+    )
+
+
 def _pseudo_vector_from_text(text: str, dim: int = 128) -> List[float]:
     """
     Deterministic pseudo-embedding: hash the text and expand into floats.
@@ -99,29 +239,40 @@ def batch_embed_chunks(
     chunks: List[Dict],
     provider: str = "local",
     dim: int = 128,
-    model_name: Optional[str] = None
+    model_name: Optional[str] = None,
+    cache: Any = None,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    progress: Optional[Callable[[int, int], None]] = None
 ) -> List[Dict]:
     """
     Batch embed multiple chunks.
     
     Args:
         chunks: List of dicts with "filename", "chunk_id", "text", "chars"
+            (and optionally "start"/"end" document offsets, passed through)
         provider: Embedding provider
         dim: Dimension for local embeddings
         model_name: Optional model name for sentence-transformers
+        cache: Optional EmbeddingCache (see embedding_cache.py); only chunks whose
+            text is not already cached for this provider/model/dim are encoded
+        token_budget: sentence-transformers only: padded tokens per encode()
+            call; chunks are batched by token length (see encode_texts)
+        progress: sentence-transformers only: optional callback(done, total)
+            after each encoded batch
         
     Returns:
         List of dicts with "filename", "chunk_id", "embedding", "chars"
+        (plus "start"/"end" when the chunks have them)
         
     Raises:
         TypeError: If chunks is not a list or contains non-dict elements
         KeyError: If required keys are missing from chunk dictionaries
-        ValueError: If provider is unknown or dim is not positive
+        ValueError: If provider is unknown, or dim or token_budget is not positive
         ImportError: If required dependencies are not installed
     """
     if not isinstance(chunks, list):
         raise TypeError("chunks must be a list")
-        
+
     # Validate chunks
     for i, c in enumerate(chunks):
         if not isinstance(c, dict):
@@ -130,46 +281,70 @@ def batch_embed_chunks(
         for key in required_keys:
             if key not in c:
                 raise KeyError(f"Chunk {i} missing required key: {key}")
-                
+
     if dim <= 0:
         raise ValueError(f"dim must be positive, got {dim}")
-        
-    # For sentence-transformers, batch encoding is more efficient
+    if token_budget <= 0:
+        raise ValueError(f"token_budget must be positive, got {token_budget}")
+
     if provider == "sentence-transformers":
-        texts = [c["text"] for c in chunks]
-        model = _get_sentence_transformer_model(model_name or "all-MiniLM-L6-v2")
+        model_name = model_name or "all-MiniLM-L6-v2"
+
+    # Look up cached vectors first; only misses go to the model
+    embeddings: List[Optional[List[float]]] = [None] * len(chunks)
+    keys: List[str] = []
+    if cache is not None:
+        # dim only shapes "local" vectors; model-defined otherwise
+        key_dim = dim if provider == "local" else 0
+        keys = [cache.key(c["text"], provider, model_name, key_dim) for c in chunks]
+        found = cache.get_many(keys)
+        embeddings = [found.get(k) for k in keys]
+    todo = [i for i, e in enumerate(embeddings) if e is None]
+
+    # For sentence-transformers, batch encoding is more efficient
+    if provider == "sentence-transformers" and todo:
+        texts = [chunks[i]["text"] for i in todo]
+        model = _get_sentence_transformer_model(model_name)
         try:
-            embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=True)
+            encoded = encode_texts(
+                model, texts, token_budget=token_budget, progress=progress
+            )
         except Exception as e:
             raise RuntimeError(f"Failed to encode texts with sentence-transformers: {str(e)}")
-            
-        # Validate embeddings shape
-        if len(embeddings) != len(texts):
-            raise RuntimeError(f"Embedding count mismatch: expected {len(texts)}, got {len(embeddings)}")
-
-        out = []
-        for i, c in enumerate(chunks):
-            out.append({
-                "filename": c["filename"],
-                "chunk_id": c["chunk_id"],
-                "embedding": embeddings[i].tolist(),
-                "chars": c["chars"]
-            })
-        return out
+
+        for i, vec in zip(todo, encoded):
+            embeddings[i] = vec.tolist()
+        if cache is not None:
+            cache.put_many((keys[i], vec) for i, vec in zip(todo, encoded))
 
     # For other providers, embed one at a time
+    elif todo:
+        for i in todo:
+            c = chunks[i]
+            try:
+                embeddings[i] = get_embedding(
+                    c["text"], provider=provider, dim=dim, model_name=model_name
+                )
+            except Exception as e:
+                raise RuntimeError(
+                    f"Failed to embed chunk {c['chunk_id']} from {c['filename']}: "
+                    f"{str(e)}"
+                )
+        if cache is not None:
+            cache.put_many((keys[i], embeddings[i]) for i in todo)
+
     out = []
-    for c in chunks:
-        try:
-            emb = get_embedding(c["text"], provider=provider, dim=dim, model_name=model_name)
-            out.append({
-                "filename": c["filename"],
-                "chunk_id": c["chunk_id"],
-                "embedding": emb,
-                "chars": c["chars"]
-            })
-        except Exception as e:
-            raise RuntimeError(f"Failed to embed chunk {c['chunk_id']} from {c['filename']}: {str(e)}")
+    for c, emb in zip(chunks, embeddings):
+        rec = {
+            "filename": c["filename"],
+            "chunk_id": c["chunk_id"],
+            "embedding": emb,
+            "chars": c["chars"]
+        }
+        if "start" in c:
+            rec["start"] = c["start"]
+            rec["end"] = c["end"]
+        out.append(rec)
     return out
 
 if __name__ == "__main__":
@@ -177,4 +352,4 @@ if __name__ == "__main__":
     sample_text = "This is a test document for embedding."
     v = get_embedding(sample_text, provider="local", dim=16)
     print("Embedding length:", len(v))
-    print(v[:4])
\ No newline at end of file
+    print(v[:4])
@@ -0,0 +1,239 @@
+# RAG-document-assistant/ingestion/incremental.py
+"""
+Incremental ingestion with per-document change detection.
+
+A manifest (JSON) records, per source file: mtime, size, sha256 of the raw bytes
+and the chunk ids produced from it, plus the chunking settings (a new chunker
+version, chunk size or tokenizer re-ingests every document) and the embedding
+settings (a new provider, model or dimension re-embeds every document). Each
+run only loads, chunks, embeds and
+upserts new or changed documents; vectors of removed documents, and trailing
+chunks of documents that now produce fewer chunks, are deleted. Unchanged
+documents are carried over from the existing embedding store without re-embedding.
+
+Functions:
+- load_manifest(path) / save_manifest(path, manifest)
+- embedding_key(provider, dim, model_name): Embedding settings stored in the manifest
+- plan_changes(files, manifest): Split files into changed and unchanged, and find
+  removed ones
+- run_incremental(docs_dir, store_path, manifest_path, ...): One incremental
+  ingestion pass
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.ingestion.load_docs import list_markdown_files, load_markdown_file
+from src.ingestion.chunker import chunk_documents, chunking_key
+from src.ingestion.embeddings import batch_embed_chunks
+from src.ingestion.embedding_store import EmbeddingStore, is_store, write_store
+
+MANIFEST_VERSION = 1
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """Load a manifest, or an empty one if the file is missing or unreadable."""
+    pth = Path(path)
+    if pth.exists():
+        try:
+            with pth.open("r", encoding="utf-8") as fh:
+                manifest = json.load(fh)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {"version": MANIFEST_VERSION, "documents": {}}
+
+
+def save_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    """Atomically write a manifest."""
+    pth = Path(path)
+    pth.parent.mkdir(parents=True, exist_ok=True)
+    tmp = pth.with_name(pth.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False)
+    os.replace(tmp, pth)
+
+
+def embedding_key(
+    provider: str, dim: int, model_name: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Everything that decides the embedding space; vectors from different keys
+    must not be mixed.
+    """
+    return {"provider": provider.lower(), "model_name": model_name, "dim": dim}
+
+
+def _sha256_file(fp: str) -> str:
+    h = hashlib.sha256()
+    with open(fp, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def plan_changes(
+    files: Sequence[str],
+    manifest: Dict[str, Any]
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str], List[str]]:
+    """
+    Compare files on disk against the manifest.
+
+    Files whose (mtime, size) match the manifest are unchanged without being read;
+    otherwise the content hash decides, so a touched-but-identical file is not
+    re-ingested.
+
+    Returns:
+        (changed, unchanged, removed): changed is a list of (path, file state) for
+        new or modified files; unchanged and removed are lists of filenames
+    """
+    known = manifest.get("documents", {})
+    changed: List[Tuple[str, Dict[str, Any]]] = []
+    unchanged: List[str] = []
+    seen = set()
+    for fp in files:
+        name = os.path.basename(fp)
+        seen.add(name)
+        st = os.stat(fp)
+        state = {"mtime": st.st_mtime, "size": st.st_size}
+        prev = known.get(name)
+        if (
+            prev
+            and prev.get("mtime") == state["mtime"]
+            and prev.get("size") == state["size"]
+        ):
+            unchanged.append(name)
+            continue
+        state["sha256"] = _sha256_file(fp)
+        if prev and prev.get("sha256") == state["sha256"]:
+            # Same content, new mtime: refresh the stat fields only
+            prev.update(state)
+            unchanged.append(name)
+            continue
+        changed.append((fp, state))
+    removed = [name for name in known if name not in seen]
+    return changed, unchanged, removed
+
+
+def run_incremental(
+    docs_dir: str,
+    store_path: str,
+    manifest_path: str,
+    provider: str = "local",
+    dim: int = 128,
+    model_name: Optional[str] = None,
+    cache: Any = None,
+    max_tokens: int = 300,
+    overlap: int = 50,
+    tokenizer: Any = None,
+    upsert: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    delete: Optional[Callable[[List[str]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Run one incremental ingestion pass.
+
+    Args:
+        docs_dir: Directory of markdown documents
+        store_path: Embedding store directory to update
+        manifest_path: Manifest JSON path
+        provider, dim, model_name, cache: Passed to batch_embed_chunks
+        max_tokens, overlap, tokenizer: Passed to chunk_documents
+        upsert: Optional callback receiving the embedded records of changed documents
+            (e.g. a Pinecone upsert)
+        delete: Optional callback receiving chunk ids that no longer exist
+
+    Returns:
+        Summary dict with changed/unchanged/removed filenames, upserted and
+        deleted counts
+    """
+    manifest = load_manifest(manifest_path)
+    if not is_store(store_path):
+        # Nothing to carry over: treat every document as new
+        manifest = {"version": MANIFEST_VERSION, "documents": {}}
+    chunker = chunking_key(max_tokens, overlap, tokenizer)
+    embedding = embedding_key(provider, dim, model_name)
+    if manifest.get("chunker") != chunker or manifest.get("embedding") != embedding:
+        # Chunk boundaries or embedding space changed: re-ingest every document,
+        # keeping the old chunk ids so the ones that no longer exist are deleted
+        for state in manifest["documents"].values():
+            for key in ("mtime", "size", "sha256"):
+                state.pop(key, None)
+        manifest["chunker"] = chunker
+        manifest["embedding"] = embedding
+    files = list_markdown_files(docs_dir)
+    changed, unchanged, removed = plan_changes(files, manifest)
+    docs_state = manifest["documents"]
+
+    # Load, chunk and embed only the changed documents
+    docs = []
+    for fp, _ in changed:
+        doc = load_markdown_file(fp)
+        if doc is not None:
+            docs.append(doc)
+    chunks = chunk_documents(
+        docs, max_tokens=max_tokens, overlap=overlap, tokenizer=tokenizer
+    )
+    embedded = (
+        batch_embed_chunks(
+            chunks, provider=provider, dim=dim, model_name=model_name, cache=cache
+        )
+        if chunks
+        else []
+    )
+    for c, e in zip(chunks, embedded):
+        e["id"] = f"{c['filename']}::{c['chunk_id']}"
+        e["text"] = c["text"]
+
+    new_ids: Dict[str, List[str]] = {os.path.basename(fp): [] for fp, _ in changed}
+    for e in embedded:
+        new_ids[e["filename"]].append(e["id"])
+
+    # Ids that existed before but are gone now: removed docs and shrunk docs
+    stale: List[str] = []
+    for name in removed:
+        stale.extend(docs_state.get(name, {}).get("chunk_ids", []))
+    for name, ids in new_ids.items():
+        keep = set(ids)
+        stale.extend(
+            cid
+            for cid in docs_state.get(name, {}).get("chunk_ids", [])
+            if cid not in keep
+        )
+
+    if embedded and upsert is not None:
+        upsert(embedded)
+    if stale and delete is not None:
+        delete(stale)
+
+    # Rewrite the store: unchanged documents carried over, changed ones replaced
+    if changed or removed or not is_store(store_path):
+        keep_files = set(unchanged)
+        records = []
+        if is_store(store_path):
+            old = EmbeddingStore(store_path)
+            records = [r for r in old.iter_records() if r["filename"] in keep_files]
+        records.extend(embedded)
+        if records:
+            write_store(store_path, records)
+        elif is_store(store_path):
+            shutil.rmtree(store_path)
+
+    for fp, state in changed:
+        name = os.path.basename(fp)
+        docs_state[name] = {**state, "chunk_ids": new_ids.get(name, [])}
+    for name in removed:
+        docs_state.pop(name, None)
+    save_manifest(manifest_path, manifest)
+
+    return {
+        "changed": [os.path.basename(fp) for fp, _ in changed],
+        "unchanged": unchanged,
+        "removed": removed,
+        "upserted": len(embedded),
+        "deleted": len(stale),
+    }
@@ -3,11 +3,19 @@
 Simple markdown document loader for Day-3 ingestion step.
 
 Functions:
-- load_markdown_docs(dir_path, ext='.md', max_chars=20000)
+- load_markdown_docs(dir_path, ext='.md', max_chars=20000, workers=1, recursive=False)
   -> returns list of dicts: { "filename", "path", "text", "chars", "words" }
+  (workers > 1 loads and cleans files on a process pool; order is preserved)
+- iter_markdown_docs(dir_path, ext='.md', max_chars=20000, recursive=False)
+  -> same dicts, one file at a time
+- load_markdown_file(fp, max_chars=20000, root=None) -> one such dict (or None if empty)
+- list_markdown_files(dir_path, ext='.md', recursive=False) -> sorted file paths
+
+With recursive=True, "filename" is the path relative to dir_path, so files with
+the same name in different subdirectories keep distinct chunk ids.
 
 CLI:
-> python3 load_docs.py /full/path/to/your/markdown/folder
+> python3 load_docs.py /full/path/to/your/markdown/folder [--workers N] [--recursive]
 prints a summary table for each file and exits with code 0.
 """
 
@@ -15,11 +23,103 @@ import os
 import glob
 import argparse
 import re
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List, Optional
+
+# Fences, HTML tags, images and links are stripped in that order, each pass
+# seeing what the previous one left, exactly like the regex passes they replace
+# (```.*?```, <[^>]+>, !\[([^\]]*)\]\([^\)]*\) and \[([^\]]+)\]\([^\)]*\)).
+# Each pass walks the text once with str.find and stops as soon as a closing
+# delimiter is missing: a regex retries from every unmatched "<" or "[" and
+# rescans to the end of the text, which is quadratic on input like "a < b" * n.
+
+
+def _strip_fences(text: str) -> str:
+    # ```.*?``` (DOTALL) -> " "
+    parts = []
+    pos = 0
+    while True:
+        start = text.find("```", pos)
+        if start < 0:
+            break
+        end = text.find("```", start + 3)
+        if end < 0:
+            break
+        parts.append(text[pos:start])
+        parts.append(" ")
+        pos = end + 3
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def _strip_tags(text: str) -> str:
+    # <[^>]+> -> " "
+    parts = []
+    pos = start = 0
+    while True:
+        start = text.find("<", start)
+        if start < 0:
+            break
+        end = text.find(">", start + 1)
+        if end < 0:
+            break
+        if end == start + 1:
+            start += 1
+            continue
+        parts.append(text[pos:start])
+        parts.append(" ")
+        pos = start = end + 1
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def _strip_bracketed(text: str, opener: str, min_text: int) -> str:
+    # opener [^\]]{min_text,} \] \( [^\)]* \) -> the bracketed text.
+    # close/paren cache the first "]" and ")" at or after the last search start,
+    # so a run of openers sharing one "]" does not rescan to it each time.
+    parts = []
+    pos = start = 0
+    close = paren = -1
+    while True:
+        start = text.find(opener, start)
+        if start < 0:
+            break
+        inner = start + len(opener)
+        if close < inner:
+            close = text.find("]", inner)
+            if close < 0:
+                break
+        if close - inner < min_text or text[close + 1:close + 2] != "(":
+            start += 1
+            continue
+        if paren < close + 2:
+            paren = text.find(")", close + 2)
+            if paren < 0:
+                break
+        parts.append(text[pos:start])
+        parts.append(text[inner:close])
+        pos = start = paren + 1
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+_FRONT_MATTER_RE = re.compile(r"---.*?---\s*", re.DOTALL)
+
 
 def _clean_markdown(text: str) -> str:
     """
     Clean markdown text by removing code blocks, HTML tags, and other non-content elements.
+
+    Code fences, HTML tags, images and links are stripped in that order, each in
+    one linear scan; front matter (--- ... --- at the top) is then dropped and
+    whitespace collapsed.
     
     Args:
         text: Raw markdown text to clean
@@ -27,91 +127,171 @@ def _clean_markdown(text: str) -> str:
     Returns:
         Cleaned text with markdown syntax removed
     """
-    # Remove code fences and their contents
-    text = re.sub(r"```.*?```", " ", text, flags=re.DOTALL)
-    # Remove HTML tags
-    text = re.sub(r"<[^>]+>", " ", text)
-    # Remove images/links syntax but keep alt/text
-    text = re.sub(r"!\[([^\]]*)\]\([^\)]*\)", r"\1", text)
-    text = re.sub(r"\[([^\]]+)\]\([^\)]*\)", r"\1", text)
-    # Remove front-matter delimited by --- at top
-    text = re.sub(r"^---.*?---\s*", " ", text, flags=re.DOTALL)
-    # Collapse whitespace
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
-def load_markdown_docs(dir_path: str, ext: str = ".md", max_chars: int = 20000) -> List[Dict]:
+    text = _strip_fences(text)
+    text = _strip_tags(text)
+    text = _strip_bracketed(text, "![", 0)
+    text = _strip_bracketed(text, "[", 1)
+    if text.startswith("---"):
+        m = _FRONT_MATTER_RE.match(text)
+        if m:
+            text = " " + text[m.end():]
+    return " ".join(text.split())
+
+
+def load_markdown_file(
+    fp: str, max_chars: int = 20000, root: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Load and clean a single markdown file.
+
+    Args:
+        fp: Path to the markdown file
+        max_chars: Maximum number of cleaned characters to accept
+        root: If given, "filename" is fp relative to root instead of its basename
+
+    Returns:
+        Document dictionary (status "OK", "SKIPPED_TOO_LARGE" or
+        "ERROR_READING_FILE: ..."), or None if the cleaned file is empty
+    """
+    filename = os.path.relpath(fp, root) if root else os.path.basename(fp)
+    try:
+        with open(fp, "r", encoding="utf-8") as f:
+            raw = f.read()
+    except Exception as e:
+        # Skip files that cannot be read
+        return {
+            "filename": filename,
+            "path": fp,
+            "text": None,
+            "chars": 0,
+            "words": 0,
+            "status": f"ERROR_READING_FILE: {str(e)}"
+        }
+
+    cleaned = _clean_markdown(raw)
+    chars = len(cleaned)
+    words = len(cleaned.split())
+    if chars == 0:
+        # skip empty files
+        return None
+    if chars > max_chars:
+        # skip or trim large files; here we skip and report
+        return {
+            "filename": filename,
+            "path": fp,
+            "text": None,
+            "chars": chars,
+            "words": words,
+            "status": "SKIPPED_TOO_LARGE"
+        }
+    return {
+        "filename": filename,
+        "path": fp,
+        "text": cleaned,
+        "chars": chars,
+        "words": words,
+        "status": "OK"
+    }
+
+
+def list_markdown_files(
+    dir_path: str, ext: str = ".md", recursive: bool = False
+) -> List[str]:
+    """
+    Return the sorted markdown file paths in dir_path (including subdirectories
+    when recursive is True).
+
+    Raises:
+        FileNotFoundError: If directory does not exist
+    """
+    path = os.path.expanduser(dir_path)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"Directory not found: {path}")
+    if recursive:
+        return sorted(glob.glob(os.path.join(path, "**", f"*{ext}"), recursive=True))
+    pattern = os.path.join(path, f"*{ext}")
+    return sorted(glob.glob(pattern))
+
+
+def load_markdown_docs(
+    dir_path: str,
+    ext: str = ".md",
+    max_chars: int = 20000,
+    workers: int = 1,
+    recursive: bool = False
+) -> List[Dict]:
     """
-    Load markdown files from dir_path (non-recursive). Returns list of metadata+clean text.
+    Load markdown files from dir_path. Returns list of metadata+clean text.
     Skips files larger than max_chars (useful to enforce 'under 5 pages' rule roughly).
     
     Args:
         dir_path: Path to directory containing markdown files
         ext: File extension to look for (default: ".md")
         max_chars: Maximum number of characters to accept (default: 20000)
+        workers: Processes used to read and clean files (default: 1 = serial;
+            0 = one per CPU). Results keep file order either way.
+        recursive: Also load files in subdirectories (default: False)
         
     Returns:
         List of document dictionaries with metadata and cleaned text
         
     Raises:
         FileNotFoundError: If directory does not exist
-        ValueError: If max_chars is not positive
+        ValueError: If max_chars is not positive or workers is negative
         OSError: If there are issues reading files
     """
     if max_chars <= 0:
         raise ValueError(f"max_chars must be positive, got {max_chars}")
-        
-    path = os.path.expanduser(dir_path)
-    if not os.path.isdir(path):
-        raise FileNotFoundError(f"Directory not found: {path}")
+    if workers < 0:
+        raise ValueError(f"workers must be non-negative, got {workers}")
+    files = list_markdown_files(dir_path, ext=ext, recursive=recursive)
+    root = os.path.expanduser(dir_path) if recursive else None
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        return list(_iter_files(files, max_chars, root))
 
-    pattern = os.path.join(path, f"*{ext}")
-    files = sorted(glob.glob(pattern))
-    docs = []
+    # Several files per task amortize pickling; ~4 tasks per worker balance uneven
+    # file sizes
+    chunksize = max(1, len(files) // (workers * 4))
+    load = partial(load_markdown_file, max_chars=max_chars, root=root)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [
+            doc for doc in pool.map(load, files, chunksize=chunksize) if doc is not None
+        ]
+
+def iter_markdown_docs(
+    dir_path: str,
+    ext: str = ".md",
+    max_chars: int = 20000,
+    recursive: bool = False
+) -> Iterator[Dict]:
+    """
+    Generator version of load_markdown_docs: reads one file at a time, so only
+    the current document is held in memory. recursive works as in
+    load_markdown_docs.
+
+    Raises:
+        FileNotFoundError: If directory does not exist
+        ValueError: If max_chars is not positive
+    """
+    if max_chars <= 0:
+        raise ValueError(f"max_chars must be positive, got {max_chars}")
+    # Validate eagerly, not on the first next()
+    files = list_markdown_files(dir_path, ext=ext, recursive=recursive)
+    root = os.path.expanduser(dir_path) if recursive else None
+    return _iter_files(files, max_chars, root)
+
+
+def _iter_files(
+    files: List[str], max_chars: int, root: Optional[str] = None
+) -> Iterator[Dict]:
     for fp in files:
-        try:
-            with open(fp, "r", encoding="utf-8") as f:
-                raw = f.read()
-        except Exception as e:
-            # Skip files that cannot be read
-            docs.append({
-                "filename": os.path.basename(fp),
-                "path": fp,
-                "text": None,
-                "chars": 0,
-                "words": 0,
-                "status": f"ERROR_READING_FILE: {str(e)}"
-            })
-            continue
-            
-        cleaned = _clean_markdown(raw)
-        chars = len(cleaned)
-        words = len(cleaned.split())
-        if chars == 0:
-            # skip empty files
-            continue
-        if chars > max_chars:
-            # skip or trim large files; here we skip and report
-            docs.append({
-                "filename": os.path.basename(fp),
-                "path": fp,
-                "text": None,
-                "chars": chars,
-                "words": words,
-                "status": "SKIPPED_TOO_LARGE"
-            })
-            continue
-        docs.append({
-            "filename": os.path.basename(fp),
-            "path": fp,
-            "text": cleaned,
-            "chars": chars,
-            "words": words,
-            "status": "OK"
-        })
-    return docs
+        doc = load_markdown_file(fp, max_chars=max_chars, root=root)
+        if doc is not None:
+            yield doc
+
 
-def print_summary(docs: List[Dict]):
+def print_summary(docs: List[Dict]) -> None:
     if not docs:
         print("No markdown files found or all were skipped.")
         return
@@ -133,7 +313,14 @@ if __name__ == "__main__":
     parser.add_argument("dir", help="Directory containing markdown (.md) files")
     parser.add_argument("--ext", default=".md", help="File extension to load")
     parser.add_argument("--max-chars", type=int, default=20000, help="Max cleaned characters to accept (default 20k)")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Loader processes (0 = one per CPU)"
+    )
+    parser.add_argument(
+        "--recursive", action="store_true", help="Include subdirectories"
+    )
     args = parser.parse_args()
 
-    docs = load_markdown_docs(args.dir, ext=args.ext, max_chars=args.max_chars)
-    print_summary(docs)
\ No newline at end of file
+    docs = load_markdown_docs(args.dir, ext=args.ext, max_chars=args.max_chars,
+                              workers=args.workers, recursive=args.recursive)
+    print_summary(docs)
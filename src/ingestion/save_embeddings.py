@@ -1,46 +1,35 @@
 # RAG-document-assistant/ingestion/save_embeddings.py
 """
-Persist chunk embeddings to a local JSONL file for later import.
-Outputs: RAG-document-assistant/ingestion/data/embeddings.jsonl
-Each line is a JSON object:
-{
-  "id": "<filename>::<chunk_id>",
-  "filename": "<filename>",
-  "chunk_id": <int>,
-  "text": "<first_250_chars_of_chunk>",
-  "chars": <int>,
-  "embedding": [float,...]
-}
+Persist chunk embeddings to a local binary embedding store for later import.
+Outputs: RAG-document-assistant/ingestion/data/embeddings.store
+(see embedding_store.py: float32 embeddings.npy + ids/metadata/text sidecars)
 """
 
-import os
-import json
 from pathlib import Path
 from load_docs import load_markdown_docs
 from chunker import chunk_documents
 from embeddings import batch_embed_chunks
+from embedding_store import write_store
+from embedding_cache import EmbeddingCache
 
 OUT_DIR = Path(__file__).resolve().parent / "data"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
-OUT_FILE = OUT_DIR / "embeddings.jsonl"
+OUT_FILE = OUT_DIR / "embeddings.store"
+CACHE_FILE = OUT_DIR / "embedding_cache.sqlite"
 
-def run(docs_dir: str, provider: str = "local", dim: int = 128):
+def run(docs_dir: str, provider: str = "local", dim: int = 128) -> Path:
     docs = load_markdown_docs(docs_dir)
     chunks = chunk_documents(docs, max_tokens=300, overlap=50)
-    embedded = batch_embed_chunks(chunks, provider=provider, dim=dim)
+    cache = EmbeddingCache(str(CACHE_FILE))
+    try:
+        embedded = batch_embed_chunks(chunks, provider=provider, dim=dim, cache=cache)
+    finally:
+        cache.close()
 
-    with OUT_FILE.open("w", encoding="utf-8") as fh:
-        for e in embedded:
-            obj = {
-                "id": f"{e['filename']}::{e['chunk_id']}",
-                "filename": e["filename"],
-                "chunk_id": e["chunk_id"],
-                "text": (e.get("text") or "")[:250],
-                "chars": e.get("chars", 0),
-                "embedding": e["embedding"]
-            }
-            fh.write(json.dumps(obj, ensure_ascii=False) + "\n")
-    return OUT_FILE
+    # batch_embed_chunks drops the text; merge it back for citation snippets
+    for c, e in zip(chunks, embedded):
+        e["text"] = c["text"]
+    return write_store(str(OUT_FILE), embedded)
 
 if __name__ == "__main__":
     import sys
@@ -51,4 +40,4 @@ if __name__ == "__main__":
     provider = sys.argv[2] if len(sys.argv) > 2 else "local"
     dim = int(sys.argv[3]) if len(sys.argv) > 3 else 128
     out = run(docs_dir, provider=provider, dim=dim)
-    print("Wrote embeddings file:", out)
+    print("Wrote embedding store:", out)
@@ -0,0 +1,190 @@
+# RAG-document-assistant/ingestion/streaming.py
+"""
+Streaming ingestion with bounded memory and checkpoint/resume.
+
+Every stage is a generator, so memory holds one document plus one micro-batch
+of chunks regardless of corpus size:
+
+    markdown files -> load one file -> iter_chunks -> batches of batch_size
+    chunks -> batch_embed_chunks -> StoreWriter.append (+ optional upsert)
+
+After each batch the store writer saves a checkpoint holding the resume
+position (file index, next chunk id). If a run dies, calling
+run_streaming_ingestion again with resume=True truncates the partial batch,
+skips everything before the position and continues. Upserts are keyed by
+chunk id, so re-sending the interrupted batch is harmless.
+
+Functions:
+- iter_batches(items, size): Group any iterable into lists of at most size items
+- run_streaming_ingestion(docs_dir, store_path, ...): One bounded-memory ingestion pass
+"""
+
+import hashlib
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.ingestion.load_docs import list_markdown_files, load_markdown_file
+from src.ingestion.chunker import chunking_key, iter_chunks
+from src.ingestion.embeddings import batch_embed_chunks
+from src.ingestion.embedding_store import StoreWriter
+
+DEFAULT_BATCH_SIZE = 256
+
+
+def iter_batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Yield lists of up to size consecutive items.
+
+    Raises:
+        ValueError: If size is not positive
+    """
+    if size <= 0:
+        raise ValueError(f"size must be positive, got {size}")
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _run_key(files: List[str], params: Dict[str, Any]) -> str:
+    """Identifies the input set and settings a checkpoint belongs to."""
+    h = hashlib.sha256()
+    for fp in files:
+        h.update(fp.encode("utf-8") + b"\0")
+    h.update(repr(sorted(params.items())).encode("utf-8"))
+    return h.hexdigest()
+
+
+def run_streaming_ingestion(
+    docs_dir: str,
+    store_path: str,
+    provider: str = "local",
+    dim: int = 128,
+    model_name: Optional[str] = None,
+    cache: Any = None,
+    max_tokens: int = 300,
+    overlap: int = 50,
+    tokenizer: Any = None,
+    max_chars: int = 20000,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    upsert: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    resume: bool = True,
+    recursive: bool = False
+) -> Dict[str, Any]:
+    """
+    Load, chunk, embed and write a document directory in micro-batches.
+
+    Args:
+        docs_dir: Directory of markdown documents
+        store_path: Embedding store directory (replaced when the run completes)
+        provider, dim, model_name, cache: Passed to batch_embed_chunks
+        max_tokens, overlap, tokenizer: Passed to the chunker
+        max_chars: Passed to load_markdown_file
+        batch_size: Chunks embedded and written per batch
+        upsert: Optional callback receiving each batch of embedded records
+            (with "id" and "text"), e.g. a Pinecone upsert
+        resume: Continue from the checkpoint of an interrupted run with the
+            same files and settings (otherwise start over)
+        recursive: Also ingest files in subdirectories; filenames are then
+            relative to docs_dir (see load_markdown_docs)
+
+    Returns:
+        Summary dict: files, ok, skipped, errors, chunks (in the store),
+        batches (written by this call) and resumed (True when an interrupted
+        run was continued)
+
+    Raises:
+        FileNotFoundError: If docs_dir does not exist
+        ValueError: If batch_size is not positive or no chunks were produced
+    """
+    if batch_size <= 0:
+        raise ValueError(f"batch_size must be positive, got {batch_size}")
+    files = list_markdown_files(docs_dir, recursive=recursive)
+    root = os.path.expanduser(docs_dir) if recursive else None
+    key = _run_key(files, {
+        "provider": provider, "dim": dim, "model_name": model_name,
+        "max_tokens": max_tokens, "overlap": overlap, "max_chars": max_chars,
+        "chunker": chunking_key(max_tokens, overlap, tokenizer),
+    })
+
+    writer = StoreWriter(store_path, resume=resume)
+    start: Tuple[int, int] = (0, 0)
+    stats = {"ok": 0, "skipped": 0, "errors": 0}
+    resumed = False
+    if writer.checkpoint is not None:
+        if writer.checkpoint.get("key") == key:
+            start = tuple(writer.checkpoint["position"])
+            stats = dict(writer.checkpoint["stats"])
+            resumed = True
+        else:
+            # Inputs or settings changed since the checkpoint: start over
+            writer.abort()
+            writer = StoreWriter(store_path)
+
+    # Counters as they were before the file currently being chunked was loaded;
+    # that file is re-read on resume, so it must not be counted twice.
+    before_file = dict(stats)
+
+    def chunks() -> Iterator[Tuple[int, Dict[str, Any]]]:
+        nonlocal before_file
+        for idx in range(start[0], len(files)):
+            before_file = dict(stats)
+            doc = load_markdown_file(files[idx], max_chars=max_chars, root=root)
+            if doc is None:
+                continue
+            status = doc.get("status", "")
+            if status == "OK":
+                stats["ok"] += 1
+            elif status.startswith("ERROR"):
+                stats["errors"] += 1
+            else:
+                stats["skipped"] += 1
+            skip = start[1] if idx == start[0] else 0
+            for c in iter_chunks(
+                [doc], max_tokens=max_tokens, overlap=overlap, tokenizer=tokenizer
+            ):
+                if c["chunk_id"] >= skip:
+                    yield idx, c
+
+    batches = 0
+    try:
+        for batch in iter_batches(chunks(), batch_size):
+            batch_chunks = [c for _, c in batch]
+            embedded = batch_embed_chunks(
+                batch_chunks,
+                provider=provider,
+                dim=dim,
+                model_name=model_name,
+                cache=cache,
+            )
+            for c, e in zip(batch_chunks, embedded):
+                e["id"] = f"{c['filename']}::{c['chunk_id']}"
+                e["text"] = c["text"]
+            writer.append(embedded)
+            if upsert is not None:
+                upsert(embedded)
+            last_idx, last = batch[-1]
+            writer.save_checkpoint({
+                "key": key,
+                "position": [last_idx, last["chunk_id"] + 1],
+                "stats": before_file,
+            })
+            batches += 1
+    except BaseException:
+        # Keep the temp store and checkpoint for the next run
+        writer.suspend()
+        raise
+
+    total = writer.count
+    writer.close()
+    return {
+        "files": len(files),
+        **stats,
+        "chunks": total,
+        "batches": batches,
+        "resumed": resumed,
+    }
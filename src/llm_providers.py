@@ -1,24 +1,112 @@
-
 # src/llm_providers.py
 # Priority: GEMINI → GROQ → OPENROUTER → fallback
+#
+# Sync entrypoint: call_llm (pooled requests.Session, keep-alive)
+# Async entrypoint: acall_llm (pooled httpx.AsyncClient per event loop; falls
+# back to the sync session in a worker thread when httpx is not installed)
 
 import os
 import json
 import time
-from typing import Optional, Dict, Any
+import asyncio
+import threading
+import contextvars
+import weakref
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from typing import (
+    Optional, Dict, Any, AsyncGenerator, AsyncIterator, Callable, Deque,
+    Generator, Iterator, List, Tuple
+)
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
     _HAS_REQUESTS = True
 except Exception:
     import urllib.request as _urllib_request
     import urllib.error as _urllib_error
     _HAS_REQUESTS = False
 
+try:
+    import httpx
+    _HAS_HTTPX = True
+except Exception:
+    _HAS_HTTPX = False
+
+from src.circuit_breaker import CircuitBreaker
+from src.rate_limiter import RateLimiter, RateLimitExceeded
+from src.tracing import span
+from src.metrics import REGISTRY
+
+try:
+    import src.config as _cfg
+except Exception:
+    _cfg = None  # type: ignore[assignment]
+
+# Connection pool tuning (shared by the sync and async clients)
+HTTP_TIMEOUT_S = float(os.getenv("LLM_HTTP_TIMEOUT_S", "30"))
+HTTP_MAX_PER_HOST = int(os.getenv("LLM_HTTP_MAX_PER_HOST", "8"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "32"))
+HTTP_KEEPALIVE_S = float(os.getenv("LLM_HTTP_KEEPALIVE_S", "60"))
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+_HOST_SEMAPHORES: Dict[str, threading.BoundedSemaphore] = {}
+# event loop -> {"client": httpx.AsyncClient | None,
+#                "semaphores": {host: asyncio.Semaphore}}
+_ASYNC_STATE: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _host_of(url: str) -> str:
+    return urlsplit(url).netloc
 
-def _http_post(url: str, headers: dict, payload: dict, timeout: int = 30):
+
+def _get_session() -> "requests.Session":
+    """Return the process-wide requests.Session, creating it on first use."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_MAX_CONNECTIONS,
+                    pool_maxsize=HTTP_MAX_PER_HOST,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _SESSION = session
+    return _SESSION
+
+
+def _host_semaphore(host: str) -> threading.BoundedSemaphore:
+    with _SESSION_LOCK:
+        sem = _HOST_SEMAPHORES.get(host)
+        if sem is None:
+            sem = _HOST_SEMAPHORES[host] = threading.BoundedSemaphore(HTTP_MAX_PER_HOST)
+        return sem
+
+
+def close_http_session() -> None:
+    """Close the pooled sync session (a new one is created on next use)."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+            _SESSION = None
+
+
+def _http_post(
+    url: str, headers: dict, payload: dict, timeout: float = HTTP_TIMEOUT_S
+) -> Any:
     """
     Perform HTTP POST request with JSON payload.
+
+    Uses a pooled keep-alive session; at most HTTP_MAX_PER_HOST requests per
+    host are in flight at once.
     
     Args:
         url: Target URL
@@ -37,52 +125,215 @@ def _http_post(url: str, headers: dict, payload: dict, timeout: int = 30):
     """
     if not url:
         raise ValueError("URL cannot be empty")
-        
+
     try:
         data = json.dumps(payload).encode("utf-8")
     except Exception as e:
         raise ValueError(f"Failed to serialize payload to JSON: {str(e)}")
-        
-    if _HAS_REQUESTS:
+
+    with _host_semaphore(_host_of(url)):
+        if _HAS_REQUESTS:
+            try:
+                r = _get_session().post(
+                    url, headers=headers, data=data, timeout=timeout
+                )
+                r.raise_for_status()
+                return r.json()
+            except requests.RequestException:
+                raise
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(
+                    f"Failed to decode JSON response: {e.msg}", e.doc, e.pos
+                )
+        else:
+            try:
+                req = _urllib_request.Request(
+                    url, data=data, headers=headers, method="POST"
+                )
+                with _urllib_request.urlopen(req, timeout=timeout) as resp:
+                    response_data = resp.read().decode("utf-8")
+                    return json.loads(response_data)
+            except _urllib_error.URLError:
+                raise
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(
+                    f"Failed to decode JSON response: {e.msg}", e.doc, e.pos
+                )
+
+
+def _async_state() -> Dict[str, Any]:
+    """
+    Per-event-loop pooled client and per-host semaphores (asyncio objects are
+    loop-bound).
+    """
+    loop = asyncio.get_running_loop()
+    state = _ASYNC_STATE.get(loop)
+    if state is None:
+        client = None
+        if _HAS_HTTPX:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(HTTP_TIMEOUT_S),
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_S,
+                ),
+            )
+        state = _ASYNC_STATE[loop] = {"client": client, "semaphores": {}}
+    return state
+
+
+async def _ahttp_post(
+    url: str, headers: dict, payload: dict, timeout: float = HTTP_TIMEOUT_S
+) -> Any:
+    """
+    Async counterpart of _http_post.
+
+    Uses a pooled httpx.AsyncClient bound to the running event loop. Without
+    httpx, the blocking pooled session runs in the default executor so the
+    event loop is never blocked.
+
+    Raises:
+        httpx.HTTPError: If using httpx and request fails
+        ValueError: If url is empty or payload is not serializable
+    """
+    if not url:
+        raise ValueError("URL cannot be empty")
+
+    try:
+        data = json.dumps(payload).encode("utf-8")
+    except Exception as e:
+        raise ValueError(f"Failed to serialize payload to JSON: {str(e)}")
+
+    state = _async_state()
+    host = _host_of(url)
+    sem = state["semaphores"].get(host)
+    if sem is None:
+        sem = state["semaphores"][host] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+
+    async with sem:
+        client = state["client"]
+        if client is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, lambda: _http_post(url, headers, payload, timeout)
+            )
+        r = await client.post(url, headers=headers, content=data, timeout=timeout)
+        r.raise_for_status()
         try:
-            r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=timeout)
-            r.raise_for_status()
             return r.json()
-        except requests.RequestException:
-            raise
         except json.JSONDecodeError as e:
-            raise json.JSONDecodeError(f"Failed to decode JSON response: {str(e)}")
-    else:
-        try:
-            req = _urllib_request.Request(url, data=data, headers=headers, method="POST")
-            with _urllib_request.urlopen(req, timeout=timeout) as resp:
-                response_data = resp.read().decode("utf-8")
-                return json.loads(response_data)
-        except _urllib_error.URLError:
-            raise
-        except json.JSONDecodeError as e:
-            raise json.JSONDecodeError(f"Failed to decode JSON response: {str(e)}")
+            raise json.JSONDecodeError(
+                f"Failed to decode JSON response: {e.msg}", e.doc, e.pos
+            )
 
 
-# GEMINI ------------------------------------------------------------
+def _sse_data(line: str) -> Optional[str]:
+    """Payload of an SSE "data:" line (None for other lines and the [DONE] marker)."""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    return data if data and data != "[DONE]" else None
 
-def _call_gemini(prompt: str, temperature: float, max_tokens: int, context: Optional[str]):
+
+def _http_post_stream(
+    url: str, headers: dict, payload: dict, timeout: float = HTTP_TIMEOUT_S
+) -> Generator[str, None, None]:
     """
-    Call Gemini API with prompt and context.
-    
-    Args:
-        prompt: User prompt
-        temperature: Sampling temperature (0.0-1.0)
-        max_tokens: Maximum tokens to generate
-        context: Additional context for the prompt
-        
-    Returns:
-        Dict with 'text' and 'meta' keys
-        
+    POST a JSON payload and yield the data fields of the server-sent event
+    response as they arrive. The per-host slot is held until the stream ends
+    or the generator is closed; callers that may stop early must close it
+    (contextlib.closing), or an abandoned stream keeps the slot until GC.
+
     Raises:
-        RuntimeError: If GEMINI_API_KEY is not set
-        Exception: If API call fails
+        requests.RequestException / urllib.error.URLError: If the request fails
+        ValueError: If url is empty or payload is not serializable
     """
+    if not url:
+        raise ValueError("URL cannot be empty")
+
+    try:
+        data = json.dumps(payload).encode("utf-8")
+    except Exception as e:
+        raise ValueError(f"Failed to serialize payload to JSON: {str(e)}")
+
+    with _host_semaphore(_host_of(url)):
+        if _HAS_REQUESTS:
+            with _get_session().post(
+                url, headers=headers, data=data, timeout=timeout, stream=True
+            ) as r:
+                r.raise_for_status()
+                # chunk_size=None: hand over events as they arrive instead of buffering
+                for raw in r.iter_lines(chunk_size=None):
+                    item = _sse_data(raw.decode("utf-8"))
+                    if item is not None:
+                        yield item
+        else:
+            req = _urllib_request.Request(url, data=data, headers=headers, method="POST")
+            with _urllib_request.urlopen(req, timeout=timeout) as resp:
+                for raw in resp:
+                    item = _sse_data(raw.decode("utf-8").rstrip("\r\n"))
+                    if item is not None:
+                        yield item
+
+
+async def _ahttp_post_stream(
+    url: str, headers: dict, payload: dict, timeout: float = HTTP_TIMEOUT_S
+) -> AsyncGenerator[str, None]:
+    """Async counterpart of _http_post_stream."""
+    if not url:
+        raise ValueError("URL cannot be empty")
+
+    try:
+        data = json.dumps(payload).encode("utf-8")
+    except Exception as e:
+        raise ValueError(f"Failed to serialize payload to JSON: {str(e)}")
+
+    state = _async_state()
+    host = _host_of(url)
+    sem = state["semaphores"].get(host)
+    if sem is None:
+        sem = state["semaphores"][host] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+
+    async with sem:
+        client = state["client"]
+        if client is None:
+            # No httpx: pull the blocking stream one event at a time on a worker thread
+            loop = asyncio.get_running_loop()
+            it = _http_post_stream(url, headers, payload, timeout)
+            try:
+                while True:
+                    item = await loop.run_in_executor(None, next, it, None)
+                    if item is None:
+                        break
+                    yield item
+            finally:
+                it.close()
+            return
+        async with client.stream(
+            "POST", url, headers=headers, content=data, timeout=timeout
+        ) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                item = _sse_data(line)
+                if item is not None:
+                    yield item
+
+
+async def aclose_http_clients() -> None:
+    """Close the pooled async client of the running event loop."""
+    state = _ASYNC_STATE.pop(asyncio.get_running_loop(), None)
+    if state and state["client"] is not None:
+        await state["client"].aclose()
+
+
+# GEMINI ------------------------------------------------------------
+
+
+def _gemini_request(
+    prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Tuple[str, dict, dict, str]:
+    """Build (url, headers, payload, model) for a Gemini generateContent call."""
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise RuntimeError("GEMINI_API_KEY missing")
@@ -101,28 +352,19 @@ def _call_gemini(prompt: str, temperature: float, max_tokens: int, context: Opti
             "maxOutputTokens": int(max_tokens)
         }
     }
+    return url, {"Content-Type": "application/json"}, payload, model
 
-    start = time.time()
-    try:
-        j = _http_post(url, {"Content-Type": "application/json"}, payload)
-    except Exception as e:
-        raise RuntimeError(f"Gemini API call failed: {str(e)}")
-    elapsed = time.time() - start
 
-    try:
-        text = j["candidates"][0]["content"]["parts"][0]["text"]
-    except (KeyError, IndexError, TypeError) as e:
-        text = json.dumps(j)[:1000]
-        raise RuntimeError(f"Unexpected Gemini API response format: {str(e)}. Response: {text}")
+def _gemini_text(j: Dict[str, Any]) -> str:
+    text: str = j["candidates"][0]["content"]["parts"][0]["text"]
+    return text
 
-    return {"text": text, "meta": {"provider": "gemini", "model": model, "elapsed_s": elapsed}}
 
-
-# GROQ --------------------------------------------------------------
-
-def _call_groq(prompt: str, temperature: float, max_tokens: int, context: Optional[str]):
+def _call_gemini(
+    prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Dict[str, Any]:
     """
-    Call Groq API with prompt and context.
+    Call Gemini API with prompt and context.
     
     Args:
         prompt: User prompt
@@ -134,9 +376,26 @@ def _call_groq(prompt: str, temperature: float, max_tokens: int, context: Option
         Dict with 'text' and 'meta' keys
         
     Raises:
-        RuntimeError: If GROQ_API_KEY is not set
+        RuntimeError: If GEMINI_API_KEY is not set
         Exception: If API call fails
     """
+    return _call_provider("gemini", prompt, temperature, max_tokens, context)
+
+
+async def _acall_gemini(
+    prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Dict[str, Any]:
+    """Async counterpart of _call_gemini."""
+    return await _acall_provider("gemini", prompt, temperature, max_tokens, context)
+
+
+# GROQ --------------------------------------------------------------
+
+
+def _groq_request(
+    prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Tuple[str, dict, dict, str]:
+    """Build (url, headers, payload, model) for a Groq chat completion."""
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         raise RuntimeError("GROQ_API_KEY missing")
@@ -158,28 +417,19 @@ def _call_groq(prompt: str, temperature: float, max_tokens: int, context: Option
     }
 
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    return url, headers, payload, model
 
-    start = time.time()
-    try:
-        j = _http_post(url, headers, payload)
-    except Exception as e:
-        raise RuntimeError(f"Groq API call failed: {str(e)}")
-    elapsed = time.time() - start
-
-    try:
-        text = j["choices"][0]["message"]["content"]
-    except (KeyError, IndexError, TypeError) as e:
-        text = json.dumps(j)[:1000]
-        raise RuntimeError(f"Unexpected Groq API response format: {str(e)}. Response: {text}")
 
-    return {"text": text, "meta": {"provider": "groq", "model": model, "elapsed_s": elapsed}}
+def _chat_completion_text(j: Dict[str, Any]) -> str:
+    text: str = j["choices"][0]["message"]["content"]
+    return text
 
 
-# OPENROUTER --------------------------------------------------------
-
-def _call_openrouter(prompt: str, temperature: float, max_tokens: int, context: Optional[str]):
+def _call_groq(
+    prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Dict[str, Any]:
     """
-    Call OpenRouter API with prompt and context.
+    Call Groq API with prompt and context.
     
     Args:
         prompt: User prompt
@@ -191,9 +441,26 @@ def _call_openrouter(prompt: str, temperature: float, max_tokens: int, context:
         Dict with 'text' and 'meta' keys
         
     Raises:
-        RuntimeError: If OPENROUTER_API_KEY is not set
+        RuntimeError: If GROQ_API_KEY is not set
         Exception: If API call fails
     """
+    return _call_provider("groq", prompt, temperature, max_tokens, context)
+
+
+async def _acall_groq(
+    prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Dict[str, Any]:
+    """Async counterpart of _call_groq."""
+    return await _acall_provider("groq", prompt, temperature, max_tokens, context)
+
+
+# OPENROUTER --------------------------------------------------------
+
+
+def _openrouter_request(
+    prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Tuple[str, dict, dict, str]:
+    """Build (url, headers, payload, model) for an OpenRouter chat completion."""
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
         raise RuntimeError("OPENROUTER_API_KEY missing")
@@ -217,26 +484,712 @@ def _call_openrouter(prompt: str, temperature: float, max_tokens: int, context:
     }
 
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    return url, headers, payload, model
+
+
+def _call_openrouter(
+    prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Call OpenRouter API with prompt and context.
+    
+    Args:
+        prompt: User prompt
+        temperature: Sampling temperature (0.0-1.0)
+        max_tokens: Maximum tokens to generate
+        context: Additional context for the prompt
+        
+    Returns:
+        Dict with 'text' and 'meta' keys
+        
+    Raises:
+        RuntimeError: If OPENROUTER_API_KEY is not set
+        Exception: If API call fails
+    """
+    return _call_provider("openrouter", prompt, temperature, max_tokens, context)
+
+
+async def _acall_openrouter(
+    prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Dict[str, Any]:
+    """Async counterpart of _call_openrouter."""
+    return await _acall_provider("openrouter", prompt, temperature, max_tokens, context)
+
+
+# PROVIDER TABLE ----------------------------------------------------
+
+# name -> (display label, API key env var, request builder, response text extractor)
+_PROVIDERS = {
+    "gemini": ("Gemini", "GEMINI_API_KEY", _gemini_request, _gemini_text),
+    "groq": ("Groq", "GROQ_API_KEY", _groq_request, _chat_completion_text),
+    "openrouter": (
+        "OpenRouter",
+        "OPENROUTER_API_KEY",
+        _openrouter_request,
+        _chat_completion_text,
+    ),
+}
+
+PROVIDER_ORDER = ("gemini", "groq", "openrouter")
+
+
+def _gemini_stream_request(
+    prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Tuple[str, dict, dict, str]:
+    """Gemini streamGenerateContent (SSE) variant of _gemini_request."""
+    url, headers, payload, model = _gemini_request(
+        prompt, temperature, max_tokens, context
+    )
+    return (
+        url.replace(":generateContent?", ":streamGenerateContent?alt=sse&"),
+        headers,
+        payload,
+        model,
+    )
+
+
+def _gemini_delta(j: Dict[str, Any]) -> str:
+    parts = j.get("candidates", [{}])[0].get("content", {}).get("parts", [])
+    return "".join(p.get("text", "") for p in parts)
+
+
+def _chat_stream_request(
+    build: Callable[..., Tuple[str, dict, dict, str]]
+) -> Callable[..., Tuple[str, dict, dict, str]]:
+
+    def _build(
+        prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+    ) -> Tuple[str, dict, dict, str]:
+        url, headers, payload, model = build(prompt, temperature, max_tokens, context)
+        return url, headers, {**payload, "stream": True}, model
+
+    return _build
 
-    start = time.time()
-    try:
-        j = _http_post(url, headers, payload)
-    except Exception as e:
-        raise RuntimeError(f"OpenRouter API call failed: {str(e)}")
-    elapsed = time.time() - start
 
+def _chat_completion_delta(j: Dict[str, Any]) -> str:
+    choices = j.get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content") or ""
+
+
+# name -> (streaming request builder, text delta extractor for one SSE event)
+_STREAM_SPECS = {
+    "gemini": (_gemini_stream_request, _gemini_delta),
+    "groq": (_chat_stream_request(_groq_request), _chat_completion_delta),
+    "openrouter": (_chat_stream_request(_openrouter_request), _chat_completion_delta),
+}
+
+_SYNC_CALLS = {
+    "gemini": _call_gemini,
+    "groq": _call_groq,
+    "openrouter": _call_openrouter,
+}
+_ASYNC_CALLS = {
+    "gemini": _acall_gemini,
+    "groq": _acall_groq,
+    "openrouter": _acall_openrouter,
+}
+
+
+def _parse_response(
+    name: str, j: Dict[str, Any], model: str, elapsed: float
+) -> Dict[str, Any]:
+    label, _, _, extract = _PROVIDERS[name]
     try:
-        text = j["choices"][0]["message"]["content"]
+        text = extract(j)
     except (KeyError, IndexError, TypeError) as e:
         text = json.dumps(j)[:1000]
-        raise RuntimeError(f"Unexpected OpenRouter API response format: {str(e)}. Response: {text}")
+        raise RuntimeError(
+            f"Unexpected {label} API response format: {str(e)}. Response: {text}"
+        )
+    _record_latency(name, elapsed)
+    return {
+        "text": text,
+        "meta": {"provider": name, "model": model, "elapsed_s": elapsed},
+    }
+
+
+def _call_provider(
+    name: str, prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Dict[str, Any]:
+    label, _, build, _ = _PROVIDERS[name]
+    url, headers, payload, model = build(prompt, temperature, max_tokens, context)
+    breaker = _BREAKERS[name]
+    limiter = _LIMITERS[name]
+    cost = _estimate_tokens(prompt, context, max_tokens)
+    reserved = limiter.reservation(cost)
+    with span(name):
+        # One retry when the provider answers 429 with a Retry-After we can afford to
+        # wait
+        for attempt in range(2):
+            if not breaker.try_acquire():
+                _LLM_REQUESTS.inc(provider=name, outcome="circuit_open")
+                raise RuntimeError(f"{label} circuit open")
+            try:
+                with span("rate_limit_wait"):
+                    waited = limiter.acquire(cost)
+            except RateLimitExceeded as e:
+                breaker.release()
+                _LLM_REQUESTS.inc(provider=name, outcome="rate_limited")
+                raise RuntimeError(f"{label} rate limited: {str(e)}")
+            reservation = _Reservation(limiter, reserved)
+            hedge = _HEDGE_ATTEMPT.get()
+            if hedge is not None and not hedge.track(reservation):
+                # Lost the hedge while waiting for the limiter
+                breaker.release()
+                raise RuntimeError(f"{label} call abandoned")
+            start = time.time()
+            try:
+                with span("http"):
+                    j = _http_post(url, headers, payload)
+                resp = _parse_response(name, j, model, time.time() - start)
+            except Exception as e:
+                # Nothing was generated: return the reservation before retrying or
+                # failing
+                reservation.release()
+                retry_after = _retry_after(e)
+                if retry_after is not None:
+                    # Throttling says nothing about provider health
+                    breaker.release()
+                    limiter.penalize(retry_after)
+                    if attempt == 0 and retry_after <= limiter.max_wait_s:
+                        continue
+                    _LLM_REQUESTS.inc(provider=name, outcome="rate_limited")
+                    raise RuntimeError(
+                        f"{label} rate limited by provider "
+                        f"(Retry-After {retry_after:.1f}s)"
+                    )
+                breaker.record_failure()
+                _LLM_REQUESTS.inc(provider=name, outcome="error")
+                if isinstance(e, RuntimeError):
+                    raise
+                raise RuntimeError(f"{label} API call failed: {str(e)}")
+            breaker.record_success(resp["meta"]["elapsed_s"])
+            reservation.settle(j)
+            if waited:
+                resp["meta"]["rate_limit_wait_s"] = waited
+            return resp
+    raise AssertionError("unreachable: the last attempt returns or raises")
+
+
+async def _acall_provider(
+    name: str, prompt: str, temperature: float, max_tokens: int, context: Optional[str]
+) -> Dict[str, Any]:
+    label, _, build, _ = _PROVIDERS[name]
+    url, headers, payload, model = build(prompt, temperature, max_tokens, context)
+    breaker = _BREAKERS[name]
+    limiter = _LIMITERS[name]
+    cost = _estimate_tokens(prompt, context, max_tokens)
+    reserved = limiter.reservation(cost)
+    with span(name):
+        for attempt in range(2):
+            if not breaker.try_acquire():
+                _LLM_REQUESTS.inc(provider=name, outcome="circuit_open")
+                raise RuntimeError(f"{label} circuit open")
+            try:
+                with span("rate_limit_wait"):
+                    waited = await limiter.aacquire(cost)
+            except RateLimitExceeded as e:
+                breaker.release()
+                _LLM_REQUESTS.inc(provider=name, outcome="rate_limited")
+                raise RuntimeError(f"{label} rate limited: {str(e)}")
+            except asyncio.CancelledError:
+                breaker.release()
+                limiter.adjust(reserved)
+                raise
+            reservation = _Reservation(limiter, reserved)
+            start = time.time()
+            try:
+                with span("http"):
+                    j = await _ahttp_post(url, headers, payload)
+                resp = _parse_response(name, j, model, time.time() - start)
+            except asyncio.CancelledError:
+                # Abandoned by a hedge/race winner: not a provider failure
+                breaker.release()
+                reservation.release()
+                raise
+            except Exception as e:
+                # Nothing was generated: return the reservation before retrying or
+                # failing
+                reservation.release()
+                retry_after = _retry_after(e)
+                if retry_after is not None:
+                    breaker.release()
+                    limiter.penalize(retry_after)
+                    if attempt == 0 and retry_after <= limiter.max_wait_s:
+                        continue
+                    _LLM_REQUESTS.inc(provider=name, outcome="rate_limited")
+                    raise RuntimeError(
+                        f"{label} rate limited by provider "
+                        f"(Retry-After {retry_after:.1f}s)"
+                    )
+                breaker.record_failure()
+                _LLM_REQUESTS.inc(provider=name, outcome="error")
+                if isinstance(e, RuntimeError):
+                    raise
+                raise RuntimeError(f"{label} API call failed: {str(e)}")
+            breaker.record_success(resp["meta"]["elapsed_s"])
+            reservation.settle(j)
+            if waited:
+                resp["meta"]["rate_limit_wait_s"] = waited
+            return resp
+    raise AssertionError("unreachable: the last attempt returns or raises")
+
+
+# LATENCY TRACKING AND HEDGING --------------------------------------
+#
+# sequential: try providers one after another (default)
+# hedge:      if a provider has not answered after its hedge delay, launch the
+#             next one concurrently; first success wins, the rest are cancelled
+# race:       launch every configured provider at once; first success wins
+
+CALL_MODES = ("sequential", "hedge", "race")
+CALL_MODE = os.getenv("LLM_CALL_MODE", "sequential").lower()
+HEDGE_DELAY_S = float(os.getenv("LLM_HEDGE_DELAY_S", "2.0"))
+HEDGE_ADAPTIVE = os.getenv("LLM_HEDGE_ADAPTIVE", "true").lower() in ("1", "true", "yes")
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 100
+
+_LATENCIES: Dict[str, Deque[float]] = {
+    name: deque(maxlen=LATENCY_WINDOW) for name in PROVIDER_ORDER
+}
+_LATENCY_LOCK = threading.Lock()
+
+_LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "LLM provider calls by outcome", ("provider", "outcome")
+)
+_LLM_LATENCY = REGISTRY.histogram(
+    "llm_request_duration_seconds",
+    "Latency of successful LLM provider calls",
+    ("provider",),
+)
+# Set in the context of each hedged sync attempt (see _call_hedged)
+_HEDGE_ATTEMPT: "contextvars.ContextVar[Optional[_HedgeAttempt]]" = (
+    contextvars.ContextVar("llm_hedge_attempt", default=None)
+)
+
+
+def _record_latency(name: str, elapsed: float) -> None:
+    _LLM_REQUESTS.inc(provider=name, outcome="ok")
+    _LLM_LATENCY.observe(elapsed, provider=name)
+    with _LATENCY_LOCK:
+        _LATENCIES.setdefault(name, deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+
+
+def latency_p95(name: str) -> Optional[float]:
+    """95th percentile of recent successful call latencies, or None without samples."""
+    with _LATENCY_LOCK:
+        samples = sorted(_LATENCIES.get(name, ()))
+    if not samples:
+        return None
+    return samples[max(0, -(-95 * len(samples) // 100) - 1)]
+
+
+def hedge_delay(name: str) -> float:
+    """
+    Seconds to wait on a provider before hedging: its p95 latency once enough
+    samples exist.
+    """
+    if HEDGE_ADAPTIVE:
+        with _LATENCY_LOCK:
+            n = len(_LATENCIES.get(name, ()))
+        p95 = latency_p95(name) if n >= HEDGE_MIN_SAMPLES else None
+        if p95 is not None:
+            return p95
+    return HEDGE_DELAY_S
+
+
+class _HedgeAttempt:
+    """
+    Rate-limit reservations of one hedged sync provider call. A blocking
+    request cannot be interrupted, so when the call loses, the winner path
+    abandons it: its reservations are returned at once and whatever the
+    request does afterwards settles nothing.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.abandoned = False
+        self._reservations: List[_Reservation] = []
+
+    def track(self, reservation: "_Reservation") -> bool:
+        """
+        Attach a reservation, or return it to the limiter (and False) if the call
+        was already abandoned.
+        """
+        with self._lock:
+            if not self.abandoned:
+                self._reservations.append(reservation)
+                return True
+        reservation.release()
+        return False
+
+    def abandon(self) -> None:
+        with self._lock:
+            self.abandoned = True
+            reservations, self._reservations = self._reservations, []
+        for reservation in reservations:
+            reservation.release()
+
+
+def _hedge_meta(
+    mode: str,
+    winner: str,
+    launched: List[Tuple[str, float]],
+    failed_at: Dict[str, float],
+    start: float,
+) -> Dict[str, Any]:
+    """
+    Describe a hedged call. saved_s is a lower bound on the time saved versus
+    sequential fallback: every provider launched before the winner would have
+    cost at least the time it spent without answering, plus the winner's own
+    latency.
+    """
+    now = time.time()
+    won_at = dict(launched)[winner]
+    sequential = now - won_at
+    for name, t0 in launched:
+        if name == winner:
+            break
+        sequential += failed_at.get(name, now) - t0
+    elapsed = now - start
+    return {
+        "mode": mode,
+        "winner": winner,
+        "launched": [name for name, _ in launched],
+        "elapsed_s": elapsed,
+        "saved_s": max(0.0, sequential - elapsed),
+    }
+
+
+def _call_hedged(
+    names: List[str],
+    mode: str,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    context: Optional[str],
+) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    Run providers in hedge/race mode on worker threads. Returns
+    (response or None, errors).
+
+    Each call gets its own short-lived threads: losers keep blocking until
+    their request ends, and must not hold up attempts of later calls.
+    """
+    pool = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="llm-hedge")
+    queue = list(names)
+    pending = {}
+    attempts: Dict[Any, _HedgeAttempt] = {}
+    launched: List[Tuple[str, float]] = []
+    failed_at: Dict[str, float] = {}
+    errors = []
+    start = time.time()
+
+    def launch() -> None:
+        name = queue.pop(0)
+        # Copy the context so provider spans attach to the caller's trace
+        ctx = contextvars.copy_context()
+        attempt = _HedgeAttempt()
+        ctx.run(_HEDGE_ATTEMPT.set, attempt)
+        fut = pool.submit(
+            ctx.run, _SYNC_CALLS[name], prompt, temperature, max_tokens, context
+        )
+        pending[fut] = name
+        attempts[fut] = attempt
+        launched.append((name, time.time()))
+
+    try:
+        launch()
+        while queue and mode == "race":
+            launch()
+
+        while pending:
+            timeout = None
+            if queue:
+                last_name, last_t0 = launched[-1]
+                timeout = max(0.0, hedge_delay(last_name) - (time.time() - last_t0))
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for fut in done:
+                name = pending.pop(fut)
+                try:
+                    resp = fut.result()
+                except Exception as e:
+                    failed_at[name] = time.time()
+                    errors.append(f"{name}: {str(e)}")
+                    continue
+                resp["meta"]["hedge"] = _hedge_meta(
+                    mode, name, launched, failed_at, start
+                )
+                return resp, errors
+            if not pending and queue:
+                launch()
+        return None, errors
+    finally:
+        # Cancel losers not yet started and abandon the rest; their threads
+        # exit when the requests end
+        for fut in pending:
+            fut.cancel()
+            attempts[fut].abandon()
+        pool.shutdown(wait=False)
+
+
+async def _acall_hedged(
+    names: List[str],
+    mode: str,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    context: Optional[str],
+) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Async counterpart of _call_hedged; losing requests are cancelled."""
+    queue = list(names)
+    pending = {}
+    launched: List[Tuple[str, float]] = []
+    failed_at: Dict[str, float] = {}
+    errors = []
+    start = time.time()
+
+    def launch() -> None:
+        name = queue.pop(0)
+        pending[
+            asyncio.ensure_future(
+                _ASYNC_CALLS[name](prompt, temperature, max_tokens, context)
+            )
+        ] = name
+        launched.append((name, time.time()))
+
+    launch()
+    while queue and mode == "race":
+        launch()
+
+    try:
+        while pending:
+            timeout = None
+            if queue:
+                last_name, last_t0 = launched[-1]
+                timeout = max(0.0, hedge_delay(last_name) - (time.time() - last_t0))
+            done, _ = await asyncio.wait(
+                list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                launch()
+                continue
+            for task in done:
+                name = pending.pop(task)
+                try:
+                    resp = task.result()
+                except Exception as e:
+                    failed_at[name] = time.time()
+                    errors.append(f"{name}: {str(e)}")
+                    continue
+                resp["meta"]["hedge"] = _hedge_meta(
+                    mode, name, launched, failed_at, start
+                )
+                return resp, errors
+            if not pending and queue:
+                launch()
+        return None, errors
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _resolve_mode(mode: Optional[str]) -> str:
+    mode = (mode or CALL_MODE).lower()
+    if mode not in CALL_MODES:
+        raise ValueError(f"mode must be one of {CALL_MODES}, got {mode!r}")
+    return mode
+
+
+# CIRCUIT BREAKERS AND HEALTH ---------------------------------------
+
+BREAKER_WINDOW_S = float(os.getenv("LLM_BREAKER_WINDOW_S", "60"))
+BREAKER_MIN_REQUESTS = int(os.getenv("LLM_BREAKER_MIN_REQUESTS", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+ADAPTIVE_ORDER = os.getenv("LLM_ADAPTIVE_ORDER", "true").lower() in ("1", "true", "yes")
+
+_BREAKERS: Dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(
+        window_s=BREAKER_WINDOW_S,
+        min_requests=BREAKER_MIN_REQUESTS,
+        error_rate=BREAKER_ERROR_RATE,
+        cooldown_s=BREAKER_COOLDOWN_S,
+        probe_timeout_s=HTTP_TIMEOUT_S,
+    )
+    for name in PROVIDER_ORDER
+}
+
+
+def _plan_providers() -> Tuple[List[str], List[str]]:
+    """
+    Return (providers to try, providers skipped because their circuit is open).
+
+    Only providers with an API key are considered. With ADAPTIVE_ORDER the
+    healthy ones are sorted by expected cost (median latency / success rate);
+    ties, including providers without data yet, keep the static priority.
+    """
+    names = [name for name in PROVIDER_ORDER if os.getenv(_PROVIDERS[name][1])]
+    usable = [name for name in names if _BREAKERS[name].available()]
+    skipped = [name for name in names if name not in usable]
+    for name in skipped:
+        _LLM_REQUESTS.inc(provider=name, outcome="circuit_open")
+    if ADAPTIVE_ORDER:
+        usable.sort(key=lambda name: _BREAKERS[name].expected_cost())
+    return usable, skipped
+
+
+def provider_health() -> Dict[str, Dict[str, Any]]:
+    """Breaker state and rolling error/latency stats per provider, for monitoring."""
+    return {
+        name: {
+            **_BREAKERS[name].snapshot(),
+            "configured": bool(os.getenv(_PROVIDERS[name][1])),
+        }
+        for name in PROVIDER_ORDER
+    }
+
+
+def reset_provider_health() -> None:
+    """Close every breaker and forget observed latencies."""
+    for breaker in _BREAKERS.values():
+        breaker.reset()
+    with _LATENCY_LOCK:
+        for samples in _LATENCIES.values():
+            samples.clear()
+
+
+# RATE LIMITING -----------------------------------------------------
+#
+# Limits come from src/config.py (<PROVIDER>_RPM / <PROVIDER>_TPM). When the
+# config module cannot be loaded (e.g. a standalone script without the
+# Pinecone key) they are read from the environment and default to unlimited.
+
+DEFAULT_RETRY_AFTER_S = 1.0
+
+
+def _setting(key: str, default: Any) -> Any:
+    if _cfg is not None and hasattr(_cfg, key):
+        return getattr(_cfg, key)
+    return type(default)(os.getenv(key, default))
+
+
+_LIMITERS: Dict[str, RateLimiter] = {
+    name: RateLimiter(
+        rpm=_setting(f"{name.upper()}_RPM", 0.0),
+        tpm=_setting(f"{name.upper()}_TPM", 0.0),
+        max_wait_s=_setting("LLM_RATE_LIMIT_MAX_WAIT_S", 10.0),
+        max_queue=_setting("LLM_RATE_LIMIT_QUEUE_SIZE", 32),
+    )
+    for name in PROVIDER_ORDER
+}
+
+
+def _estimate_tokens(prompt: str, context: Optional[str], max_tokens: int) -> int:
+    """
+    Upper-bound token cost reserved before a call (~4 characters per token plus
+    the completion budget).
+    """
+    return (len(prompt) + len(context or "")) // 4 + int(max_tokens)
+
 
-    return {"text": text, "meta": {"provider": "openrouter", "model": model, "elapsed_s": elapsed}}
+def _settle_tokens(limiter: RateLimiter, reserved: int, j: Dict[str, Any]) -> None:
+    """Give back the part of the reservation the provider reports as unused."""
+    usage = j.get("usage") or {}
+    used = usage.get("total_tokens") or (j.get("usageMetadata") or {}).get(
+        "totalTokenCount"
+    )
+    if isinstance(used, int):
+        limiter.adjust(reserved - used)
+
+
+class _Reservation:
+    """Tokens reserved for one request; settled against usage or returned, once."""
+
+    def __init__(self, limiter: RateLimiter, tokens: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self._open = True
+        self._lock = threading.Lock()
+
+    def _close(self) -> bool:
+        with self._lock:
+            was_open, self._open = self._open, False
+        return was_open
+
+    def release(self) -> None:
+        """Return the whole reservation (nothing was generated)."""
+        if self._close():
+            self.limiter.adjust(self.tokens)
+
+    def settle(self, j: Dict[str, Any]) -> None:
+        """Return the part the provider reports as unused."""
+        if self._close():
+            _settle_tokens(self.limiter, self.tokens, j)
+
+
+def _stream_usage(j: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    The part of a stream event that carries token usage, in the shape
+    _settle_tokens reads.
+    """
+    if j.get("usage") or j.get("usageMetadata"):
+        return j
+    groq = j.get("x_groq") or {}
+    return groq if groq.get("usage") else None
+
+
+def _settle_stream(
+    limiter: RateLimiter,
+    reserved: int,
+    usage: Optional[Dict[str, Any]],
+    prompt: str,
+    context: Optional[str],
+    parts: List[str],
+) -> None:
+    """
+    _settle_tokens for a finished stream; estimates usage from the streamed text
+    if none was reported.
+    """
+    if usage is None:
+        used = (len(prompt) + len(context or "") + sum(len(p) for p in parts)) // 4
+        usage = {"usage": {"total_tokens": used}}
+    _settle_tokens(limiter, reserved, usage)
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Seconds to back off if exc is a 429 (or 503 with Retry-After), else None."""
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "code", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None)
+    value = headers.get("Retry-After") if headers is not None else None
+    if status != 429 and not (status == 503 and value):
+        return None
+    if not value:
+        return DEFAULT_RETRY_AFTER_S
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_S
+
+
+def rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    """Limiter counters per provider, for monitoring."""
+    return {name: _LIMITERS[name].stats() for name in PROVIDER_ORDER}
 
 
 # FALLBACK ----------------------------------------------------------
 
-def _fallback(prompt: str, context: Optional[str]):
+def _fallback(prompt: str, context: Optional[str]) -> Dict[str, Any]:
     """
     Simple fallback responder when all LLM providers fail.
     
@@ -252,9 +1205,42 @@ def _fallback(prompt: str, context: Optional[str]):
     return {"text": text, "meta": {"provider": "local-fallback"}}
 
 
-# PUBLIC ENTRYPOINT -------------------------------------------------
+def _all_failed(errors: List[str]) -> Dict[str, Any]:
+    error_summary = "; ".join(errors) if errors else "No API keys configured"
+    return {
+        "text": f"[All providers failed: {error_summary}] Using local fallback.",
+        "meta": {"provider": "local-fallback", "errors": errors}
+    }
+
+
+def _validate_args(
+    prompt: str, temperature: float, max_tokens: int
+) -> Tuple[float, int]:
+    if not prompt or not isinstance(prompt, str):
+        raise ValueError("prompt must be a non-empty string")
+    # Clamp temperature to [0.0, 1.0] and ensure max_tokens is positive
+    return max(0.0, min(1.0, float(temperature))), max(1, int(max_tokens))
+
+
+def _reject_stream_mode(mode: Optional[str]) -> None:
+    if mode is not None:
+        raise ValueError(
+            f"mode {mode!r} is not supported with stream=True; "
+            "streams try providers sequentially"
+        )
+
+
+# PUBLIC ENTRYPOINTS ------------------------------------------------
 
-def call_llm(prompt: str, temperature: float = 0.0, max_tokens: int = 512, context: Optional[str] = None, **kwargs):
+def call_llm(
+    prompt: str,
+    temperature: float = 0.0,
+    max_tokens: int = 512,
+    context: Optional[str] = None,
+    mode: Optional[str] = None,
+    stream: bool = False,
+    **kwargs: Any
+) -> Any:
     """
     Call LLM with automatic fallback cascade: Gemini → Groq → OpenRouter → Local.
     If one provider fails, automatically tries the next one.
@@ -264,50 +1250,323 @@ def call_llm(prompt: str, temperature: float = 0.0, max_tokens: int = 512, conte
         temperature: Sampling temperature (0.0-1.0)
         max_tokens: Maximum tokens to generate
         context: Additional context for the prompt
+        mode: "sequential", "hedge" or "race" (default: LLM_CALL_MODE)
+        stream: Return a token event iterator instead (see stream_llm); streams
+            always go through the providers sequentially, so mode must be None
         **kwargs: Additional arguments passed to provider functions
         
     Returns:
-        Dict with 'text' and 'meta' keys containing the response and metadata
+        Dict with 'text' and 'meta' keys containing the response and metadata.
+        In hedge/race mode meta["hedge"] records the winner and time saved.
         
     Raises:
-        Exception: If all providers fail
+        ValueError: If prompt is empty, mode is unknown or mode is given with
+            stream=True
     """
-    if not prompt or not isinstance(prompt, str):
-        raise ValueError("prompt must be a non-empty string")
-        
-    # Validate temperature and max_tokens
-    temperature = max(0.0, min(1.0, float(temperature)))  # Clamp to [0.0, 1.0]
-    max_tokens = max(1, int(max_tokens))  # Ensure positive
-    
-    errors = []
+    if stream:
+        _reject_stream_mode(mode)
+        return stream_llm(prompt, temperature, max_tokens, context)
+    temperature, max_tokens = _validate_args(prompt, temperature, max_tokens)
+    mode = _resolve_mode(mode)
+    names, skipped = _plan_providers()
+    errors = [f"{name}: circuit open" for name in skipped]
 
-    # Try Gemini first
-    if os.getenv("GEMINI_API_KEY"):
+    if mode != "sequential" and len(names) > 1:
+        resp, hedge_errors = _call_hedged(
+            names, mode, prompt, temperature, max_tokens, context
+        )
+        return resp if resp is not None else _all_failed(errors + hedge_errors)
+
+    for name in names:
         try:
-            return _call_gemini(prompt, temperature, max_tokens, context)
+            return _SYNC_CALLS[name](prompt, temperature, max_tokens, context)
         except Exception as e:
-            errors.append(f"gemini: {str(e)}")
+            errors.append(f"{name}: {str(e)}")
             # Continue to next provider
 
-    # Try Groq second
-    if os.getenv("GROQ_API_KEY"):
+    # All providers failed, use local fallback
+    return _all_failed(errors)
+
+
+async def acall_llm(
+    prompt: str,
+    temperature: float = 0.0,
+    max_tokens: int = 512,
+    context: Optional[str] = None,
+    mode: Optional[str] = None,
+    stream: bool = False,
+    **kwargs: Any
+) -> Any:
+    """
+    Async counterpart of call_llm with the same fallback cascade, modes and
+    return value.
+
+    Requests share a pooled keep-alive client per event loop, so many
+    concurrent queries can be served from one process. With stream=True the
+    awaited value is an async iterator of token events (see astream_llm); as
+    with call_llm, mode cannot be combined with stream=True.
+    """
+    if stream:
+        _reject_stream_mode(mode)
+        return astream_llm(prompt, temperature, max_tokens, context)
+    temperature, max_tokens = _validate_args(prompt, temperature, max_tokens)
+    mode = _resolve_mode(mode)
+    names, skipped = _plan_providers()
+    errors = [f"{name}: circuit open" for name in skipped]
+
+    if mode != "sequential" and len(names) > 1:
+        resp, hedge_errors = await _acall_hedged(
+            names, mode, prompt, temperature, max_tokens, context
+        )
+        return resp if resp is not None else _all_failed(errors + hedge_errors)
+
+    for name in names:
         try:
-            return _call_groq(prompt, temperature, max_tokens, context)
+            return await _ASYNC_CALLS[name](prompt, temperature, max_tokens, context)
         except Exception as e:
-            errors.append(f"groq: {str(e)}")
-            # Continue to next provider
+            errors.append(f"{name}: {str(e)}")
+
+    return _all_failed(errors)
+
+
+# STREAMING ---------------------------------------------------------
+#
+# Events: {"type": "token", "text": str} for each text delta, then exactly one
+# {"type": "done", "text": full_text, "meta": {...}}. Fallback to the next
+# provider only happens before the first token; a provider that fails
+# mid-stream ends the stream with meta["error"]. Streaming is always
+# sequential (hedging would duplicate tokens).
+
+
+def _stream_done(
+    name: str,
+    model: str,
+    parts: List[str],
+    start: float,
+    ttft: Optional[float],
+    error: Optional[str] = None,
+) -> Dict[str, Any]:
+    meta = {
+        "provider": name,
+        "model": model,
+        "elapsed_s": time.time() - start,
+        "ttft_s": ttft,
+        "stream": True,
+    }
+    if error:
+        meta["error"] = error
+    return {"type": "done", "text": "".join(parts), "meta": meta}
+
+
+def _stream_fallback(errors: List[str]) -> List[Dict[str, Any]]:
+    resp = _all_failed(errors)
+    return [{"type": "token", "text": resp["text"]}, {"type": "done", **resp}]
+
+
+def stream_llm(
+    prompt: str,
+    temperature: float = 0.0,
+    max_tokens: int = 512,
+    context: Optional[str] = None,
+    **kwargs: Any,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream an LLM answer as token events (SSE for Groq/OpenRouter,
+    streamGenerateContent for Gemini), with the same provider cascade as call_llm.
 
-    # Try OpenRouter third
-    if os.getenv("OPENROUTER_API_KEY"):
+    meta["ttft_s"] on the final event is the time to first token. A consumer
+    that may stop before the "done" event should close the generator
+    (contextlib.closing), which releases the provider connection at once.
+    """
+    temperature, max_tokens = _validate_args(prompt, temperature, max_tokens)
+    names, skipped = _plan_providers()
+    errors = [f"{name}: circuit open" for name in skipped]
+
+    for name in names:
+        label = _PROVIDERS[name][0]
+        build, extract = _STREAM_SPECS[name]
+        breaker = _BREAKERS[name]
         try:
-            return _call_openrouter(prompt, temperature, max_tokens, context)
+            url, headers, payload, model = build(
+                prompt, temperature, max_tokens, context
+            )
         except Exception as e:
-            errors.append(f"openrouter: {str(e)}")
-            # Continue to fallback
+            errors.append(f"{name}: {str(e)}")
+            continue
+        if not breaker.try_acquire():
+            _LLM_REQUESTS.inc(provider=name, outcome="circuit_open")
+            errors.append(f"{name}: {label} circuit open")
+            continue
+        limiter = _LIMITERS[name]
+        cost = _estimate_tokens(prompt, context, max_tokens)
+        reserved = limiter.reservation(cost)
+        try:
+            limiter.acquire(cost)
+        except RateLimitExceeded as e:
+            breaker.release()
+            _LLM_REQUESTS.inc(provider=name, outcome="rate_limited")
+            errors.append(f"{name}: {label} rate limited: {str(e)}")
+            continue
 
-    # All providers failed, use local fallback
-    error_summary = "; ".join(errors) if errors else "No API keys configured"
-    return {
-        "text": f"[All providers failed: {error_summary}] Using local fallback.",
-        "meta": {"provider": "local-fallback", "errors": errors}
-    }
\ No newline at end of file
+        start = time.time()
+        ttft = None
+        parts: List[str] = []
+        usage = None
+        try:
+            # closing: the host slot is released as soon as this generator is
+            # closed, not when the abandoned HTTP stream is collected
+            with closing(_http_post_stream(url, headers, payload)) as stream:
+                for data in stream:
+                    j = json.loads(data)
+                    usage = _stream_usage(j) or usage
+                    delta = extract(j)
+                    if delta:
+                        if ttft is None:
+                            ttft = time.time() - start
+                        parts.append(delta)
+                        yield {"type": "token", "text": delta}
+        except GeneratorExit:
+            # Consumer stopped reading: not a provider failure
+            breaker.release()
+            raise
+        except Exception as e:
+            retry_after = _retry_after(e)
+            if retry_after is not None and not parts:
+                breaker.release()
+                limiter.penalize(retry_after)
+                _LLM_REQUESTS.inc(provider=name, outcome="rate_limited")
+                errors.append(
+                    f"{name}: {label} rate limited by provider "
+                    f"(Retry-After {retry_after:.1f}s)"
+                )
+                continue
+            breaker.record_failure()
+            _LLM_REQUESTS.inc(provider=name, outcome="error")
+            if not parts:
+                errors.append(f"{name}: {label} API call failed: {str(e)}")
+                continue
+            yield _stream_done(
+                name, model, parts, start, ttft, error=f"stream interrupted: {str(e)}"
+            )
+            return
+        finally:
+            # Give back the unused part of the reservation, whatever ended the stream
+            if parts or usage is not None:
+                _settle_stream(limiter, reserved, usage, prompt, context, parts)
+            else:
+                limiter.adjust(reserved)
+
+        if not parts:
+            breaker.record_failure()
+            _LLM_REQUESTS.inc(provider=name, outcome="error")
+            errors.append(f"{name}: {label} returned an empty stream")
+            continue
+        done = _stream_done(name, model, parts, start, ttft)
+        breaker.record_success(done["meta"]["elapsed_s"])
+        _record_latency(name, done["meta"]["elapsed_s"])
+        yield done
+        return
+
+    yield from _stream_fallback(errors)
+
+
+async def astream_llm(
+    prompt: str,
+    temperature: float = 0.0,
+    max_tokens: int = 512,
+    context: Optional[str] = None,
+    **kwargs: Any,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Async counterpart of stream_llm."""
+    temperature, max_tokens = _validate_args(prompt, temperature, max_tokens)
+    names, skipped = _plan_providers()
+    errors = [f"{name}: circuit open" for name in skipped]
+
+    for name in names:
+        label = _PROVIDERS[name][0]
+        build, extract = _STREAM_SPECS[name]
+        breaker = _BREAKERS[name]
+        try:
+            url, headers, payload, model = build(
+                prompt, temperature, max_tokens, context
+            )
+        except Exception as e:
+            errors.append(f"{name}: {str(e)}")
+            continue
+        if not breaker.try_acquire():
+            _LLM_REQUESTS.inc(provider=name, outcome="circuit_open")
+            errors.append(f"{name}: {label} circuit open")
+            continue
+        limiter = _LIMITERS[name]
+        cost = _estimate_tokens(prompt, context, max_tokens)
+        reserved = limiter.reservation(cost)
+        try:
+            await limiter.aacquire(cost)
+        except RateLimitExceeded as e:
+            breaker.release()
+            _LLM_REQUESTS.inc(provider=name, outcome="rate_limited")
+            errors.append(f"{name}: {label} rate limited: {str(e)}")
+            continue
+        except asyncio.CancelledError:
+            breaker.release()
+            limiter.adjust(reserved)
+            raise
+
+        start = time.time()
+        ttft = None
+        parts: List[str] = []
+        usage = None
+        stream = _ahttp_post_stream(url, headers, payload)
+        try:
+            async for data in stream:
+                j = json.loads(data)
+                usage = _stream_usage(j) or usage
+                delta = extract(j)
+                if delta:
+                    if ttft is None:
+                        ttft = time.time() - start
+                    parts.append(delta)
+                    yield {"type": "token", "text": delta}
+        except (GeneratorExit, asyncio.CancelledError):
+            breaker.release()
+            raise
+        except Exception as e:
+            retry_after = _retry_after(e)
+            if retry_after is not None and not parts:
+                breaker.release()
+                limiter.penalize(retry_after)
+                _LLM_REQUESTS.inc(provider=name, outcome="rate_limited")
+                errors.append(
+                    f"{name}: {label} rate limited by provider "
+                    f"(Retry-After {retry_after:.1f}s)"
+                )
+                continue
+            breaker.record_failure()
+            _LLM_REQUESTS.inc(provider=name, outcome="error")
+            if not parts:
+                errors.append(f"{name}: {label} API call failed: {str(e)}")
+                continue
+            yield _stream_done(
+                name, model, parts, start, ttft, error=f"stream interrupted: {str(e)}"
+            )
+            return
+        finally:
+            await stream.aclose()
+            if parts or usage is not None:
+                _settle_stream(limiter, reserved, usage, prompt, context, parts)
+            else:
+                limiter.adjust(reserved)
+
+        if not parts:
+            breaker.record_failure()
+            _LLM_REQUESTS.inc(provider=name, outcome="error")
+            errors.append(f"{name}: {label} returned an empty stream")
+            continue
+        done = _stream_done(name, model, parts, start, ttft)
+        breaker.record_success(done["meta"]["elapsed_s"])
+        _record_latency(name, done["meta"]["elapsed_s"])
+        yield done
+        return
+
+    for event in _stream_fallback(errors):
+        yield event
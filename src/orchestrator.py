@@ -1,9 +1,18 @@
 # src/orchestrator.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 import src.config as cfg
 from src.ingestion.embeddings import get_embedding  # provider-agnostic embedding fn used for ingestion
-from src.retrieval.retriever import query_pinecone as pinecone_search, deterministic_embedding
+from src.retrieval.retriever import deterministic_embedding
+from src.retrieval.backends import RetrievalBackend, _mtime_ns, get_backend
+from src.ingestion.embedding_store import EmbeddingStore, is_store
+from src.answer_cache import AnswerCache, is_cacheable, make_answer_key
+from src.semantic_cache import SemanticCache
+from src.tracing import Span, activate, span, start_trace
+from src.metrics import CACHE_LOOKUPS, REGISTRY, serve as _serve_metrics
 
 # -------------------------
 # Citation snippet enrichment
@@ -11,7 +20,7 @@ from src.retrieval.retriever import query_pinecone as pinecone_search, determini
 import json
 from pathlib import Path as _Path
 
-def _enrich_citations_with_snippets(result: dict, chunk_map: dict):
+def _enrich_citations_with_snippets(result: dict, chunk_map: dict) -> dict:
     """
     Mutates `result` in-place: for each citation where snippet is empty,
     set snippet to chunk_map[citation.id] if available.
@@ -27,21 +36,48 @@ def _enrich_citations_with_snippets(result: dict, chunk_map: dict):
                 c["snippet"] = s
     return result
 
-def _load_chunks_map(path: str = "data/chunks.jsonl") -> dict:
+def _default_chunks_path() -> str:
     """
-    Load chunks map from JSONL file for citation enrichment.
-    
+    Chunk file matching the active retrieval backend: the local backend's own
+    path, else LOCAL_INDEX_PATH. data/chunks.store (or data/chunks.jsonl) is
+    used only when that file does not exist.
+    """
+    try:
+        path = getattr(get_backend(), "path", None)
+    except Exception:
+        path = None
+    path = path or getattr(cfg, "LOCAL_INDEX_PATH", "data/chunks_semantic.store")
+    if os.path.exists(path):
+        return path
+    return "data/chunks.store" if is_store("data/chunks.store") else "data/chunks.jsonl"
+
+
+def _load_chunks_map(path: Optional[str] = None) -> Dict[str, str]:
+    """
+    Load chunks map for citation enrichment.
+
     Args:
-        path: Path to JSONL file containing chunk data
-        
+        path: Embedding store directory or JSONL file containing chunk data
+            (default: see _default_chunks_path)
+
     Returns:
-        Dictionary mapping chunk IDs to text content
+        Mapping of chunk IDs to text content; for an embedding store the texts
+        stay memory-mapped and are decoded on lookup
     """
+    if path is None:
+        path = _default_chunks_path()
+    if is_store(path):
+        try:
+            return EmbeddingStore(path).text_map()
+        except Exception:
+            # Don't fail if the store can't be opened
+            return {}
+
     m = {}
     pth = _Path(path)
     if not pth.exists():
         return m
-        
+
     try:
         with pth.open("r", encoding="utf-8") as fh:
             for line_num, line in enumerate(fh, 1):
@@ -66,7 +102,22 @@ def _load_chunks_map(path: str = "data/chunks.jsonl") -> dict:
         
     return m
 
-_CHUNKS_MAP = _load_chunks_map()
+_CHUNKS_MAP: Any = {}
+_CHUNKS_MAP_KEY = None
+
+
+def _chunks_map() -> Dict[str, str]:
+    """
+    The chunks map of the active backend, reloaded when its file changes
+    (re-ingestion).
+    """
+    global _CHUNKS_MAP, _CHUNKS_MAP_KEY
+    path = _default_chunks_path()
+    key = (path, _mtime_ns(path))
+    if key != _CHUNKS_MAP_KEY:
+        _CHUNKS_MAP = _load_chunks_map(path)
+        _CHUNKS_MAP_KEY = key
+    return _CHUNKS_MAP
 
 
 
@@ -74,13 +125,13 @@ import json
 from pathlib import Path as _Path
 
 
-
-
 # Try to import a provider wrapper; if missing, use a local deterministic fallback for offline tests.
 try:
     from src.llm_providers import call_llm  # thin wrapper that chooses Gemini/Groq/OpenRouter per config
 except Exception:
-    def call_llm(prompt: str, temperature: float = 0.0, max_tokens: int = 512, **kwargs):
+    def call_llm(  # type: ignore[misc]
+        prompt: str, temperature: float = 0.0, max_tokens: int = 512, **kwargs: Any
+    ) -> Dict[str, Any]:
         """
         Simple deterministic offline responder: return prompt summary-like text and meta.
         
@@ -99,6 +150,51 @@ except Exception:
         return {"text": resp_text, "meta": {"provider": "local-fallback", "temperature": temperature}}
 
 
+# Repeated temperature-0 queries against an unchanged index skip retrieval and the LLM
+ANSWER_CACHE = AnswerCache(
+    maxsize=getattr(cfg, "ANSWER_CACHE_SIZE", 256),
+    ttl_s=getattr(cfg, "ANSWER_CACHE_TTL_S", None),
+    path=getattr(cfg, "ANSWER_CACHE_PATH", None),
+)
+
+# Paraphrases that retrieve the same chunks reuse an answer (None when disabled)
+SEMANTIC_CACHE = SemanticCache(
+    threshold=getattr(cfg, "SEMANTIC_CACHE_THRESHOLD", 0.95),
+    maxsize=getattr(cfg, "SEMANTIC_CACHE_SIZE", 1000),
+) if getattr(cfg, "SEMANTIC_CACHE_ENABLED", False) else None
+
+# Operational metrics (Prometheus text format, see src/metrics.py)
+_QUERIES = REGISTRY.counter(
+    "rag_queries_total", "Queries handled by the orchestrator", ("mode", "status")
+)
+_QUERY_ERRORS = REGISTRY.counter(
+    "rag_query_errors_total", "Failed queries by pipeline stage", ("stage",)
+)
+_QUERY_LATENCY = REGISTRY.histogram(
+    "rag_query_duration_seconds", "End-to-end query latency", ("mode",)
+)
+_STAGE_LATENCY = REGISTRY.histogram(
+    "rag_stage_duration_seconds", "Latency of top-level pipeline stages", ("stage",)
+)
+
+if getattr(cfg, "METRICS_PORT", 0):
+    _serve_metrics(cfg.METRICS_PORT)
+
+
+def _record_query(result: Dict[str, Any], mode: str, timings: Dict[str, float]) -> None:
+    """Count one finished query and observe its stage latencies."""
+    error = (result.get("llm_meta") or {}).get("error")
+    if error:
+        # "retrieval_failed: ..." -> "retrieval_failed"
+        _QUERY_ERRORS.inc(stage=str(error).split(":", 1)[0])
+    _QUERIES.inc(mode=mode, status="error" if error else "ok")
+    for stage, seconds in timings.items():
+        if stage == "total":
+            _QUERY_LATENCY.observe(seconds, mode=mode)
+        elif "/" not in stage:
+            _STAGE_LATENCY.observe(seconds, stage=stage)
+
+
 PROMPT_TEMPLATE = """
 You are given a user query and a set of context chunks. Use the context to answer concisely.
 Provide a short answer and list the ids of chunks used as citations.
@@ -152,55 +248,151 @@ def _extract_cited_ids_from_llm(text: str) -> List[str]:
     """
     if not text or not isinstance(text, str):
         return []
-        
+
     # find tokens like ID:some-id or ID:some-file::123
     ids = re.findall(r"ID:([A-Za-z0-9_\-:.]+)", text)
     return ids
 
 
-def orchestrate_query(query: str, top_k: int = 3, llm_params: Dict[str, Any] = None) -> Dict[str, Any]:
+def _check_answer_cache(
+    backend: RetrievalBackend, query: str, top_k: int, llm_params: Dict[str, Any]
+) -> Dict[str, Any]:
     """
-    Orchestrate the full RAG query pipeline: retrieval → LLM generation → citation assembly.
-    
-    Args:
-        query: User query string
-        top_k: Number of top chunks to retrieve
-        llm_params: Parameters for LLM call (temperature, max_tokens, etc.)
-        
+    Step 0 (answer cache) for one query.
+
     Returns:
-        Dict with answer, sources, citations, and metadata
-        
-    Raises:
-        Exception: If any step in the pipeline fails
+        {"result": cached} on a hit, else {"cache_key", "fingerprint"} (both
+        None when the call is not cacheable)
     """
-    if not query or not isinstance(query, str):
-        return {"answer": "", "sources": [], "citations": [], "llm_meta": {"error": "invalid_query"}}
-        
-    if llm_params is None:
-        llm_params = {"temperature": 0.0, "max_tokens": 512}
-        
-    # Validate top_k
-    if not isinstance(top_k, int) or top_k <= 0:
-        top_k = 3
+    cache_key = fingerprint = None
+    if is_cacheable(llm_params):
+        fingerprint = backend.fingerprint()
+        cache_key = make_answer_key(query, top_k, llm_params, fingerprint)
+        cached = ANSWER_CACHE.get(cache_key)
+        CACHE_LOOKUPS.inc(cache="answer", result="miss" if cached is None else "hit")
+        if cached is not None:
+            cached.setdefault("llm_meta", {})["cache"] = "hit"
+            return {"result": cached}
+    return {"cache_key": cache_key, "fingerprint": fingerprint}
 
-    # 1) retrieve top_k chunks from vector DB using the repo's deterministic embedding/query wrapper
-    try:
-        chunks = pinecone_search(query, top_k=top_k)
-    except Exception as e:
-        return {"answer": "", "sources": [], "citations": [], "llm_meta": {"error": f"retrieval_failed: {str(e)}"}}
-        
+
+def _prepare_from_chunks(
+    backend: RetrievalBackend,
+    query: str,
+    top_k: int,
+    llm_params: Dict[str, Any],
+    chunks: List[Dict[str, Any]],
+    cache_key: str,
+    fingerprint: str
+) -> Dict[str, Any]:
+    """Steps 1b-2 for one query: semantic cache lookup and prompt building."""
     if not chunks:
-        return {"answer": "", "sources": [], "citations": [], "llm_meta": {"error": "no_retrieval_results"}}
+        return {
+            "result": {
+                "answer": "",
+                "sources": [],
+                "citations": [],
+                "llm_meta": {"error": "no_retrieval_results"},
+            }
+        }
+
+    # 1b) semantic cache: a near-duplicate query that retrieved the same chunks
+    # reuses its answer
+    semantic_ctx = q_vec = None
+    chunk_ids = [c.get("id") for c in chunks if isinstance(c, dict)]
+    if cache_key is not None and SEMANTIC_CACHE is not None:
+        try:
+            with span("semantic_cache"):
+                semantic_ctx = make_answer_key("", top_k, llm_params, fingerprint)
+                q_vec = backend.embed_query(query)
+                hit = SEMANTIC_CACHE.lookup(q_vec, chunk_ids, semantic_ctx)
+            CACHE_LOOKUPS.inc(cache="semantic", result="miss" if hit is None else "hit")
+            if hit is not None:
+                hit.setdefault("llm_meta", {})["cache"] = "semantic_hit"
+                return {"result": hit}
+        except Exception:
+            # the semantic cache is an optimisation; fall through to the LLM
+            q_vec = None
 
     # 2) build prompt
-    context = _build_context(chunks)
-    prompt = PROMPT_TEMPLATE.format(query=query, k=top_k, context=context)
+    with span("prompt"):
+        context = _build_context(chunks)
+        prompt = PROMPT_TEMPLATE.format(query=query, k=top_k, context=context)
 
-    # 3) call LLM via unified provider wrapper
+    return {
+        "prompt": prompt,
+        "chunks": chunks,
+        "chunk_ids": chunk_ids,
+        "cache_key": cache_key,
+        "semantic_ctx": semantic_ctx,
+        "q_vec": q_vec,
+    }
+
+
+def _prepare_query(
+    query: str, top_k: int, llm_params: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Run every step before the LLM call: answer cache, retrieval, semantic cache
+    and prompt building.
+
+    Returns:
+        {"result": ...} when the query is answered (or fails) without the LLM,
+        otherwise the state needed by _finalize_result: prompt, chunks,
+        chunk_ids, cache_key, semantic_ctx, q_vec
+    """
+    # 0) answer cache: identical deterministic query against the same index version
     try:
-        llm_resp = call_llm(prompt=prompt, **llm_params)
+        with span("answer_cache"):
+            backend = get_backend()
+            cached = _check_answer_cache(backend, query, top_k, llm_params)
     except Exception as e:
-        return {"answer": "", "sources": [], "citations": [], "llm_meta": {"error": f"llm_call_failed: {str(e)}"}}
+        return {
+            "result": {
+                "answer": "",
+                "sources": [],
+                "citations": [],
+                "llm_meta": {"error": f"retrieval_failed: {str(e)}"},
+            }
+        }
+    if "result" in cached:
+        return cached
+
+    # 1) retrieve top_k chunks from the configured backend
+    # (RETRIEVAL_BACKEND: pinecone | local)
+    try:
+        with span("retrieval", backend=backend.name, top_k=top_k):
+            chunks = backend.search(query, top_k=top_k)
+    except Exception as e:
+        return {
+            "result": {
+                "answer": "",
+                "sources": [],
+                "citations": [],
+                "llm_meta": {"error": f"retrieval_failed: {str(e)}"},
+            }
+        }
+
+    return _prepare_from_chunks(
+        backend,
+        query,
+        top_k,
+        llm_params,
+        chunks,
+        cached["cache_key"],
+        cached["fingerprint"],
+    )
+
+
+def _finalize_result(state: Dict[str, Any], llm_resp: Dict[str, Any]) -> Dict[str, Any]:
+    """Build sources and citations around an LLM response and populate the caches."""
+    with span("citations"):
+        return _assemble_result(state, llm_resp)
+
+
+def _assemble_result(state: Dict[str, Any], llm_resp: Dict[str, Any]) -> Dict[str, Any]:
+    chunks = state["chunks"]
+    chunk_map = _chunks_map()
 
     # 4) build sources (ensure snippet comes from chunk text or fallback to local chunks map)
     sources: List[Dict[str, Any]] = []
@@ -208,7 +400,12 @@ def orchestrate_query(query: str, top_k: int = 3, llm_params: Dict[str, Any] = N
         # prefer chunk text from retrieval result; fallback to local chunk map
         text_from_chunk = c.get("text") or "" if isinstance(c, dict) else ""
         if not text_from_chunk:
-            text_from_chunk = _CHUNKS_MAP.get(str(c.get("id"))) or _CHUNKS_MAP.get(str(c.get("chunk_id")), "") if isinstance(c, dict) else ""
+            text_from_chunk = (
+                chunk_map.get(str(c.get("id")))
+                or chunk_map.get(str(c.get("chunk_id")), "")
+                if isinstance(c, dict)
+                else ""
+            )
         snippet = (text_from_chunk or "")[:400]
         sources.append({
             "id": c.get("id") if isinstance(c, dict) else None,
@@ -235,11 +432,316 @@ def orchestrate_query(query: str, top_k: int = 3, llm_params: Dict[str, Any] = N
         "llm_meta": llm_resp.get("meta", {}) if isinstance(llm_resp, dict) else {}
     }
 
-    # Best-effort: enrich any empty snippets from the canonical _CHUNKS_MAP
+    # Best-effort: enrich any empty snippets from the active backend's chunks map
     try:
-        _enrich_citations_with_snippets(result, _CHUNKS_MAP)
+        with span("enrich_citations"):
+            _enrich_citations_with_snippets(result, chunk_map)
     except Exception:
         # don't fail the whole call if enrichment breaks
         pass
 
-    return result
\ No newline at end of file
+    # Only cache real answers, not errors or offline fallbacks
+    cache_key = state["cache_key"]
+    if (
+        cache_key is not None
+        and result["llm_meta"].get("provider") != "local-fallback"
+        and "error" not in result["llm_meta"]
+    ):
+        try:
+            with span("cache_store"):
+                ANSWER_CACHE.put(cache_key, result)
+                if SEMANTIC_CACHE is not None and state["q_vec"] is not None:
+                    SEMANTIC_CACHE.add(
+                        state["q_vec"],
+                        state["chunk_ids"],
+                        state["semantic_ctx"],
+                        result,
+                    )
+        except Exception:
+            pass
+
+    return result
+
+
+def orchestrate_query(query: str, top_k: int = 3, llm_params: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Orchestrate the full RAG query pipeline: retrieval → LLM generation → citation assembly.
+    
+    Args:
+        query: User query string
+        top_k: Number of top chunks to retrieve
+        llm_params: Parameters for LLM call (temperature, max_tokens, etc.)
+        
+    Returns:
+        Dict with answer, sources, citations, metadata, and "timings": seconds
+        per pipeline stage ("retrieval", "retrieval/embed_query", "llm", ...,
+        "total")
+        
+    Raises:
+        Exception: If any step in the pipeline fails
+    """
+    with start_trace("orchestrate_query") as root:
+        result = _run_query(query, top_k, llm_params)
+    result["timings"] = root.breakdown()
+    _record_query(result, "single", result["timings"])
+    return result
+
+
+def _run_query(query: str, top_k: int, llm_params: Dict[str, Any]) -> Dict[str, Any]:
+    if not query or not isinstance(query, str):
+        return {"answer": "", "sources": [], "citations": [], "llm_meta": {"error": "invalid_query"}}
+
+    if llm_params is None:
+        llm_params = {"temperature": 0.0, "max_tokens": 512}
+
+    # Validate top_k
+    if not isinstance(top_k, int) or top_k <= 0:
+        top_k = 3
+
+    state = _prepare_query(query, top_k, llm_params)
+    if "result" in state:
+        return state["result"]
+
+    # 3) call LLM via unified provider wrapper
+    try:
+        with span("llm"):
+            llm_resp = call_llm(prompt=state["prompt"], **llm_params)
+    except Exception as e:
+        return {"answer": "", "sources": [], "citations": [], "llm_meta": {"error": f"llm_call_failed: {str(e)}"}}
+
+    return _finalize_result(state, llm_resp)
+
+
+def orchestrate_query_stream(
+    query: str, top_k: int = 3, llm_params: Dict[str, Any] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of orchestrate_query.
+
+    Yields {"type": "token", "text": ...} events as the answer is generated,
+    then one {"type": "result", "result": ...} event holding the same dict
+    orchestrate_query returns (answer, sources, citations, llm_meta, timings;
+    timings include "llm/first_token"). Cached answers are emitted as a
+    single token. Close the generator (contextlib.closing) when stopping
+    early, so the LLM stream is released.
+    """
+    # The trace is never current across a yield (see src/tracing.py)
+    root = Span("orchestrate_query_stream")
+
+    def _final(result: Dict[str, Any]) -> Dict[str, Any]:
+        root.finish()
+        result["timings"] = root.breakdown()
+        _record_query(result, "stream", result["timings"])
+        return {"type": "result", "result": result}
+
+    if not query or not isinstance(query, str):
+        yield _final(
+            {
+                "answer": "",
+                "sources": [],
+                "citations": [],
+                "llm_meta": {"error": "invalid_query"},
+            }
+        )
+        return
+
+    if llm_params is None:
+        llm_params = {"temperature": 0.0, "max_tokens": 512}
+
+    if not isinstance(top_k, int) or top_k <= 0:
+        top_k = 3
+
+    with activate(root):
+        state = _prepare_query(query, top_k, llm_params)
+    if "result" in state:
+        if state["result"].get("answer"):
+            yield {"type": "token", "text": state["result"]["answer"]}
+        yield _final(state["result"])
+        return
+
+    llm_span = Span("llm")
+    first_token = Span("first_token")
+    try:
+        events = call_llm(prompt=state["prompt"], stream=True, **llm_params)
+        if isinstance(events, dict):
+            # Offline responder without streaming support
+            events = [
+                {"type": "token", "text": events.get("text", "")},
+                {"type": "done", **events},
+            ]
+        llm_resp = {}
+        try:
+            for event in events:
+                if event.get("type") == "token":
+                    if first_token.end is None:
+                        first_token.finish(llm_span)
+                    yield event
+                elif event.get("type") == "done":
+                    llm_resp = {
+                        "text": event.get("text", ""),
+                        "meta": event.get("meta", {}),
+                    }
+        finally:
+            # Our consumer stopping early must end the provider stream too
+            if hasattr(events, "close"):
+                events.close()
+    except Exception as e:
+        llm_span.finish(root)
+        yield _final(
+            {
+                "answer": "",
+                "sources": [],
+                "citations": [],
+                "llm_meta": {"error": f"llm_call_failed: {str(e)}"},
+            }
+        )
+        return
+    llm_span.finish(root)
+
+    with activate(root):
+        result = _finalize_result(state, llm_resp)
+    yield _final(result)
+
+
+def orchestrate_queries(
+    queries: List[str],
+    top_k: int = 3,
+    llm_params: Dict[str, Any] = None,
+    max_concurrency: int = 4
+) -> Dict[str, Any]:
+    """
+    Batch variant of orchestrate_query for evaluation and bulk Q&A jobs.
+
+    All queries are embedded in one batch and retrieved together (one matrix
+    product on the local backend, concurrent requests on Pinecone); LLM calls
+    run on at most max_concurrency threads.
+
+    Args:
+        queries: User query strings
+        top_k: Number of top chunks to retrieve per query
+        llm_params: Parameters for LLM calls (temperature, max_tokens, etc.)
+        max_concurrency: Maximum concurrent LLM calls
+
+    Returns:
+        Dict with "results" (one orchestrate_query-style dict per query, in
+        input order) and "timings" (seconds spent per stage for the batch)
+    """
+    if llm_params is None:
+        llm_params = {"temperature": 0.0, "max_tokens": 512}
+    if not isinstance(top_k, int) or top_k <= 0:
+        top_k = 3
+
+    timings = {
+        "cache": 0.0,
+        "retrieval": 0.0,
+        "prompt": 0.0,
+        "llm": 0.0,
+        "finalize": 0.0,
+    }
+    results: List[Any] = [None] * len(queries)
+    states: Dict[int, Dict[str, Any]] = {}
+
+    # 0) validate and check the answer cache
+    t0 = time.perf_counter()
+    pending: Dict[int, Dict[str, Any]] = {}
+    try:
+        backend = get_backend()
+        for i, q in enumerate(queries):
+            if not q or not isinstance(q, str):
+                results[i] = {
+                    "answer": "",
+                    "sources": [],
+                    "citations": [],
+                    "llm_meta": {"error": "invalid_query"},
+                }
+                continue
+            cached = _check_answer_cache(backend, q, top_k, llm_params)
+            if "result" in cached:
+                results[i] = cached["result"]
+            else:
+                pending[i] = cached
+    except Exception as e:
+        error = f"retrieval_failed: {str(e)}"
+        results = [
+            (
+                r
+                if r is not None
+                else {
+                    "answer": "",
+                    "sources": [],
+                    "citations": [],
+                    "llm_meta": {"error": error},
+                }
+            )
+            for r in results
+        ]
+        for r in results:
+            _record_query(r, "batch", {})
+        return {"results": results, "timings": timings}
+    timings["cache"] = time.perf_counter() - t0
+
+    # 1) batch retrieval
+    t0 = time.perf_counter()
+    order = sorted(pending)
+    try:
+        batch_chunks = backend.search_batch([queries[i] for i in order], top_k=top_k)
+    except Exception as e:
+        batch_chunks = None
+        for i in order:
+            results[i] = {
+                "answer": "",
+                "sources": [],
+                "citations": [],
+                "llm_meta": {"error": f"retrieval_failed: {str(e)}"},
+            }
+    timings["retrieval"] = time.perf_counter() - t0
+
+    # 1b-2) semantic cache and prompts
+    t0 = time.perf_counter()
+    for i, chunks in zip(order, batch_chunks or []):
+        state = _prepare_from_chunks(
+            backend, queries[i], top_k, llm_params, chunks,
+            pending[i]["cache_key"], pending[i]["fingerprint"]
+        )
+        if "result" in state:
+            results[i] = state["result"]
+        else:
+            states[i] = state
+    timings["prompt"] = time.perf_counter() - t0
+
+    # 3) LLM calls with bounded concurrency
+    t0 = time.perf_counter()
+
+    def _run(i: int) -> Dict[str, Any]:
+        try:
+            return call_llm(prompt=states[i]["prompt"], **llm_params)
+        except Exception as e:
+            return {"error": f"llm_call_failed: {str(e)}"}
+
+    llm_resps: Dict[int, Dict[str, Any]] = {}
+    if states:
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_concurrency, len(states)))
+        ) as pool:
+            llm_resps = dict(zip(states, pool.map(_run, list(states))))
+    timings["llm"] = time.perf_counter() - t0
+
+    # 4-6) sources, citations, caches
+    t0 = time.perf_counter()
+    for i, resp in llm_resps.items():
+        if "error" in resp and "text" not in resp:
+            results[i] = {
+                "answer": "",
+                "sources": [],
+                "citations": [],
+                "llm_meta": {"error": resp["error"]},
+            }
+        else:
+            results[i] = _finalize_result(states[i], resp)
+    timings["finalize"] = time.perf_counter() - t0
+    timings["total"] = sum(timings.values())
+
+    # Batch timings are not per query, so only outcomes are recorded
+    for r in results:
+        _record_query(r, "batch", {})
+    return {"results": results, "timings": timings}
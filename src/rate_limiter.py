@@ -0,0 +1,183 @@
+# src/rate_limiter.py
+"""
+Client-side token-bucket rate limiter with a bounded wait queue.
+
+Each limiter has two buckets refilled continuously: requests per minute and
+tokens per minute (0 disables a bucket). Callers reserve capacity up front and
+sleep until it is theirs, so concurrent callers are served in arrival order
+and bursts are spread out instead of being sent to the provider.
+
+Backpressure: a caller is rejected with RateLimitExceeded instead of waiting
+when max_queue callers are already waiting or its wait would exceed max_wait_s.
+A server Retry-After is honoured with penalize(), which blocks the limiter
+until that time.
+"""
+
+import time
+import asyncio
+import threading
+from typing import Any, Dict
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when a caller would wait too long or the wait queue is full."""
+
+
+class _Bucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """
+        Seconds until `amount` is available (the level may already be negative from
+        reservations).
+        """
+        short = min(amount, self.capacity) - self.level
+        return short / self.rate if short > 0 else 0.0
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter usable from threads (acquire) and asyncio (aacquire).
+
+    Args:
+        rpm: Requests per minute (0 = unlimited)
+        tpm: Tokens per minute (0 = unlimited)
+        max_wait_s: Longest a caller may be asked to wait
+        max_queue: Most callers allowed to wait at once
+    """
+
+    def __init__(
+        self,
+        rpm: float = 0,
+        tpm: float = 0,
+        max_wait_s: float = 10.0,
+        max_queue: int = 32,
+    ):
+        self.requests = _Bucket(rpm) if rpm and rpm > 0 else None
+        self.tokens = _Bucket(tpm) if tpm and tpm > 0 else None
+        self.max_wait_s = max_wait_s
+        self.max_queue = max_queue
+        self._blocked_until = 0.0
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.rejected = 0
+        self.waited_s = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    def _reserve(self, tokens: int) -> float:
+        """Reserve one request and `tokens` tokens; return how long to sleep."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._blocked_until - now)
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_for(amount))
+            if wait > 0:
+                if wait > self.max_wait_s:
+                    self.rejected += 1
+                    raise RateLimitExceeded(
+                        f"rate limit wait {wait:.1f}s exceeds max "
+                        f"{self.max_wait_s:.1f}s"
+                    )
+                if self._waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise RateLimitExceeded(
+                        f"rate limit queue full ({self._waiting} waiting)"
+                    )
+                self._waiting += 1
+            # Reserve now: later callers queue behind this one
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if bucket is not None:
+                    bucket.level -= min(amount, bucket.capacity)
+            self.acquired += 1
+            self.waited_s += wait
+            return wait
+
+    def _done_waiting(self) -> None:
+        with self._lock:
+            self._waiting -= 1
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until a request of `tokens` tokens may be sent.
+
+        Returns:
+            Seconds waited
+
+        Raises:
+            RateLimitExceeded: If the wait would exceed max_wait_s or the queue is full
+        """
+        if not self.enabled and self._blocked_until <= time.monotonic():
+            return 0.0
+        wait = self._reserve(tokens)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._done_waiting()
+        return wait
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Async counterpart of acquire; sleeps without blocking the event loop."""
+        if not self.enabled and self._blocked_until <= time.monotonic():
+            return 0.0
+        wait = self._reserve(tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._done_waiting()
+        return wait
+
+    def reservation(self, tokens: int) -> int:
+        """
+        Tokens acquire(tokens) takes from the token bucket (capped at its
+        capacity, 0 without one); adjust() with this amount undoes the reservation.
+        """
+        if self.tokens is None:
+            return 0
+        return int(min(tokens, self.tokens.capacity))
+
+    def adjust(self, tokens: int) -> None:
+        """
+        Return over-reserved tokens (positive) or charge extra ones (negative) once
+        actual usage is known.
+        """
+        if self.tokens is None or not tokens:
+            return
+        with self._lock:
+            self.tokens.refill(time.monotonic())
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + tokens)
+
+    def penalize(self, retry_after_s: float) -> None:
+        """Hold every caller until retry_after_s from now (server-side Retry-After)."""
+        with self._lock:
+            self._blocked_until = max(
+                self._blocked_until, time.monotonic() + max(0.0, retry_after_s)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "rpm": self.requests.capacity if self.requests else 0,
+                "tpm": self.tokens.capacity if self.tokens else 0,
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+                "waiting": self._waiting,
+                "waited_s": self.waited_s,
+                "blocked_for_s": max(0.0, self._blocked_until - now),
+            }
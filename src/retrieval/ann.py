@@ -0,0 +1,520 @@
+"""
+Approximate nearest-neighbour (IVF) index for the local retrieval backend.
+
+An inverted-file index: a spherical k-means coarse quantizer splits the
+normalized vectors into n_lists clusters, stored contiguously per cluster.
+A query scores the centroids, then only the nprobe closest lists, so the cost
+is O((n_lists + nprobe * N / n_lists) * d) instead of O(N * d).
+
+Functions:
+- spherical_kmeans(matrix, n_clusters, n_iter, seed): Train cosine k-means centroids
+- IVFIndex.build(base, n_lists, nprobe): Build from a LocalVectorIndex
+- IVFIndex.search_batch(queries, top_k): Top-k for many queries, scanning each
+  probed list once
+- IVFIndex.save(path) / IVFIndex.load(path): Persist to / load from an index directory
+- recall_at_k(approx, exact, queries, k): Recall of approx search against exact search
+
+A saved index is a directory of .npy files (no pickle, no JSON blobs):
+centroids, matrix, offsets and row_ids, plus ids, filenames and rows
+((N, 5) int64 [filename_idx, chunk_id, chars, start, end], -1 when unknown)
+for the metadata, and meta.json. load() memory-maps the arrays, so the
+vectors are paged in on demand instead of being read into RAM.
+
+CLI:
+> python -m src.retrieval.ann data/chunks_semantic.store \
+      data/chunks_semantic.store.ivf --nprobe 8
+builds, saves and prints a recall@k report.
+"""
+
+import os
+import json
+import shutil
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.retrieval.local_index import LocalVectorIndex, normalize_rows, top_k_indices
+
+# Rows scored per matrix multiply during k-means assignment (bounds peak memory)
+_ASSIGN_BATCH = 65536
+
+IVF_VERSION = 1
+_IVF_ARRAYS = ("centroids", "matrix", "offsets", "row_ids", "ids", "filenames", "rows")
+_IVF_META = "meta.json"
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Return the index of the most similar centroid for each row."""
+    labels = np.empty(matrix.shape[0], dtype=np.int64)
+    for start in range(0, matrix.shape[0], _ASSIGN_BATCH):
+        block = matrix[start:start + _ASSIGN_BATCH]
+        labels[start:start + _ASSIGN_BATCH] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(
+    matrix: np.ndarray,
+    n_clusters: int,
+    n_iter: int = 20,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Train k-means centroids under cosine similarity.
+
+    Args:
+        matrix: L2-normalized float32 rows
+        n_clusters: Number of centroids
+        n_iter: Lloyd iterations
+        seed: RNG seed for initialisation and empty-cluster reseeding
+
+    Returns:
+        (n_clusters, d) float32 matrix of normalized centroids
+
+    Raises:
+        ValueError: If n_clusters is not in [1, number of rows]
+    """
+    n = matrix.shape[0]
+    if not 1 <= n_clusters <= n:
+        raise ValueError(f"n_clusters must be in [1, {n}], got {n_clusters}")
+
+    rng = np.random.default_rng(seed)
+    centroids = matrix[rng.choice(n, size=n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = _assign(matrix, centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=n_clusters)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        nonempty = counts > 0
+        sums = np.zeros_like(centroids)
+        sums[nonempty] = np.add.reduceat(matrix[order], starts[nonempty], axis=0)
+        # Reseed empty clusters from random rows so every list stays useful
+        empty = np.flatnonzero(~nonempty)
+        if empty.size:
+            sums[empty] = matrix[rng.choice(n, size=empty.size, replace=False)]
+        centroids = normalize_rows(sums.astype(np.float32))
+    return centroids
+
+
+def _encode_metadata(
+    metadata: Sequence[Dict[str, Any]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row metadata dicts -> (filenames, (N, 5) int64 rows), -1 if missing."""
+    filenames: List[str] = []
+    index: Dict[str, int] = {}
+    rows = np.full((len(metadata), 5), -1, dtype=np.int64)
+    for i, meta in enumerate(metadata):
+        name = meta.get("filename") or ""
+        if name not in index:
+            index[name] = len(filenames)
+            filenames.append(name)
+        rows[i, 0] = index[name]
+        for col, key in ((1, "chunk_id"), (2, "chars"), (3, "start"), (4, "end")):
+            if meta.get(key) is not None:
+                rows[i, col] = int(meta[key])
+    return np.array(filenames, dtype=str), rows
+
+
+class _MetadataView(Sequence):
+    """Read-only per-row metadata decoded on access from a saved index's arrays."""
+
+    def __init__(self, filenames: np.ndarray, rows: np.ndarray):
+        self._filenames = filenames
+        self._rows = rows
+
+    def __getitem__(self, row: Any) -> Any:  # type: ignore[override]
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        r = self._rows[row]
+        meta = {
+            "filename": str(self._filenames[int(r[0])]),
+            "chunk_id": int(r[1]),
+            "chars": max(0, int(r[2])),
+        }
+        if r[3] >= 0:
+            meta["start"] = int(r[3])
+            meta["end"] = int(r[4])
+        return meta
+
+    def __len__(self) -> int:
+        return self._rows.shape[0]
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate cosine index.
+
+    Rows are stored grouped by cluster: list i occupies
+    matrix[offsets[i]:offsets[i + 1]], and row_ids maps each stored row back to
+    its position in ids/metadata. ids and metadata may be lazy sequences (a
+    loaded index decodes them from memory-mapped arrays on access).
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        metadata: Sequence[Dict[str, Any]],
+        centroids: np.ndarray,
+        matrix: np.ndarray,
+        offsets: np.ndarray,
+        row_ids: np.ndarray,
+        nprobe: int = 8
+    ):
+        self.ids = ids
+        self.metadata = metadata
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(
+        cls,
+        base: LocalVectorIndex,
+        n_lists: Optional[int] = None,
+        nprobe: int = 8,
+        n_iter: int = 20,
+        train_size: Optional[int] = None,
+        seed: int = 0
+    ) -> "IVFIndex":
+        """
+        Build an IVF index from an exact LocalVectorIndex.
+
+        Args:
+            base: Exact index holding normalized vectors, ids and metadata
+            n_lists: Number of clusters (default: 4 * sqrt(N))
+            nprobe: Default number of lists scanned per query
+            n_iter: k-means iterations
+            train_size: Rows sampled to train k-means (default: 256 * n_lists)
+            seed: RNG seed
+        """
+        n = len(base)
+        if n_lists is None:
+            n_lists = int(4 * np.sqrt(n))
+        n_lists = max(1, min(n_lists, n))
+        if train_size is None:
+            train_size = 256 * n_lists
+        train_size = max(n_lists, min(train_size, n))
+
+        rng = np.random.default_rng(seed)
+        train = base.matrix
+        if train_size < n:
+            train = base.matrix[np.sort(rng.choice(n, size=train_size, replace=False))]
+        centroids = spherical_kmeans(train, n_lists, n_iter=n_iter, seed=seed)
+
+        labels = _assign(base.matrix, centroids)
+        row_ids = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=n_lists)
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return cls(
+            base.ids,
+            base.metadata,
+            centroids,
+            base.matrix[row_ids],
+            offsets,
+            row_ids,
+            nprobe=nprobe,
+        )
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        top_k: int = 5,
+        nprobe: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Approximate cosine top-k search.
+
+        Args:
+            query_vector: Query embedding (need not be normalized)
+            top_k: Number of results to return
+            nprobe: Lists to scan (defaults to self.nprobe); n_lists gives exact search
+
+        Returns:
+            List of dicts with keys: id, score, metadata (best first)
+
+        Raises:
+            ValueError: If top_k is not positive or dimensions do not match
+        """
+        if top_k <= 0:
+            raise ValueError(f"top_k must be positive, got {top_k}")
+        q = np.asarray(query_vector, dtype=np.float32).ravel()
+        if q.shape[0] != self.dim:
+            raise ValueError(
+                f"Query dimension {q.shape[0]} does not match "
+                f"index dimension {self.dim}"
+            )
+        qn = float(np.linalg.norm(q))
+        if qn == 0:
+            return []
+        q = q / qn
+
+        probe = top_k_indices(self.centroids @ q, nprobe or self.nprobe)
+        rows = []
+        scores = []
+        for lst in probe:
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            if start == end:
+                continue
+            # Contiguous slice: no copy of the stored vectors
+            scores.append(self.matrix[start:end] @ q)
+            rows.append(np.arange(start, end))
+        return self._results(scores, rows, top_k)
+
+    def search_batch(
+        self,
+        query_vectors: Any,
+        top_k: int = 5,
+        nprobe: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Approximate cosine top-k for several queries.
+
+        Centroids are scored with one matrix product, and every list probed by
+        any query is scanned once, against all the queries that probe it.
+
+        Args:
+            query_vectors: 2-D array-like, one query embedding per row
+            top_k: Number of results per query
+            nprobe: Lists to scan per query (defaults to self.nprobe)
+
+        Returns:
+            One result list per query, in input order (same shape as search())
+
+        Raises:
+            ValueError: If top_k is not positive or dimensions do not match
+        """
+        if top_k <= 0:
+            raise ValueError(f"top_k must be positive, got {top_k}")
+        queries = np.array(query_vectors, dtype=np.float32, ndmin=2)
+        if queries.shape[1] != self.dim:
+            raise ValueError(
+                f"Query dimension {queries.shape[1]} does not match "
+                f"index dimension {self.dim}"
+            )
+        zero = np.linalg.norm(queries, axis=1) == 0
+        queries = normalize_rows(queries)
+
+        # list -> queries probing it
+        by_list: Dict[int, List[int]] = {}
+        for qi, centroid_scores in enumerate(queries @ self.centroids.T):
+            if zero[qi]:
+                continue
+            for lst in top_k_indices(centroid_scores, nprobe or self.nprobe):
+                by_list.setdefault(int(lst), []).append(qi)
+
+        scores: List[List[np.ndarray]] = [[] for _ in range(len(queries))]
+        rows: List[List[np.ndarray]] = [[] for _ in range(len(queries))]
+        for lst, qids in by_list.items():
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            if start == end:
+                continue
+            block = self.matrix[start:end] @ queries[qids].T
+            span_rows = np.arange(start, end)
+            for j, qi in enumerate(qids):
+                scores[qi].append(block[:, j])
+                rows[qi].append(span_rows)
+        return [
+            self._results(scores[qi], rows[qi], top_k) for qi in range(len(queries))
+        ]
+
+    def _results(
+        self, scores: List[np.ndarray], rows: List[np.ndarray], top_k: int
+    ) -> List[Dict[str, Any]]:
+        """Top-k matches from per-list score and stored-row arrays."""
+        if not scores:
+            return []
+        all_scores = np.concatenate(scores)
+        all_rows = np.concatenate(rows)
+
+        out = []
+        for i in top_k_indices(all_scores, top_k):
+            pos = int(self.row_ids[all_rows[i]])
+            out.append(
+                {
+                    "id": str(self.ids[pos]),
+                    "score": float(all_scores[i]),
+                    "metadata": dict(self.metadata[pos]),
+                }
+            )
+        return out
+
+    def save(self, path: str) -> Path:
+        """
+        Persist the index to a directory of .npy files (see module docstring).
+
+        The directory is written next to path and swapped in, replacing an
+        existing index.
+        """
+        pth = Path(path)
+        pth.parent.mkdir(parents=True, exist_ok=True)
+        tmp = pth.with_name(f"{pth.name}.tmp-{os.getpid()}")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir()
+        filenames, rows = _encode_metadata(self.metadata)
+        arrays = {
+            "centroids": self.centroids,
+            "matrix": self.matrix,
+            "offsets": self.offsets,
+            "row_ids": self.row_ids,
+            "ids": np.array([str(cid) for cid in self.ids], dtype=str),
+            "filenames": filenames,
+            "rows": rows,
+        }
+        for name in _IVF_ARRAYS:
+            np.save(tmp / f"{name}.npy", arrays[name], allow_pickle=False)
+        with (tmp / _IVF_META).open("w", encoding="utf-8") as fh:
+            json.dump({"version": IVF_VERSION, "nprobe": self.nprobe}, fh)
+
+        old = pth.with_name(f"{pth.name}.old-{os.getpid()}")
+        if pth.exists():
+            os.replace(pth, old)
+        os.replace(tmp, pth)
+        if old.exists():
+            # Open readers keep their memory maps; the files go once they close
+            shutil.rmtree(old, ignore_errors=True)
+        return pth
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        """
+        Load an index written by save(); arrays are memory-mapped, not read.
+
+        A .npz file written by earlier versions is still accepted (read into memory).
+
+        Raises:
+            FileNotFoundError: If path does not exist
+            ValueError: If the index was written by an unsupported version
+        """
+        pth = Path(path)
+        if not pth.exists():
+            raise FileNotFoundError(f"IVF index not found: {pth}")
+        if pth.is_file():
+            return cls._load_npz(pth)
+        with (pth / _IVF_META).open("r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if meta.get("version") != IVF_VERSION:
+            raise ValueError(
+                f"Unsupported IVF index version {meta.get('version')} in {pth}"
+            )
+        arrays = {
+            name: np.load(pth / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+            for name in _IVF_ARRAYS
+        }
+        return cls(
+            arrays["ids"],
+            _MetadataView(arrays["filenames"], arrays["rows"]),
+            arrays["centroids"],
+            arrays["matrix"],
+            arrays["offsets"],
+            arrays["row_ids"],
+            nprobe=meta.get("nprobe", 8),
+        )
+
+    @classmethod
+    def _load_npz(cls, pth: Path) -> "IVFIndex":
+        with np.load(pth, allow_pickle=False) as data:
+            header = json.loads(str(data["header"]))
+            return cls(
+                header["ids"],
+                header["metadata"],
+                data["centroids"],
+                data["matrix"],
+                data["offsets"],
+                data["row_ids"],
+                nprobe=header.get("nprobe", 8),
+            )
+
+
+def recall_at_k(
+    approx: IVFIndex,
+    exact: LocalVectorIndex,
+    queries: np.ndarray,
+    k: int = 10,
+    nprobe: Optional[int] = None
+) -> float:
+    """
+    Mean recall@k of approx search against exact search over a set of query vectors.
+
+    Returns:
+        Fraction of exact top-k ids also returned by the approximate search
+    """
+    if len(queries) == 0:
+        return 0.0
+    hits = 0
+    total = 0
+    exact_results = exact.search_batch(queries, top_k=k)
+    approx_results = approx.search_batch(queries, top_k=k, nprobe=nprobe)
+    for exact_matches, approx_matches in zip(exact_results, approx_results):
+        truth = {m["id"] for m in exact_matches}
+        hits += len(truth & {m["id"] for m in approx_matches})
+        total += len(truth)
+    return hits / total if total else 0.0
+
+
+def print_recall_report(
+    approx: IVFIndex,
+    exact: LocalVectorIndex,
+    k: int = 10,
+    n_queries: int = 100,
+    seed: int = 0
+) -> None:
+    """Print recall@k for a range of nprobe values, using stored vectors as queries."""
+    rng = np.random.default_rng(seed)
+    n = len(exact)
+    queries = exact.matrix[rng.choice(n, size=min(n_queries, n), replace=False)]
+    print(f"IVF index: {len(approx)} vectors, dim {approx.dim}, {approx.n_lists} lists")
+    print(f"{'NPROBE':>8} {'RECALL@' + str(k):>10}")
+    print("-" * 20)
+    nprobe = 1
+    while nprobe < approx.n_lists:
+        print(
+            f"{nprobe:8d} "
+            f"{recall_at_k(approx, exact, queries, k=k, nprobe=nprobe):10.4f}"
+        )
+        nprobe *= 2
+    print(
+        f"{approx.n_lists:8d} "
+        f"{recall_at_k(approx, exact, queries, k=k, nprobe=approx.n_lists):10.4f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build an IVF index from a chunks JSONL file and report recall@k."
+    )
+    parser.add_argument("chunks", help="Embedding store directory or chunks JSONL file")
+    parser.add_argument("out", help="Output index directory")
+    parser.add_argument(
+        "--n-lists",
+        type=int,
+        default=None,
+        help="Number of clusters (default 4*sqrt(N))",
+    )
+    parser.add_argument(
+        "--nprobe", type=int, default=8, help="Default lists scanned per query"
+    )
+    parser.add_argument("--n-iter", type=int, default=20, help="k-means iterations")
+    parser.add_argument("--k", type=int, default=10, help="k for the recall report")
+    args = parser.parse_args()
+
+    base = LocalVectorIndex.from_path(args.chunks)
+    ivf = IVFIndex.build(
+        base, n_lists=args.n_lists, nprobe=args.nprobe, n_iter=args.n_iter
+    )
+    print("Wrote IVF index:", ivf.save(args.out))
+    print_recall_report(ivf, base, k=args.k)
@@ -0,0 +1,388 @@
+"""
+Pluggable retrieval backends.
+
+Every backend exposes search(query_text, top_k) and returns the same
+list of {id, score, metadata} dicts as query_pinecone, so the orchestrator
+does not care where vectors live. search_batch(query_texts, top_k) embeds all
+queries in one batch and retrieves them together.
+
+Backends:
+- "pinecone": Remote Pinecone index (default)
+- "local": In-process NumPy index loaded from an embedding store or chunks
+  JSONL, searched
+  exactly or through an IVF approximate index (LOCAL_INDEX_TYPE=ivf)
+
+Select with RETRIEVAL_BACKEND in config/env, or call get_backend(name).
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional
+
+from src.retrieval.retriever import (
+    DEFAULT_SEMANTIC_MODEL,
+    DIM_DETERMINISTIC,
+    QUERY_EMBEDDING_CACHE,
+    deterministic_embedding,
+    get_pinecone_index,
+    query_pinecone,
+    semantic_embedding,
+    semantic_embeddings,
+)
+from src.tracing import span
+
+# Concurrent requests issued by search_batch on remote backends
+SEARCH_BATCH_CONCURRENCY = int(os.environ.get("SEARCH_BATCH_CONCURRENCY", "8"))
+
+# How long PineconeBackend.fingerprint reuses an index stats lookup
+PINECONE_FINGERPRINT_TTL_S = float(os.environ.get("PINECONE_FINGERPRINT_TTL_S", "30"))
+
+
+class RetrievalBackend:
+    """Base interface for retrieval backends."""
+
+    name = "base"
+
+    def search(self, query_text: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Return the top_k chunks for query_text.
+
+        Returns:
+            List of dicts with keys: id, score, metadata
+        """
+        raise NotImplementedError
+
+    def embed_query(self, query_text: str) -> List[float]:
+        """Query embedding used by search (cached in QUERY_EMBEDDING_CACHE)."""
+        return QUERY_EMBEDDING_CACHE.get_or_compute(
+            ("semantic", DEFAULT_SEMANTIC_MODEL), query_text,
+            lambda t: semantic_embedding(t, model_name=DEFAULT_SEMANTIC_MODEL)
+        )
+
+    def embed_queries(self, query_texts: List[str]) -> List[List[float]]:
+        """Batch embed_query: cache misses are encoded in one batch."""
+        return QUERY_EMBEDDING_CACHE.get_or_compute_many(
+            ("semantic", DEFAULT_SEMANTIC_MODEL), query_texts,
+            lambda ts: semantic_embeddings(ts, model_name=DEFAULT_SEMANTIC_MODEL)
+        )
+
+    def search_batch(
+        self, query_texts: List[str], top_k: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search several queries at once; results are in input order.
+
+        The default embeds all queries in one batch (warming the query
+        embedding cache), then runs search() for each query on a thread pool.
+        """
+        if not query_texts:
+            return []
+        self.embed_queries(query_texts)
+        workers = max(1, min(SEARCH_BATCH_CONCURRENCY, len(query_texts)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda q: self.search(q, top_k=top_k), query_texts))
+
+    def fingerprint(self) -> str:
+        """
+        Cheap identifier of the indexed data; changes when ingestion rewrites it.
+        Used to invalidate answer caches.
+        """
+        return self.name
+
+
+def _mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+class PineconeBackend(RetrievalBackend):
+    """Remote Pinecone index via query_pinecone."""
+
+    name = "pinecone"
+
+    def __init__(
+        self,
+        index_name: Optional[str] = None,
+        use_semantic: bool = True,
+        model_name: str = DEFAULT_SEMANTIC_MODEL
+    ):
+        self.index_name = index_name
+        self.use_semantic = use_semantic
+        self.model_name = model_name
+        self._fingerprint: Optional[str] = None
+        self._fingerprint_at = 0.0
+        self._fingerprint_lock = threading.Lock()
+
+    def search(self, query_text: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        return query_pinecone(
+            query_text,
+            top_k=top_k,
+            index_name=self.index_name,
+            use_semantic=self.use_semantic,
+            model_name=self.model_name,
+        )
+
+    def embed_query(self, query_text: str) -> List[float]:
+        # Same namespaces as query_pinecone, so this is a cache hit after a search
+        if self.use_semantic:
+            return QUERY_EMBEDDING_CACHE.get_or_compute(
+                ("semantic", self.model_name), query_text,
+                lambda t: semantic_embedding(t, model_name=self.model_name)
+            )
+        return QUERY_EMBEDDING_CACHE.get_or_compute(
+            ("deterministic", DIM_DETERMINISTIC), query_text, deterministic_embedding
+        )
+
+    def embed_queries(self, query_texts: List[str]) -> List[List[float]]:
+        if self.use_semantic:
+            return QUERY_EMBEDDING_CACHE.get_or_compute_many(
+                ("semantic", self.model_name), query_texts,
+                lambda ts: semantic_embeddings(ts, model_name=self.model_name)
+            )
+        return [self.embed_query(q) for q in query_texts]
+
+    def fingerprint(self) -> str:
+        """
+        Versions the remote index by its vector count (describe_index_stats),
+        looked up at most every PINECONE_FINGERPRINT_TTL_S seconds, so upserts
+        from any host invalidate cached answers. An upsert that only overwrites
+        existing ids keeps the count; such answers expire with ANSWER_CACHE_TTL_S.
+        """
+        if (
+            self._fingerprint
+            and time.monotonic() - self._fingerprint_at < PINECONE_FINGERPRINT_TTL_S
+        ):
+            return self._fingerprint
+        with self._fingerprint_lock:
+            if (
+                self._fingerprint
+                and time.monotonic() - self._fingerprint_at < PINECONE_FINGERPRINT_TTL_S
+            ):
+                return self._fingerprint
+            import src.config as cfg
+            index_name = self.index_name or getattr(cfg, "PINECONE_INDEX_NAME", "")
+            count = self._vector_count(index_name)
+            if count is not None or self._fingerprint is None:
+                self._fingerprint = f"pinecone:{index_name}:{count}"
+            # On a failed lookup keep the last known version until the TTL passes again
+            self._fingerprint_at = time.monotonic()
+            return self._fingerprint
+
+    @staticmethod
+    def _vector_count(index_name: str) -> Optional[int]:
+        api_key = os.environ.get("PINECONE_API_KEY")
+        if not index_name or not api_key:
+            return None
+        try:
+            stats = get_pinecone_index(index_name, api_key).describe_index_stats()
+        except Exception:
+            return None
+        count = getattr(stats, "total_vector_count", None)
+        if count is None and isinstance(stats, dict):
+            count = stats.get("total_vector_count")
+        return int(count) if count is not None else None
+
+
+class LocalBackend(RetrievalBackend):
+    """
+    In-process cosine search over an ingested embedding store or chunks file.
+
+    The file is loaded lazily on the first search and reloaded when its mtime
+    changes (re-ingestion), so results always match fingerprint(). Query
+    embeddings must come from the same provider that produced the file:
+    "sentence-transformers" for chunks_semantic.jsonl, "local" (hash-based) for
+    the default chunks.jsonl.
+
+    With index_type="ivf" an IVF index is built next to the chunks file
+    (<path>.ivf) on first use and memory-mapped while it is newer than the file.
+
+    Args:
+        path: Embedding store directory or chunks JSONL path
+            (defaults to LOCAL_INDEX_PATH)
+        provider: Query embedding provider (defaults to LOCAL_EMBEDDING_PROVIDER)
+        model_name: sentence-transformers model name
+        index_type: "exact" or "ivf" (defaults to LOCAL_INDEX_TYPE)
+        nprobe: IVF lists scanned per query (defaults to LOCAL_IVF_NPROBE)
+        n_lists: IVF cluster count when building (defaults to LOCAL_IVF_N_LISTS,
+            else 4*sqrt(N))
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        provider: Optional[str] = None,
+        model_name: str = DEFAULT_SEMANTIC_MODEL,
+        index_type: Optional[str] = None,
+        nprobe: Optional[int] = None,
+        n_lists: Optional[int] = None
+    ):
+        import src.config as cfg
+        self.path = path or getattr(
+            cfg, "LOCAL_INDEX_PATH", "data/chunks_semantic.store"
+        )
+        self.provider = (
+            provider
+            or getattr(cfg, "LOCAL_EMBEDDING_PROVIDER", "sentence-transformers")
+        ).lower()
+        self.model_name = model_name
+        self.index_type = (
+            index_type or getattr(cfg, "LOCAL_INDEX_TYPE", "exact")
+        ).lower()
+        self.nprobe = nprobe or getattr(cfg, "LOCAL_IVF_NPROBE", 8)
+        self.n_lists = n_lists or getattr(cfg, "LOCAL_IVF_N_LISTS", None)
+        if self.index_type not in ("exact", "ivf"):
+            raise ValueError(f"Unknown local index type: {self.index_type}")
+        self._index = None
+        self._index_mtime = 0
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> Any:
+        """
+        The loaded LocalVectorIndex or IVFIndex (loaded on first access, reloaded
+        when path changes).
+        """
+        mtime = _mtime_ns(self.path)
+        if self._index is None or mtime != self._index_mtime:
+            with self._lock:
+                if self._index is None or mtime != self._index_mtime:
+                    # mtime is read before loading, so a rewrite during the
+                    # load is picked up by the next access
+                    self._index = self._load_index()
+                    self._index_mtime = mtime
+        return self._index
+
+    def _load_index(self) -> Any:
+        from src.retrieval.local_index import LocalVectorIndex
+        if self.index_type == "exact":
+            return LocalVectorIndex.from_path(self.path)
+
+        from src.retrieval.ann import IVFIndex
+        ivf_path = f"{self.path}.ivf"
+        if os.path.exists(ivf_path) and os.path.getmtime(ivf_path) >= os.path.getmtime(
+            self.path
+        ):
+            ivf = IVFIndex.load(ivf_path)
+            ivf.nprobe = self.nprobe
+            return ivf
+        ivf = IVFIndex.build(
+            LocalVectorIndex.from_path(self.path),
+            n_lists=self.n_lists,
+            nprobe=self.nprobe,
+        )
+        try:
+            ivf.save(ivf_path)
+        except OSError:
+            # Read-only data dir: keep the in-memory index, rebuild next process
+            pass
+        return ivf
+
+    def embed_query(self, query_text: str) -> List[float]:
+        """
+        Embed a query with the provider that produced the index (cached in
+        QUERY_EMBEDDING_CACHE).
+        """
+        if self.provider == "sentence-transformers":
+            return QUERY_EMBEDDING_CACHE.get_or_compute(
+                ("semantic", self.model_name), query_text,
+                lambda t: semantic_embedding(t, model_name=self.model_name)
+            )
+        from src.ingestion.embeddings import get_embedding
+        dim = self.index.dim
+        return QUERY_EMBEDDING_CACHE.get_or_compute(
+            (self.provider, dim), query_text,
+            lambda t: get_embedding(t, provider=self.provider, dim=dim)
+        )
+
+    def embed_queries(self, query_texts: List[str]) -> List[List[float]]:
+        if self.provider == "sentence-transformers":
+            return QUERY_EMBEDDING_CACHE.get_or_compute_many(
+                ("semantic", self.model_name), query_texts,
+                lambda ts: semantic_embeddings(ts, model_name=self.model_name)
+            )
+        return [self.embed_query(q) for q in query_texts]
+
+    def search(self, query_text: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        if not query_text:
+            raise ValueError("query_text cannot be empty")
+        if top_k <= 0:
+            raise ValueError(f"top_k must be positive, got {top_k}")
+        with span("embed_query"):
+            vector = self.embed_query(query_text)
+        index = self.index
+        with span("local.search", index_type=self.index_type):
+            return index.search(vector, top_k=top_k)
+
+    def search_batch(
+        self, query_texts: List[str], top_k: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        All queries embedded together and scored in one batch (one matrix product
+        on the exact index).
+        """
+        if not query_texts:
+            return []
+        if not all(query_texts):
+            raise ValueError("query_text cannot be empty")
+        if top_k <= 0:
+            raise ValueError(f"top_k must be positive, got {top_k}")
+        vectors = self.embed_queries(query_texts)
+        index = self.index
+        with span("local.search_batch", index_type=self.index_type):
+            return index.search_batch(vectors, top_k=top_k)
+
+    def fingerprint(self) -> str:
+        return (
+            f"local:{self.path}:{_mtime_ns(self.path)}:{self.index_type}:{self.nprobe}"
+        )
+
+
+# name -> factory returning a RetrievalBackend
+_BACKENDS: Dict[str, Callable[..., RetrievalBackend]] = {
+    PineconeBackend.name: PineconeBackend,
+    LocalBackend.name: LocalBackend,
+}
+_BACKEND_CACHE: Dict[str, RetrievalBackend] = {}
+_BACKEND_LOCK = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[..., RetrievalBackend]) -> None:
+    """Register a backend factory under name (case-insensitive)."""
+    with _BACKEND_LOCK:
+        _BACKENDS[name.lower()] = factory
+        _BACKEND_CACHE.pop(name.lower(), None)
+
+
+def get_backend(name: Optional[str] = None) -> RetrievalBackend:
+    """
+    Return the shared backend instance for name.
+
+    Args:
+        name: Backend name; defaults to RETRIEVAL_BACKEND from config ("pinecone")
+
+    Raises:
+        ValueError: If name is not a registered backend
+    """
+    if name is None:
+        import src.config as cfg
+        name = getattr(cfg, "RETRIEVAL_BACKEND", "pinecone")
+    name = name.lower()
+
+    backend = _BACKEND_CACHE.get(name)
+    if backend is not None:
+        return backend
+
+    with _BACKEND_LOCK:
+        if name not in _BACKENDS:
+            raise ValueError(
+                f"Unknown retrieval backend: {name}. Available: {sorted(_BACKENDS)}"
+            )
+        if name not in _BACKEND_CACHE:
+            _BACKEND_CACHE[name] = _BACKENDS[name]()
+        return _BACKEND_CACHE[name]
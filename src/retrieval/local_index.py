@@ -0,0 +1,246 @@
+"""
+In-process vector index over ingested chunk files.
+
+Loads the chunks.jsonl / chunks_semantic.jsonl files written by
+scripts/ingest_documents.py and scripts/regenerate_with_semantic.py into a
+contiguous float32 matrix of L2-normalized rows, so an exact cosine top-k is one
+matrix-vector product plus argpartition.
+
+Functions:
+- normalize_rows(mat): L2-normalize rows of a matrix (zero rows stay zero)
+- top_k_indices(scores, k): Indices of the k highest scores, best first
+- LocalVectorIndex.from_jsonl(path): Build an index from a chunks JSONL file
+- LocalVectorIndex.from_store(path): Open a binary embedding store
+  (memory-mapped, no copy)
+- LocalVectorIndex.from_path(path): Either of the above, by what is on disk
+- LocalVectorIndex.search_batch(queries, top_k): Top-k for many queries in one
+  matrix multiply
+"""
+
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Sequence
+
+import numpy as np
+
+from src.ingestion.embedding_store import EmbeddingStore, is_store
+
+
+def normalize_rows(mat: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize each row of a 2-D float32 matrix in place and return it.
+
+    Rows with zero norm are left as zeros so they score 0.0 against any query.
+    """
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    mat /= norms
+    return mat
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return indices of the k highest scores, sorted best first.
+
+    Uses argpartition so the cost is O(N + k log k) instead of a full sort.
+    """
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class LocalVectorIndex:
+    """
+    Exact cosine-similarity index held in process memory.
+
+    Args:
+        ids: Chunk ids, one per row
+        vectors: 2-D array-like of embeddings, one row per id
+        metadata: Per-row metadata dicts returned with each match
+        normalized: Rows are already L2-normalized float32; use vectors as-is
+            (e.g. a read-only memmap) instead of copying and normalizing
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        vectors: Any,
+        metadata: Sequence[Dict[str, Any]],
+        normalized: bool = False
+    ):
+        if normalized:
+            matrix = vectors
+        else:
+            matrix = np.array(vectors, dtype=np.float32, order="C")
+        if matrix.ndim != 2:
+            raise ValueError(f"vectors must be a 2-D matrix, got shape {matrix.shape}")
+        if not (len(ids) == len(metadata) == matrix.shape[0]):
+            raise ValueError(
+                f"Row count mismatch: {len(ids)} ids, {len(metadata)} metadata, "
+                f"{matrix.shape[0]} vectors"
+            )
+        self.ids = ids
+        self.metadata = metadata
+        self.matrix = matrix if normalized else normalize_rows(matrix)
+
+    @classmethod
+    def from_store(cls, path: str) -> "LocalVectorIndex":
+        """
+        Open a binary embedding store. The matrix stays memory-mapped (already
+        normalized on write), so loading is near-instant and shared between processes.
+        """
+        store = EmbeddingStore(path)
+        return cls(store.ids, store.matrix, store.metadata_view(), normalized=True)
+
+    @classmethod
+    def from_path(cls, path: str) -> "LocalVectorIndex":
+        """Open path as an embedding store directory if it is one, else as JSONL."""
+        if is_store(path):
+            return cls.from_store(path)
+        return cls.from_jsonl(path)
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "LocalVectorIndex":
+        """
+        Build an index from a chunks JSONL file.
+
+        Lines without an embedding are skipped; ids default to
+        "<filename>::<chunk_id>" when the "id" field is missing.
+
+        Raises:
+            FileNotFoundError: If path does not exist
+            ValueError: If the file has no embeddings or dimensions disagree
+        """
+        pth = Path(path)
+        if not pth.exists():
+            raise FileNotFoundError(f"Chunks file not found: {pth}")
+
+        ids: List[str] = []
+        metadata: List[Dict[str, Any]] = []
+        rows: List[List[float]] = []
+        with pth.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                emb = obj.get("embedding")
+                if not emb:
+                    continue
+                cid = obj.get("id") or f"{obj.get('filename')}::{obj.get('chunk_id')}"
+                ids.append(str(cid))
+                meta = {
+                    "filename": obj.get("filename"),
+                    "chunk_id": obj.get("chunk_id"),
+                    "chars": obj.get("chars", 0),
+                }
+                if obj.get("start") is not None:
+                    meta["start"] = obj["start"]
+                    meta["end"] = obj.get("end")
+                metadata.append(meta)
+                rows.append(emb)
+
+        if not rows:
+            raise ValueError(f"No embeddings found in {pth}")
+        dims = {len(r) for r in rows}
+        if len(dims) != 1:
+            raise ValueError(
+                f"Inconsistent embedding dimensions in {pth}: {sorted(dims)}"
+            )
+        return cls(ids, np.asarray(rows, dtype=np.float32), metadata)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def search(
+        self, query_vector: Sequence[float], top_k: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Exact cosine top-k search.
+
+        Args:
+            query_vector: Query embedding (need not be normalized)
+            top_k: Number of results to return
+
+        Returns:
+            List of dicts with keys: id, score, metadata (best first)
+
+        Raises:
+            ValueError: If top_k is not positive or dimensions do not match
+        """
+        if top_k <= 0:
+            raise ValueError(f"top_k must be positive, got {top_k}")
+        q = np.asarray(query_vector, dtype=np.float32).ravel()
+        if q.shape[0] != self.dim:
+            raise ValueError(
+                f"Query dimension {q.shape[0]} does not match "
+                f"index dimension {self.dim}"
+            )
+        qn = float(np.linalg.norm(q))
+        if qn == 0:
+            return []
+        scores = self.matrix @ (q / qn)
+        return [
+            {
+                "id": self.ids[i],
+                "score": float(scores[i]),
+                "metadata": dict(self.metadata[i]),
+            }
+            for i in top_k_indices(scores, top_k)
+        ]
+
+    def search_batch(
+        self, query_vectors: Any, top_k: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Exact cosine top-k for several queries with a single matrix-matrix product.
+
+        Args:
+            query_vectors: 2-D array-like, one query embedding per row
+            top_k: Number of results per query
+
+        Returns:
+            One result list per query, in input order (same shape as search())
+
+        Raises:
+            ValueError: If top_k is not positive or dimensions do not match
+        """
+        if top_k <= 0:
+            raise ValueError(f"top_k must be positive, got {top_k}")
+        queries = np.array(query_vectors, dtype=np.float32, ndmin=2)
+        if queries.shape[1] != self.dim:
+            raise ValueError(
+                f"Query dimension {queries.shape[1]} does not match "
+                f"index dimension {self.dim}"
+            )
+        zero = np.linalg.norm(queries, axis=1) == 0
+        scores = normalize_rows(queries) @ self.matrix.T
+        out = []
+        for row, row_scores in enumerate(scores):
+            if zero[row]:
+                out.append([])
+                continue
+            out.append(
+                [
+                    {
+                        "id": self.ids[i],
+                        "score": float(row_scores[i]),
+                        "metadata": dict(self.metadata[i]),
+                    }
+                    for i in top_k_indices(row_scores, top_k)
+                ]
+            )
+        return out
@@ -4,14 +4,24 @@ Core retrieval module for Pinecone vector search.
 Functions:
 - deterministic_embedding(text, dim): Generate deterministic pseudo-embeddings
 - semantic_embedding(text, model_name): Generate semantic embeddings using sentence-transformers
+- semantic_embeddings(texts, model_name): Batch semantic embeddings (one encode call)
 - query_pinecone(query_text, top_k, index_name, use_semantic): Query Pinecone index
+- get_pinecone_index(index_name, api_key): Pooled, host-cached Pinecone index handle
+- clear_index_cache(): Drop all pooled index handles
+- QUERY_EMBEDDING_CACHE: Shared LRU of query text -> embedding (see QueryEmbeddingCache)
 """
 
 import os
+import time
 import hashlib
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Hashable, Optional, Tuple
 from pinecone import Pinecone
 
+from src.tracing import span
+from src.metrics import CACHE_LOOKUPS, REGISTRY
+
 
 # Default dimensions
 DIM_DETERMINISTIC = 1024
@@ -21,14 +31,23 @@ DIM_SEMANTIC = 384  # for all-MiniLM-L6-v2
 DEFAULT_SEMANTIC_MODEL = "all-MiniLM-L6-v2"
 
 # Lazy-load sentence-transformers
-_MODEL_CACHE = {}
+_MODEL_CACHE: Dict[str, Any] = {}
+
+_MODEL_LOAD = REGISTRY.gauge(
+    "embedding_model_load_seconds", "Time taken to load an embedding model", ("model",)
+)
+_PINECONE_LATENCY = REGISTRY.histogram(
+    "pinecone_query_duration_seconds", "Latency of Pinecone index queries"
+)
 
-def _get_sentence_transformer_model(model_name: str = "all-MiniLM-L6-v2"):
+def _get_sentence_transformer_model(model_name: str = "all-MiniLM-L6-v2") -> Any:
     """Lazy load and cache sentence transformer model."""
     if model_name not in _MODEL_CACHE:
         try:
             from sentence_transformers import SentenceTransformer
+            start = time.perf_counter()
             _MODEL_CACHE[model_name] = SentenceTransformer(model_name)
+            _MODEL_LOAD.set(time.perf_counter() - start, model=model_name)
         except ImportError:
             raise ImportError(
                 "sentence-transformers not installed. "
@@ -57,6 +76,28 @@ def semantic_embedding(text: str, model_name: str = DEFAULT_SEMANTIC_MODEL) -> L
     return embedding.tolist()
 
 
+def semantic_embeddings(
+    texts: List[str], model_name: str = DEFAULT_SEMANTIC_MODEL, batch_size: int = 64
+) -> List[List[float]]:
+    """
+    Batch version of semantic_embedding: one model.encode call for all texts.
+
+    Args:
+        texts: Input texts to embed
+        model_name: Name of sentence-transformers model (default: all-MiniLM-L6-v2)
+        batch_size: Encoder batch size
+
+    Returns:
+        List of embedding vectors, in input order
+    """
+    if not texts:
+        return []
+    model = _get_sentence_transformer_model(model_name)
+    return model.encode(
+        list(texts), batch_size=batch_size, convert_to_numpy=True
+    ).tolist()
+
+
 def deterministic_embedding(text: str, dim: int = DIM_DETERMINISTIC) -> List[float]:
     """
     Generate deterministic pseudo-embedding from text using SHA-256 hashing.
@@ -92,6 +133,281 @@ def deterministic_embedding(text: str, dim: int = DIM_DETERMINISTIC) -> List[flo
     return vec[:dim]
 
 
+# -------------------------
+# Query embedding cache
+# -------------------------
+
+def normalize_query(text: str) -> str:
+    """Canonical form of a query for caching: outer and repeated whitespace removed."""
+    return " ".join(text.split())
+
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU of (namespace, normalized query text) -> embedding vector.
+
+    The namespace identifies the embedder (e.g. ("semantic", model_name)), so
+    vectors from different models never mix.
+
+    Args:
+        maxsize: Maximum number of cached vectors (0 disables caching)
+        ttl_s: Optional time-to-live in seconds for each entry
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_s: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._data: (
+            "OrderedDict[Tuple[Hashable, str], Tuple[float, Tuple[float, ...]]]"
+        ) = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(
+        self,
+        namespace: Hashable,
+        text: str,
+        compute: Callable[[str], List[float]]
+    ) -> List[float]:
+        """
+        Return the cached vector for text, computing (outside the lock) and storing
+        it on a miss.
+        """
+        text = normalize_query(text)
+        key = (namespace, text)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (
+                self.ttl_s is None or now - entry[0] < self.ttl_s
+            ):
+                self._data.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.inc(cache="query_embedding", result="hit")
+                return list(entry[1])
+            self.misses += 1
+        CACHE_LOOKUPS.inc(cache="query_embedding", result="miss")
+
+        vec = compute(text)
+        if self.maxsize > 0:
+            with self._lock:
+                self._data[key] = (now, tuple(vec))
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return list(vec)
+
+    def get_or_compute_many(
+        self,
+        namespace: Hashable,
+        texts: List[str],
+        compute_many: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        """
+        Batch version of get_or_compute: all misses are computed with a single
+        compute_many call (e.g. one model.encode batch). Results keep input order.
+        """
+        keys = [(namespace, normalize_query(t)) for t in texts]
+        now = time.monotonic()
+        out: List[Optional[List[float]]] = [None] * len(keys)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._data.get(key)
+                if entry is not None and (
+                    self.ttl_s is None or now - entry[0] < self.ttl_s
+                ):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    out[i] = list(entry[1])
+                else:
+                    self.misses += 1
+                    missing.setdefault(key[1], []).append(i)
+        n_missed = sum(len(v) for v in missing.values())
+        if n_missed < len(keys):
+            CACHE_LOOKUPS.inc(
+                len(keys) - n_missed, cache="query_embedding", result="hit"
+            )
+        if n_missed:
+            CACHE_LOOKUPS.inc(n_missed, cache="query_embedding", result="miss")
+
+        if missing:
+            todo = list(missing)
+            vecs = compute_many(todo)
+            for text, vec in zip(todo, vecs):
+                for i in missing[text]:
+                    out[i] = list(vec)
+            if self.maxsize > 0:
+                with self._lock:
+                    for text, vec in zip(todo, vecs):
+                        key = (namespace, text)
+                        self._data[key] = (now, tuple(vec))
+                        self._data.move_to_end(key)
+                    while len(self._data) > self.maxsize:
+                        self._data.popitem(last=False)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared by query_pinecone and the other retrieval backends
+QUERY_EMBEDDING_CACHE = QueryEmbeddingCache(
+    maxsize=int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", "1024")),
+    ttl_s=float(os.environ.get("QUERY_EMBEDDING_CACHE_TTL_S", "0")) or None,
+)
+
+
+# -------------------------
+# Pooled Pinecone index handles
+# -------------------------
+
+# How long a resolved index host is trusted before describe_index is called again
+INDEX_HOST_TTL_S = float(os.environ.get("PINECONE_HOST_TTL_S", "3600"))
+
+# (api_key, index_name) -> {"client", "host", "index", "resolved_at"}
+_INDEX_CACHE: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_INDEX_LOCKS: Dict[Tuple[str, str], threading.Lock] = {}
+_INDEX_CACHE_LOCK = threading.Lock()
+
+
+def _new_pinecone_client(api_key: str) -> Pinecone:
+    """
+    Create a Pinecone client. PINECONE_CONTROLLER_HOST points the control plane
+    at a different endpoint (e.g. a local stub server for testing).
+    """
+    controller_host = os.environ.get("PINECONE_CONTROLLER_HOST")
+    if controller_host:
+        return Pinecone(api_key=api_key, host=controller_host)
+    return Pinecone(api_key=api_key)
+
+
+def _resolve_index_host(pc: Pinecone, index_name: str) -> str:
+    """
+    Look up the data-plane host of an index via describe_index.
+
+    Raises:
+        RuntimeError: If the index cannot be described or has no host
+    """
+    try:
+        idx_meta = pc.describe_index(index_name)
+    except Exception as e:
+        raise RuntimeError(f"Failed to describe index '{index_name}': {str(e)}")
+
+    # Handle different response formats from Pinecone SDK
+    host = None
+    if hasattr(idx_meta, "host"):
+        host = idx_meta.host
+    elif isinstance(idx_meta, dict) and "host" in idx_meta:
+        host = idx_meta["host"]
+    else:
+        # Try to get host from nested structures
+        host = idx_meta.get("host") if isinstance(idx_meta, dict) else None
+
+    if not host:
+        raise RuntimeError(f"Cannot determine host for index: {index_name}. Response: {idx_meta}")
+    return host
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    """True if exc looks like a network/connection failure rather than an API error."""
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        from urllib3.exceptions import HTTPError as _Urllib3HTTPError
+    except ImportError:  # pragma: no cover - urllib3 ships with pinecone
+        return False
+    return isinstance(exc, _Urllib3HTTPError)
+
+
+def get_pinecone_index(index_name: str, api_key: str, stale_index: Any = None) -> Any:
+    """
+    Return a pooled Pinecone index handle for (api_key, index_name).
+
+    The client and index handle are created once per process and reused, so the
+    underlying HTTP connection pool stays warm. The index host is resolved with
+    describe_index on first use and re-resolved after INDEX_HOST_TTL_S seconds.
+    Safe to call from multiple threads.
+
+    Args:
+        index_name: Pinecone index name
+        api_key: Pinecone API key
+        stale_index: A handle that just failed with a connection error; if it is
+            still the cached one, the host is re-resolved and a new handle opened
+
+    Returns:
+        Pinecone Index object
+
+    Raises:
+        RuntimeError: If the host cannot be resolved or the index cannot be opened
+    """
+    key = (api_key, index_name)
+
+    def _fresh(e: Optional[Dict[str, Any]]) -> bool:
+        return bool(e) and e["index"] is not stale_index and \
+            time.monotonic() - e["resolved_at"] < INDEX_HOST_TTL_S
+
+    entry = _INDEX_CACHE.get(key)
+    if _fresh(entry):
+        return entry["index"]
+
+    with _INDEX_CACHE_LOCK:
+        key_lock = _INDEX_LOCKS.setdefault(key, threading.Lock())
+
+    with key_lock:
+        # Another thread may have resolved the entry while we waited
+        entry = _INDEX_CACHE.get(key)
+        if _fresh(entry):
+            return entry["index"]
+
+        pc = entry["client"] if entry else _new_pinecone_client(api_key)
+        host = _resolve_index_host(pc, index_name)
+
+        # Keep the existing handle (and its warm connection pool) when only the
+        # TTL expired and the host is unchanged.
+        if entry and entry["host"] == host and entry["index"] is not stale_index:
+            index = entry["index"]
+        else:
+            try:
+                index = pc.Index(host=host)
+            except Exception as e:
+                raise RuntimeError(
+                    f"Failed to connect to Pinecone index at {host}: {str(e)}"
+                )
+
+        _INDEX_CACHE[key] = {
+            "client": pc,
+            "host": host,
+            "index": index,
+            "resolved_at": time.monotonic(),
+        }
+        return index
+
+
+def clear_index_cache() -> None:
+    """Drop all pooled Pinecone clients and index handles."""
+    with _INDEX_CACHE_LOCK:
+        _INDEX_CACHE.clear()
+        _INDEX_LOCKS.clear()
+
+
 def query_pinecone(
     query_text: str,
     top_k: int = 5,
@@ -122,7 +438,7 @@ def query_pinecone(
         raise ValueError("query_text cannot be empty")
     if top_k <= 0:
         raise ValueError(f"top_k must be positive, got {top_k}")
-        
+
     # Get index name from config if not provided
     if index_name is None:
         import src.config as cfg
@@ -132,80 +448,74 @@ def query_pinecone(
                 "index_name not provided and PINECONE_INDEX_NAME not set in config"
             )
 
-    # Initialize Pinecone client
     api_key = os.environ.get("PINECONE_API_KEY")
     if not api_key:
         raise RuntimeError("PINECONE_API_KEY environment variable not set")
 
-    pc = Pinecone(api_key=api_key)
+    with span("pinecone.index"):
+        index = get_pinecone_index(index_name, api_key)
 
-    # Get index host
-    try:
-        idx_meta = pc.describe_index(index_name)
-    except Exception as e:
-        raise RuntimeError(f"Failed to describe index '{index_name}': {str(e)}")
-        
-    # Handle different response formats from Pinecone SDK
-    host = None
-    if hasattr(idx_meta, "host"):
-        host = idx_meta.host
-    elif isinstance(idx_meta, dict) and "host" in idx_meta:
-        host = idx_meta["host"]
-    else:
-        # Try to get host from nested structures
-        host = idx_meta.get("host") if isinstance(idx_meta, dict) else None
-        
-    if not host:
-        raise RuntimeError(f"Cannot determine host for index: {index_name}. Response: {idx_meta}")
-
-    # Connect to index
-    try:
-        index = pc.Index(host=host)
-    except Exception as e:
-        raise RuntimeError(f"Failed to connect to Pinecone index at {host}: {str(e)}")
-
-    # Generate query embedding
-    if use_semantic:
-        q_emb = semantic_embedding(query_text, model_name=model_name)
-    else:
-        q_emb = deterministic_embedding(query_text)
+    # Generate query embedding (repeated queries hit the shared LRU)
+    with span("embed_query", semantic=use_semantic):
+        if use_semantic:
+            q_emb = QUERY_EMBEDDING_CACHE.get_or_compute(
+                ("semantic", model_name), query_text,
+                lambda t: semantic_embedding(t, model_name=model_name)
+            )
+        else:
+            q_emb = QUERY_EMBEDDING_CACHE.get_or_compute(
+                ("deterministic", DIM_DETERMINISTIC),
+                query_text,
+                deterministic_embedding,
+            )
 
-    # Query index
+    # Query index; a connection failure usually means a stale host or dead
+    # pool, so re-resolve the host once and retry before giving up.
+    query_kwargs = dict(
+        vector=q_emb, top_k=top_k, include_metadata=True, include_values=False
+    )
     try:
-        res = index.query(
-            vector=q_emb,
-            top_k=top_k,
-            include_metadata=True,
-            include_values=False
-        )
+        with span("pinecone.query"):
+            start = time.perf_counter()
+            res = index.query(**query_kwargs)
+            _PINECONE_LATENCY.observe(time.perf_counter() - start)
     except Exception as e:
-        raise RuntimeError(f"Failed to query Pinecone index: {str(e)}")
+        if not _is_connection_error(e):
+            raise RuntimeError(f"Failed to query Pinecone index: {str(e)}")
+        index = get_pinecone_index(index_name, api_key, stale_index=index)
+        try:
+            with span("pinecone.query", retry=True):
+                start = time.perf_counter()
+                res = index.query(**query_kwargs)
+                _PINECONE_LATENCY.observe(time.perf_counter() - start)
+        except Exception as e2:
+            raise RuntimeError(f"Failed to query Pinecone index: {str(e2)}")
 
     # Normalize response format
     out = []
     matches = getattr(res, "matches", None) or res.get("matches", [])
-    
+
     # Validate matches is iterable
     if not hasattr(matches, '__iter__'):
         matches = []
-    
+
     for m in matches:
         # Handle case where m might be None or not a dict/object
         if not m:
             continue
-            
+
         mid = getattr(m, "id", None) or m.get("id") if hasattr(m, 'get') else None
         score = getattr(m, "score", None) or m.get("score") if hasattr(m, 'get') else 0.0
         meta = getattr(m, "metadata", None) or m.get("metadata", {}) if hasattr(m, 'get') else {}
-        
+
         # Skip matches without ID
         if not mid:
             continue
-            
+
         out.append({
             "id": mid,
             "score": float(score) if score is not None else 0.0,
             "metadata": meta
         })
-        
-    return out
\ No newline at end of file
+
+    return out
@@ -0,0 +1,131 @@
+# src/semantic_cache.py
+"""
+Semantic (near-duplicate) answer cache.
+
+Stores (query embedding, retrieved chunk ids, answer) for recent queries. A new
+query reuses a cached answer when its embedding is within a cosine threshold of
+a cached query AND its retrieval returned the same chunk set under the same
+context (top_k, LLM params, index fingerprint), so paraphrases of a question
+skip the LLM call without ever answering from different evidence.
+
+Cached query embeddings live in a preallocated float32 ring buffer, so a
+lookup is one matrix-vector product.
+"""
+
+import json
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Thread-safe near-duplicate answer cache.
+
+    Args:
+        threshold: Minimum cosine similarity between query embeddings for a hit
+        maxsize: Maximum cached queries (oldest are overwritten first)
+    """
+
+    def __init__(self, threshold: float = 0.95, maxsize: int = 1000):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.lookups = 0
+        self.hits = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * maxsize
+        self._count = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vec: Sequence[float]) -> Optional[np.ndarray]:
+        v = np.asarray(vec, dtype=np.float32).ravel()
+        n = float(np.linalg.norm(v))
+        return v / n if n > 0 else None
+
+    def lookup(
+        self, query_vector: Sequence[float], chunk_ids: Sequence[str], context: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of a cached answer for a near-duplicate query, or None.
+
+        Args:
+            query_vector: Embedding of the new query
+            chunk_ids: Ids retrieved for the new query
+            context: Everything else the answer depends on (top_k, params,
+                index version)
+        """
+        q = self._normalize(query_vector)
+        ids = frozenset(chunk_ids)
+        with self._lock:
+            self.lookups += 1
+            if (
+                q is None
+                or self._matrix is None
+                or self._count == 0
+                or q.shape[0] != self._matrix.shape[1]
+            ):
+                return None
+            scores = self._matrix[:self._count] @ q
+            candidates = np.flatnonzero(scores >= self.threshold)
+            for i in candidates[np.argsort(-scores[candidates])]:
+                entry = self._entries[i]
+                if entry and entry["context"] == context and entry["chunk_ids"] == ids:
+                    self.hits += 1
+                    return json.loads(entry["result"])
+        return None
+
+    def add(
+        self,
+        query_vector: Sequence[float],
+        chunk_ids: Sequence[str],
+        context: str,
+        result: Dict[str, Any],
+    ) -> None:
+        """Remember an answer (result must be JSON-serializable)."""
+        q = self._normalize(query_vector)
+        if q is None:
+            return
+        value = json.dumps(result, default=str)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != q.shape[0]:
+                # First entry (or embedder changed): (re)allocate the buffer
+                self._matrix = np.zeros((self.maxsize, q.shape[0]), dtype=np.float32)
+                self._entries = [None] * self.maxsize
+                self._count = 0
+                self._next = 0
+            slot = self._next
+            self._matrix[slot] = q
+            self._entries[slot] = {
+                "chunk_ids": frozenset(chunk_ids),
+                "context": context,
+                "result": value,
+            }
+            self._next = (slot + 1) % self.maxsize
+            self._count = min(self._count + 1, self.maxsize)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": (self.hits / self.lookups) if self.lookups else 0.0,
+                "size": self._count,
+                "maxsize": self.maxsize,
+                "threshold": self.threshold,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._matrix = None
+            self._entries = [None] * self.maxsize
+            self._count = 0
+            self._next = 0
+            self.lookups = 0
+            self.hits = 0
@@ -0,0 +1,195 @@
+# src/tracing.py
+"""
+Lightweight per-stage tracing for the RAG pipeline.
+
+Spans are nested through a context variable and timed with a monotonic clock.
+Outside a trace, span() is a no-op, so instrumented library code costs almost
+nothing when nobody is tracing.
+
+Usage:
+    with start_trace("orchestrate_query") as root:
+        with span("retrieval"):
+            with span("embed_query"):
+                ...
+    root.breakdown()  # {"retrieval": 0.12, "retrieval/embed_query": 0.01, ...}
+
+Generators open a Span, run each non-yielding section under activate(span)
+and call span.finish() at the end.
+
+Export:
+    TRACING_EXPORTER=otel replays every finished trace to OpenTelemetry (needs
+    opentelemetry-api and a configured SDK); set_exporter(fn) installs any
+    callable receiving the finished root Span.
+"""
+
+import os
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    from opentelemetry import trace as _otel_trace
+    _HAS_OTEL = True
+except Exception:
+    _HAS_OTEL = False
+
+
+class Span:
+    """One timed stage. duration_s is None until the span ends."""
+
+    __slots__ = ("name", "attrs", "children", "start", "end", "start_ns")
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.children: List["Span"] = []
+        self.start = time.perf_counter()
+        self.start_ns = time.time_ns()
+        self.end: Optional[float] = None
+
+    @property
+    def duration_s(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    def finish(self, parent: Optional["Span"] = None) -> None:
+        """End the span and attach it to parent, or export it when it is a root."""
+        self.end = time.perf_counter()
+        if parent is not None:
+            parent.children.append(self)
+        elif _EXPORTER is not None:
+            try:
+                _EXPORTER(self)
+            except Exception:
+                # Exporting must never break the traced call
+                pass
+
+    def breakdown(self) -> Dict[str, float]:
+        """Flattened {"stage/substage": seconds} of the children, plus "total"."""
+        out: Dict[str, float] = {}
+
+        def walk(spans: List["Span"], prefix: str) -> None:
+            for s in spans:
+                if s.end is None:
+                    continue
+                key = f"{prefix}{s.name}"
+                # Repeated stages (e.g. retries) are summed
+                out[key] = out.get(key, 0.0) + s.duration_s
+                walk(s.children, key + "/")
+
+        walk(self.children, "")
+        if self.end is not None:
+            out["total"] = self.duration_s
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "duration_s": self.duration_s,
+            "attrs": dict(self.attrs),
+            "children": [c.to_dict() for c in self.children],
+        }
+
+
+_CURRENT: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar(
+    "rag_trace_span", default=None
+)
+_EXPORTER: Optional[Callable[[Span], None]] = None
+
+
+def current_span() -> Optional[Span]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def _run(s: Span, parent: Optional[Span]) -> Iterator[Span]:
+    token = _CURRENT.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _CURRENT.reset(token)
+        s.finish(parent)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """Time a stage as a child of the current span; a no-op outside a trace."""
+    parent = _CURRENT.get()
+    if parent is None:
+        yield None
+        return
+    with _run(Span(name, attrs), parent) as s:
+        yield s
+
+
+@contextmanager
+def start_trace(name: str, **attrs: Any) -> Iterator[Span]:
+    """Open a span that is always recorded, nested under the current span if any."""
+    with _run(Span(name, attrs), _CURRENT.get()) as s:
+        yield s
+
+
+@contextmanager
+def activate(s: Span) -> Iterator[Span]:
+    """
+    Make an already-open span current without ending it. Used by generators,
+    which must not keep a span current across a yield.
+    """
+    token = _CURRENT.set(s)
+    try:
+        yield s
+    finally:
+        _CURRENT.reset(token)
+
+
+def set_exporter(exporter: Optional[Callable[[Span], None]]) -> None:
+    """Install a callable receiving every finished root span (None disables export)."""
+    global _EXPORTER
+    _EXPORTER = exporter
+
+
+def otel_exporter(
+    tracer_name: str = "rag-document-assistant",
+) -> Callable[[Span], None]:
+    """
+    Exporter replaying finished spans to OpenTelemetry with their original timestamps.
+
+    Raises:
+        ImportError: If opentelemetry-api is not installed
+    """
+    if not _HAS_OTEL:
+        raise ImportError(
+            "opentelemetry-api not installed. Install with: "
+            "pip install opentelemetry-api opentelemetry-sdk"
+        )
+    tracer = _otel_trace.get_tracer(tracer_name)
+
+    def _attr(value: Any) -> Any:
+        return value if isinstance(value, (str, bool, int, float)) else str(value)
+
+    def export(root: Span) -> None:
+        def emit(s: Span, ctx: Any) -> None:
+            otel_span = tracer.start_span(
+                s.name,
+                context=ctx,
+                start_time=s.start_ns,
+                attributes={k: _attr(v) for k, v in s.attrs.items()},
+            )
+            child_ctx = _otel_trace.set_span_in_context(otel_span)
+            for c in s.children:
+                emit(c, child_ctx)
+            otel_span.end(end_time=s.start_ns + int((s.duration_s or 0.0) * 1e9))
+
+        emit(root, None)
+
+    return export
+
+
+if os.getenv("TRACING_EXPORTER", "none").lower() == "otel":
+    set_exporter(otel_exporter())
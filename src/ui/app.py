@@ -1,11 +1,12 @@
 # src/ui/app.py
 import streamlit as st
 import sys, os
+from contextlib import closing
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from src.orchestrator import orchestrate_query
+from src.orchestrator import orchestrate_query_stream
 
 st.title("RAG MVP — Query Interface")
 
@@ -15,9 +16,20 @@ if st.button("Run Query"):
     if not query.strip():
         st.error("Enter a query.")
     else:
-        result = orchestrate_query(query, top_k=3)
         st.subheader("Answer")
-        st.write(result.get("answer", ""))
+        answer_box = st.empty()
+
+        # Render tokens as they arrive; the last event carries sources/citations
+        answer = ""
+        result = {}
+        with closing(orchestrate_query_stream(query, top_k=3)) as events:
+            for event in events:
+                if event["type"] == "token":
+                    answer += event["text"]
+                    answer_box.markdown(answer + "▌")
+                else:
+                    result = event["result"]
+        answer_box.markdown(result.get("answer", answer))
 
         st.subheader("Citations")
         for c in result.get("citations", []):
@@ -0,0 +1,4 @@
+import os
+
+# src.config requires PINECONE_API_KEY unless the local backend is selected
+os.environ.setdefault("RETRIEVAL_BACKEND", "local")
@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.retrieval.ann import IVFIndex, recall_at_k
+from src.retrieval.local_index import LocalVectorIndex
+
+
+def _clustered(n=2000, dim=32, centers=40, seed=0):
+    rng = np.random.default_rng(seed)
+    means = rng.normal(size=(centers, dim))
+    vectors = means[rng.integers(0, centers, size=n)] + 0.3 * rng.normal(size=(n, dim))
+    ids = [f"doc{i // 10}.md::{i % 10}" for i in range(n)]
+    metadata = [
+        {"filename": f"doc{i // 10}.md", "chunk_id": i % 10, "chars": 100 + i}
+        for i in range(n)
+    ]
+    metadata[0].update(start=5, end=50)
+    return LocalVectorIndex(ids, vectors.astype(np.float32), metadata)
+
+
+@pytest.fixture(scope="module")
+def indexes():
+    exact = _clustered()
+    return exact, IVFIndex.build(exact, n_lists=32, nprobe=8)
+
+
+def test_recall_against_exact_search(indexes):
+    exact, ivf = indexes
+    queries = np.random.default_rng(1).normal(size=(50, exact.dim)).astype(np.float32)
+    assert recall_at_k(ivf, exact, queries, k=10) >= 0.9
+    assert recall_at_k(ivf, exact, queries, k=10, nprobe=ivf.n_lists) == 1.0
+
+
+def test_search_batch_matches_search(indexes):
+    exact, ivf = indexes
+    queries = np.random.default_rng(2).normal(size=(20, exact.dim)).astype(np.float32)
+    queries[3] = 0.0
+    batch = ivf.search_batch(queries, top_k=5, nprobe=4)
+    assert batch[3] == []
+    for q, got in zip(queries, batch):
+        expected = ivf.search(q, top_k=5, nprobe=4)
+        assert [m["id"] for m in got] == [m["id"] for m in expected]
+        assert [m["score"] for m in got] == pytest.approx(
+            [m["score"] for m in expected], abs=1e-5
+        )
+
+
+def test_save_and_load_memory_maps_arrays(indexes, tmp_path):
+    exact, ivf = indexes
+    path = tmp_path / "chunks.store.ivf"
+    ivf.save(str(path))
+    ivf.save(str(path))  # replacing an existing index
+
+    loaded = IVFIndex.load(str(path))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["chunks.store.ivf"]
+    assert isinstance(loaded.matrix.base, np.memmap)
+    # ids and metadata live in .npy arrays, not in a JSON header
+    assert json.loads((path / "meta.json").read_text()) == {"version": 1, "nprobe": 8}
+    q = exact.matrix[7]
+    assert loaded.search(q, top_k=5) == ivf.search(q, top_k=5)
+    assert loaded.metadata[0] == {
+        "filename": "doc0.md",
+        "chunk_id": 0,
+        "chars": 100,
+        "start": 5,
+        "end": 50,
+    }
+    assert loaded.metadata[1] == exact.metadata[1]
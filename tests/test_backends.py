@@ -0,0 +1,68 @@
+import src.retrieval.backends as backends
+
+
+class _StatsIndex:
+    def __init__(self, count):
+        self.count = count
+        self.calls = 0
+
+    def describe_index_stats(self):
+        self.calls += 1
+        return {"total_vector_count": self.count}
+
+
+def test_pinecone_fingerprint_tracks_remote_vector_count(monkeypatch):
+    index = _StatsIndex(10)
+    monkeypatch.setenv("PINECONE_API_KEY", "key")
+    monkeypatch.setattr(backends, "get_pinecone_index", lambda name, key: index)
+    backend = backends.PineconeBackend(index_name="docs")
+
+    first = backend.fingerprint()
+    assert backend.fingerprint() == first
+    assert index.calls == 1  # reused within the TTL
+
+    index.count = 12
+    monkeypatch.setattr(backends, "PINECONE_FINGERPRINT_TTL_S", 0.0)
+    assert backend.fingerprint() != first
+
+    def unavailable(name, key):
+        raise RuntimeError("network down")
+
+    monkeypatch.setattr(backends, "get_pinecone_index", unavailable)
+    assert backend.fingerprint() == "pinecone:docs:12"
+
+
+def test_local_backend_reloads_rewritten_store(tmp_path):
+    import os
+
+    from src.ingestion.embedding_store import write_store
+
+    path = str(tmp_path / "chunks.store")
+
+    def write(vectors):
+        write_store(
+            path,
+            [
+                {
+                    "id": f"a.md::{i}",
+                    "filename": "a.md",
+                    "chunk_id": i,
+                    "text": f"t{i}",
+                    "embedding": v,
+                }
+                for i, v in enumerate(vectors)
+            ],
+        )
+
+    write([[1.0, 0.0]])
+    backend = backends.LocalBackend(path=path, provider="local", index_type="exact")
+    first = backend.fingerprint()
+    assert len(backend.index.ids) == 1
+
+    write([[1.0, 0.0], [0.0, 1.0]])
+    st = os.stat(path)
+    os.utime(
+        path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000)
+    )  # coarse mtime filesystems
+    assert backend.fingerprint() != first
+    assert len(backend.index.ids) == 2
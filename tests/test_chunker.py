@@ -0,0 +1,146 @@
+import random
+import re
+
+import pytest
+
+from src.ingestion.chunker import chunk_documents, chunk_spans
+
+_WORDS = [
+    "alpha",
+    "beta",
+    "gamma",
+    "delta",
+    "epsilon",
+    "retrieval",
+    "index",
+    "a",
+    "of",
+    "vector",
+]
+
+
+def _text(seed, n_words=1500):
+    rnd = random.Random(seed)
+    parts = []
+    for i in range(n_words):
+        word = rnd.choice(_WORDS)
+        if i % 300 == 0:
+            parts.append(f"\n\n## Section {i}\n\n")
+        parts.append(word + (". " if rnd.random() < 0.1 else " "))
+    return "".join(parts)
+
+
+class _FakeTokenizer:
+    """Fast-tokenizer stand-in: words in pieces of <= 3 chars, punctuation alone."""
+
+    name_or_path = "fake-tokenizer"
+    _TOKEN_RE = re.compile(r"\w{1,3}|[^\w\s]")
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(
+        self,
+        texts,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        verbose=False,
+    ):
+        self.calls += 1
+        return {
+            "offset_mapping": [
+                [m.span() for m in self._TOKEN_RE.finditer(t)] for t in texts
+            ]
+        }
+
+
+def _word_len(text, i):
+    """Length of the word containing text[i]."""
+    lo = hi = i
+    while lo > 0 and not text[lo - 1].isspace():
+        lo -= 1
+    while hi < len(text) and not text[hi].isspace():
+        hi += 1
+    return hi - lo
+
+
+def _check_spans(text, spans, window):
+    assert spans
+    starts = [s for s, _ in spans]
+    assert starts == sorted(set(starts)), "starts must be strictly increasing"
+    covered = [False] * len(text)
+    for s, e in spans:
+        chunk = text[s:e]
+        assert chunk and chunk == chunk.strip(), (s, e)
+        for i in range(s, e):
+            covered[i] = True
+        # Only a word longer than the window may be cut
+        if s > 0 and not text[s - 1].isspace():
+            assert _word_len(text, s) > window, (s, e)
+        if e < len(text) and not text[e].isspace():
+            assert _word_len(text, e) > window, (s, e)
+    missing = [i for i, c in enumerate(text) if not c.isspace() and not covered[i]]
+    assert not missing, "text not covered"
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("max_tokens,overlap", [(50, 10), (100, 0), (30, 29)])
+def test_spans_are_trimmed_ordered_cover_text_and_keep_words(seed, max_tokens, overlap):
+    text = _text(seed)
+    spans = chunk_spans(text, max_tokens=max_tokens, overlap=overlap)
+    _check_spans(text, spans, max_tokens * 4)
+    assert all(e - s <= max_tokens * 4 for s, e in spans)
+
+
+def test_word_longer_than_window_is_cut():
+    text = "short " + "x" * 500 + " tail words here"
+    spans = chunk_spans(text, max_tokens=20, overlap=5)
+    _check_spans(text, spans, 80)
+    assert any(e - s == 80 for s, e in spans)
+
+
+def test_whitespace_only_and_empty_text_have_no_spans():
+    assert chunk_spans("") == []
+    assert chunk_spans(" \n\t  ") == []
+
+
+def test_chunks_record_offsets_into_document():
+    text = _text(0, 400)
+    chunks = chunk_documents(
+        [{"filename": "a.md", "text": text, "status": "OK"}], max_tokens=40, overlap=8
+    )
+    assert [c["chunk_id"] for c in chunks] == list(range(len(chunks)))
+    for c in chunks:
+        assert text[c["start"]:c["end"]] == c["text"]
+        assert c["chars"] == c["end"] - c["start"]
+
+
+@pytest.mark.parametrize(
+    "max_tokens,overlap", [(0, 0), (-1, 0), (10, -1), (10, 10), (10, 11)]
+)
+def test_invalid_settings_raise(max_tokens, overlap):
+    with pytest.raises(ValueError):
+        chunk_spans("some text", max_tokens=max_tokens, overlap=overlap)
+
+
+@pytest.mark.parametrize("max_tokens,overlap", [(40, 8), (64, 0), (16, 15)])
+def test_tokenizer_spans_fit_token_budget(max_tokens, overlap):
+    tok = _FakeTokenizer()
+    text = _text(3)
+    spans = chunk_spans(text, max_tokens=max_tokens, overlap=overlap, tokenizer=tok)
+    offsets = tok([text])["offset_mapping"][0]
+    # Word-level properties hold on the token path too (every word fits the window)
+    _check_spans(text, spans, max_tokens)
+    for s, e in spans:
+        n_tokens = sum(1 for ts, te in offsets if ts >= s and te <= e)
+        assert n_tokens <= max_tokens, (s, e, n_tokens)
+
+
+def test_documents_are_tokenized_in_batches():
+    tok = _FakeTokenizer()
+    docs = [
+        {"filename": f"{i}.md", "text": _text(i, 200), "status": "OK"} for i in range(3)
+    ]
+    chunks = chunk_documents(docs, max_tokens=32, overlap=4, tokenizer=tok)
+    assert tok.calls == 1
+    assert {c["filename"] for c in chunks} == {"0.md", "1.md", "2.md"}
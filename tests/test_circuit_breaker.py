@@ -0,0 +1,133 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+def _breaker(clock, **kwargs):
+    settings = dict(
+        window_s=60, min_requests=4, error_rate=0.5, cooldown_s=30, probe_timeout_s=10
+    )
+    settings.update(kwargs)
+    return CircuitBreaker(clock=clock, **settings)
+
+
+def test_opens_at_error_rate_after_min_requests(clock):
+    breaker = _breaker(clock)
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED  # below min_requests
+
+    breaker.record_failure()
+    assert breaker.state == OPEN  # 3 of 4 failed
+    assert not breaker.try_acquire()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_old_outcomes_leave_the_window(clock):
+    breaker = _breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 61
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["requests"] == 1
+
+
+def test_half_open_allows_one_probe(clock):
+    breaker = _breaker(clock, min_requests=1)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+
+    assert breaker.try_acquire()
+    assert not breaker.try_acquire()  # probe in flight
+
+    breaker.release()  # abandoned probe
+    assert breaker.try_acquire()
+
+    clock.now += 10  # lost probe
+    assert breaker.try_acquire()
+
+
+def test_probe_result_closes_or_reopens(clock):
+    breaker = _breaker(clock, min_requests=1)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.try_acquire()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["opens"] == 2
+
+    clock.now += 30
+    assert breaker.try_acquire()
+    breaker.record_success(0.2)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["requests"] == 1  # fresh window after recovery
+
+
+def test_expected_cost_orders_by_latency_and_errors(clock):
+    fast, slow = _breaker(clock), _breaker(clock)
+    assert fast.expected_cost() == 0.0  # no data yet
+    fast.record_success(0.1)
+    slow.record_success(0.1)
+    slow.record_failure()
+    assert fast.expected_cost() < slow.expected_cost()
+
+
+def test_dead_provider_is_skipped_once_open(monkeypatch):
+    import src.llm_providers as llm
+
+    hits = []
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            hits.append(self.path)
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for key in ("GEMINI_API_KEY", "GROQ_API_KEY"):
+            monkeypatch.delenv(key, raising=False)
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+        monkeypatch.setenv(
+            "OPENROUTER_URL",
+            f"http://127.0.0.1:{server.server_address[1]}/chat/completions",
+        )
+        monkeypatch.setitem(
+            llm._BREAKERS, "openrouter", CircuitBreaker(min_requests=2, cooldown_s=60)
+        )
+
+        for _ in range(3):
+            resp = llm.call_llm("hi")
+            assert resp["meta"]["provider"] == "local-fallback"
+
+        assert len(hits) == 2  # the third call never reached the server
+        assert resp["meta"]["errors"] == ["openrouter: circuit open"]
+        assert llm.provider_health()["openrouter"]["state"] == OPEN
+    finally:
+        server.shutdown()
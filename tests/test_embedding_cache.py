@@ -0,0 +1,55 @@
+import numpy as np
+
+from src.ingestion import embeddings
+from src.ingestion.embedding_cache import EmbeddingCache, cache_key
+from src.ingestion.embeddings import batch_embed_chunks
+
+
+def _chunks(*texts):
+    return [
+        {"filename": "a.md", "chunk_id": i, "text": t, "chars": len(t)}
+        for i, t in enumerate(texts)
+    ]
+
+
+def test_key_covers_provider_model_and_dim():
+    base = cache_key("text", "local", None, 64)
+    assert cache_key("text", "local", None, 64) == base
+    assert len({base,
+                cache_key("other", "local", None, 64),
+                cache_key("text", "sentence-transformers", None, 64),
+                cache_key("text", "local", "model-a", 64),
+                cache_key("text", "local", None, 32)}) == 5
+
+
+def test_vectors_round_trip_in_their_dtype(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    vec = np.array([0.1, 0.2, 0.3], dtype=np.float32)
+    cache.put_many([("k", vec)])
+    cache.close()
+
+    reopened = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    assert reopened.get_many(["k", "missing"]) == {"k": vec.tolist()}
+    assert reopened.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_only_misses_are_embedded(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    calls = []
+    real = embeddings.get_embedding
+
+    def counting(text, **kwargs):
+        calls.append(text)
+        return real(text, **kwargs)
+
+    monkeypatch.setattr(embeddings, "get_embedding", counting)
+
+    first = batch_embed_chunks(_chunks("alpha", "beta"), dim=16, cache=cache)
+    second = batch_embed_chunks(_chunks("alpha", "gamma"), dim=16, cache=cache)
+
+    assert calls == ["alpha", "beta", "gamma"]
+    assert second[0]["embedding"] == first[0]["embedding"]
+    # A different dim is a different embedding space: nothing is reused
+    batch_embed_chunks(_chunks("alpha"), dim=8, cache=cache)
+    assert calls[-1] == "alpha" and len(calls) == 4
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,40 @@
+import shutil
+
+from src.ingestion.embedding_store import EmbeddingStore, is_store, write_store
+
+
+def _records(n):
+    return [
+        {"id": f"a.md::{i}", "filename": "a.md", "chunk_id": i, "text": f"chunk {i}",
+         "chars": 7, "start": 0, "end": 7, "embedding": [1.0, float(i)]}
+        for i in range(n)
+    ]
+
+
+def test_rewrite_swaps_versions_and_keeps_open_readers_valid(tmp_path):
+    path = tmp_path / "chunks.store"
+    write_store(str(path), _records(2))
+    old = EmbeddingStore(str(path))
+
+    for n in (3, 4, 5):
+        write_store(str(path), _records(n))
+
+    assert len(EmbeddingStore(str(path))) == 5
+    assert sorted(p.name for p in path.iterdir()) == ["CURRENT", "v3", "v4"]
+    # Store opened before the rewrites still reads its own data
+    assert old.text(1) == "chunk 1"
+    assert len(old) == 2
+
+
+def test_unversioned_store_loads_and_is_replaced(tmp_path):
+    versioned = tmp_path / "new.store"
+    write_store(str(versioned), _records(2))
+    legacy = tmp_path / "legacy.store"
+    shutil.copytree(versioned / (versioned / "CURRENT").read_text(), legacy)
+    assert is_store(str(legacy))
+    assert EmbeddingStore(str(legacy)).ids == ["a.md::0", "a.md::1"]
+
+    write_store(str(legacy), _records(3))
+    assert len(EmbeddingStore(str(legacy))) == 3
+    write_store(str(legacy), _records(4))
+    assert sorted(p.name for p in legacy.iterdir()) == ["CURRENT", "v1", "v2"]
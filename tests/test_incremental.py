@@ -0,0 +1,50 @@
+import json
+
+from src.ingestion.embedding_store import EmbeddingStore
+from src.ingestion.incremental import run_incremental
+
+
+def _docs(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text(
+        "# Alpha\n\n" + "alpha words here. " * 40, encoding="utf-8"
+    )
+    (docs / "b.md").write_text(
+        "# Beta\n\n" + "beta words there. " * 40, encoding="utf-8"
+    )
+    return docs
+
+
+def test_unchanged_documents_are_not_re_embedded(tmp_path):
+    docs = _docs(tmp_path)
+    store, manifest = str(tmp_path / "chunks.store"), str(tmp_path / "manifest.json")
+
+    first = run_incremental(str(docs), store, manifest, dim=16)
+    assert sorted(first["changed"]) == ["a.md", "b.md"]
+
+    second = run_incremental(str(docs), store, manifest, dim=16)
+    assert second["changed"] == [] and second["upserted"] == 0
+
+
+def test_embedding_change_re_embeds_every_document(tmp_path):
+    docs = _docs(tmp_path)
+    store, manifest = str(tmp_path / "chunks.store"), str(tmp_path / "manifest.json")
+    run_incremental(str(docs), store, manifest, dim=128)
+    count = len(EmbeddingStore(store))
+
+    upserted = []
+    summary = run_incremental(
+        str(docs), store, manifest, dim=64, upsert=upserted.extend
+    )
+
+    assert sorted(summary["changed"]) == ["a.md", "b.md"]
+    assert len(upserted) == count
+    reloaded = EmbeddingStore(store)
+    assert reloaded.dim == 64 and len(reloaded) == count
+    with open(manifest, encoding="utf-8") as fh:
+        assert json.load(fh)["embedding"] == {
+            "provider": "local",
+            "model_name": None,
+            "dim": 64,
+        }
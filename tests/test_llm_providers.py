@@ -0,0 +1,341 @@
+import asyncio
+import json
+import threading
+import time
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import src.llm_providers as llm
+from src.rate_limiter import RateLimiter
+
+
+def _start_sse_server(events, hang):
+    """
+    Chat-completions SSE stub; with hang set it stalls after the first event
+    until released.
+    """
+    release = threading.Event()
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for i, event in enumerate(events):
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if hang and i == 0:
+                    release.wait(10)
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, release
+
+
+def _delta(text):
+    return {"choices": [{"delta": {"content": text}}]}
+
+
+@pytest.fixture
+def openrouter(monkeypatch):
+    """Route streaming calls to a local SSE stub via OpenRouter, 60 TPM limiter."""
+    servers = []
+
+    def start(events, hang=False):
+        server, release = _start_sse_server(events, hang)
+        servers.append((server, release))
+        url = f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+        monkeypatch.setenv("OPENROUTER_URL", url)
+        return url
+
+    for key in ("GEMINI_API_KEY", "GROQ_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    limiter = RateLimiter(tpm=60)
+    monkeypatch.setitem(llm._LIMITERS, "openrouter", limiter)
+    llm.reset_provider_health()
+    yield start, limiter
+    for server, release in servers:
+        release.set()
+        server.shutdown()
+
+
+def test_stream_settles_reported_usage(openrouter):
+    start, limiter = openrouter
+    start(
+        [
+            _delta("Hello"),
+            _delta(" world"),
+            {"choices": [], "usage": {"total_tokens": 7}},
+        ]
+    )
+
+    events = list(llm.stream_llm("hi", max_tokens=40))
+
+    assert events[-1]["text"] == "Hello world"
+    # 40 tokens were reserved; the provider reported 7
+    assert 60 - 7 <= limiter.tokens.level < 60 - 7 + 1
+
+
+def test_abandoned_stream_releases_host_slot(openrouter):
+    start, limiter = openrouter
+    url = start([_delta("Hel"), _delta("lo")], hang=True)
+    slots = llm._host_semaphore(llm._host_of(url))
+
+    with closing(llm.stream_llm("hi", max_tokens=40)) as events:
+        assert next(events) == {"type": "token", "text": "Hel"}
+        assert slots._value == llm.HTTP_MAX_PER_HOST - 1
+
+    assert slots._value == llm.HTTP_MAX_PER_HOST
+    # No usage reported: settled on an estimate of prompt plus streamed text
+    assert limiter.tokens.level > 60 - 40 + 30
+
+
+def _fake_provider(name, calls, delay, fail=False):
+    def call(prompt, temperature, max_tokens, context):
+        calls.append(name)
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} down")
+        return {"text": name, "meta": {"provider": name}}
+    return call
+
+
+@pytest.fixture
+def two_providers(monkeypatch):
+    """Gemini and Groq configured (static order), hedging after 50 ms."""
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    monkeypatch.setattr(llm, "HEDGE_ADAPTIVE", False)
+    monkeypatch.setattr(llm, "HEDGE_DELAY_S", 0.05)
+    llm.reset_provider_health()
+    calls = []
+
+    def use(gemini, groq):
+        monkeypatch.setitem(
+            llm._SYNC_CALLS, "gemini", _fake_provider("gemini", calls, *gemini)
+        )
+        monkeypatch.setitem(
+            llm._SYNC_CALLS, "groq", _fake_provider("groq", calls, *groq)
+        )
+        return calls
+    return use
+
+
+def test_hedge_launches_backup_after_delay(two_providers):
+    calls = two_providers(gemini=(0.5,), groq=(0.01,))
+
+    resp = llm.call_llm("hi", mode="hedge")
+
+    assert resp["text"] == "groq"
+    hedge = resp["meta"]["hedge"]
+    assert hedge["winner"] == "groq" and hedge["launched"] == ["gemini", "groq"]
+    assert hedge["elapsed_s"] < 0.4
+    assert hedge["saved_s"] > 0
+    assert calls == ["gemini", "groq"]
+
+
+def test_hedge_does_not_launch_backup_for_fast_primary(two_providers):
+    calls = two_providers(gemini=(0.0,), groq=(0.0,))
+
+    resp = llm.call_llm("hi", mode="hedge")
+
+    assert resp["meta"]["hedge"]["launched"] == ["gemini"]
+    assert calls == ["gemini"]
+
+
+def test_hedge_launches_next_provider_when_one_fails(two_providers):
+    two_providers(gemini=(0.0, True), groq=(0.0,))
+
+    resp = llm.call_llm("hi", mode="hedge")
+
+    assert resp["text"] == "groq"
+
+
+def test_race_launches_all_providers_at_once(two_providers):
+    calls = two_providers(gemini=(0.3,), groq=(0.01,))
+
+    resp = llm.call_llm("hi", mode="race")
+
+    assert resp["meta"]["hedge"]["winner"] == "groq"
+    assert sorted(calls) == ["gemini", "groq"]
+    assert resp["meta"]["hedge"]["elapsed_s"] < 0.25
+
+
+def test_hedge_losers_do_not_hold_up_later_calls(monkeypatch, two_providers):
+    two_providers(gemini=(0.0,), groq=(0.01,))
+    release = threading.Event()
+
+    def stuck(prompt, temperature, max_tokens, context):
+        release.wait(10)
+        raise RuntimeError("gemini timed out")
+
+    monkeypatch.setitem(llm._SYNC_CALLS, "gemini", stuck)
+    try:
+        # Every call leaves a blocked loser behind, more of them than connections
+        for _ in range(llm.HTTP_MAX_CONNECTIONS + 2):
+            resp = llm.call_llm("hi", mode="race")
+            assert resp["text"] == "groq"
+            assert resp["meta"]["hedge"]["elapsed_s"] < 0.25
+    finally:
+        release.set()
+
+
+def test_hedge_returns_loser_reservations(monkeypatch, two_providers):
+    two_providers(gemini=(0.0,), groq=(0.0,))
+    monkeypatch.setitem(llm._SYNC_CALLS, "gemini", llm._call_gemini)
+    monkeypatch.setitem(llm._SYNC_CALLS, "groq", llm._call_groq)
+    limiters = {name: RateLimiter(tpm=6000) for name in ("gemini", "groq")}
+    for name, limiter in limiters.items():
+        monkeypatch.setitem(llm._LIMITERS, name, limiter)
+    loser_done = threading.Event()
+
+    def post(url, headers, payload, timeout=llm.HTTP_TIMEOUT_S):
+        if "generativelanguage" in url:
+            time.sleep(0.3)
+            loser_done.set()
+            return {"candidates": [{"content": {"parts": [{"text": "gemini"}]}}],
+                    "usageMetadata": {"totalTokenCount": 1000}}
+        return {
+            "choices": [{"message": {"content": "groq"}}],
+            "usage": {"total_tokens": 40},
+        }
+
+    monkeypatch.setattr(llm, "_http_post", post)
+
+    resp = llm.call_llm("hi", mode="race")
+
+    assert resp["text"] == "groq"
+    # The loser is still in flight, but its reservation is already back
+    assert not loser_done.is_set()
+    assert limiters["gemini"].tokens.level == pytest.approx(6000, abs=1)
+    assert limiters["groq"].tokens.level == pytest.approx(6000 - 40, abs=5)
+    # Its late answer settles nothing (settling would charge the usage above the
+    # estimate)
+    assert loser_done.wait(2)
+    time.sleep(0.05)
+    assert limiters["gemini"].tokens.level == pytest.approx(6000, abs=1)
+
+
+def test_async_race_cancels_losers(monkeypatch, two_providers):
+    two_providers(gemini=(0.0,), groq=(0.0,))
+    cancelled = []
+
+    def fake(name, delay):
+        async def call(prompt, temperature, max_tokens, context):
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(name)
+                raise
+            return {"text": name, "meta": {"provider": name}}
+        return call
+
+    monkeypatch.setitem(llm._ASYNC_CALLS, "gemini", fake("gemini", 5.0))
+    monkeypatch.setitem(llm._ASYNC_CALLS, "groq", fake("groq", 0.01))
+
+    resp = asyncio.run(llm.acall_llm("hi", mode="race"))
+
+    assert resp["text"] == "groq"
+    assert cancelled == ["gemini"]
+
+
+def test_stream_rejects_mode():
+    with pytest.raises(ValueError, match="stream=True"):
+        llm.call_llm("hi", mode="hedge", stream=True)
+    with pytest.raises(ValueError, match="stream=True"):
+        asyncio.run(llm.acall_llm("hi", mode="race", stream=True))
+    # Without a mode the (lazy) event iterator is returned as before
+    events = llm.call_llm("hi", stream=True)
+    assert hasattr(events, "__next__")
+    events.close()
+
+
+@pytest.fixture
+def json_openrouter(monkeypatch):
+    """
+    OpenRouter pointed at a local chat-completions stub that answers after 0.2 s
+    and tracks concurrency.
+    """
+    state = {"active": 0, "peak": 0, "prompts": []}
+    lock = threading.Lock()
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            )
+            prompt = body["messages"][-1]["content"]
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+                state["prompts"].append(prompt)
+            time.sleep(0.2)
+            with lock:
+                state["active"] -= 1
+            reply = json.dumps({
+                "choices": [{"message": {"content": f"echo {prompt}"}}],
+                "usage": {"total_tokens": 3},
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for key in ("GEMINI_API_KEY", "GROQ_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    monkeypatch.setenv(
+        "OPENROUTER_URL",
+        f"http://127.0.0.1:{server.server_address[1]}/chat/completions",
+    )
+    monkeypatch.setitem(llm._LIMITERS, "openrouter", RateLimiter())
+    llm.reset_provider_health()
+    try:
+        yield state
+    finally:
+        server.shutdown()
+
+
+@pytest.mark.parametrize("use_httpx", [True, False])
+def test_acall_llm_runs_concurrently_within_per_host_limit(
+    monkeypatch, json_openrouter, use_httpx
+):
+    if use_httpx and not llm._HAS_HTTPX:
+        pytest.skip("httpx not installed")
+    monkeypatch.setattr(llm, "_HAS_HTTPX", use_httpx)
+    monkeypatch.setattr(llm, "HTTP_MAX_PER_HOST", 3)
+    prompts = [f"q{i}" for i in range(6)]
+
+    async def main():
+        try:
+            start = time.monotonic()
+            results = await asyncio.gather(*(llm.acall_llm(p) for p in prompts))
+            return results, time.monotonic() - start
+        finally:
+            await llm.aclose_http_clients()
+
+    results, elapsed = asyncio.run(main())
+
+    assert [r["text"] for r in results] == [f"echo {p}" for p in prompts]
+    assert all(r["meta"]["provider"] == "openrouter" for r in results)
+    assert sorted(json_openrouter["prompts"]) == prompts
+    # Two waves of three: concurrent, but never more than the per-host limit
+    assert json_openrouter["peak"] == 3
+    assert 0.35 < elapsed < 1.0
@@ -0,0 +1,75 @@
+import random
+import re
+import time
+
+import pytest
+
+from src.ingestion.load_docs import (
+    _clean_markdown,
+    iter_markdown_docs,
+    load_markdown_docs,
+)
+
+
+def _reference_clean(text):
+    # The cleaner as it was before the single-scan rewrite
+    text = re.sub(r"```.*?```", " ", text, flags=re.DOTALL)
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = re.sub(r"!\[([^\]]*)\]\([^\)]*\)", r"\1", text)
+    text = re.sub(r"\[([^\]]+)\]\([^\)]*\)", r"\1", text)
+    text = re.sub(r"^---.*?---\s*", " ", text, flags=re.DOTALL)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("See [docs](http://x) and ![logo](a.png).", "See docs and logo."),
+    ("[![build](b.svg)](http://ci) ok", "build ok"),
+    ("a ```x <b> [y](z)``` b", "a b"),
+    ("<b>bold</b> <>", "bold <>"),
+    ("---\ntitle: x\n---\nBody", "Body"),
+    ("unclosed ``` fence", "unclosed ``` fence"),
+    ("[![]((---] )(", "[("),
+    ("![[x](y)](z)", "x"),
+    ("a < b and [c](d) > e", "a e"),
+    ("[](x) ![](y)", "[](x)"),
+])
+def test_clean_markdown_matches_reference(text, expected):
+    assert _clean_markdown(text) == expected
+    assert _reference_clean(text) == expected
+
+
+def test_clean_markdown_fuzz_matches_reference():
+    rng = random.Random(0)
+    alphabet = list("ab <>[]()!`-\n") + ["```", "---"]
+    for _ in range(20000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 25)))
+        assert _clean_markdown(text) == _reference_clean(text), repr(text)
+
+
+@pytest.mark.parametrize("unit, repeat", [
+    ("a < b and c ", 16000),
+    ("[a < b](c) ", 12000),
+    ("[", 100000),
+    ("![", 50000),
+    ("``` x ", 50000),
+])
+def test_clean_markdown_linear_on_unclosed_markup(unit, repeat):
+    # A pattern that rescans to the end of the text from every unmatched "<",
+    # "[" or "```" takes seconds on these
+    assert _clean_markdown(unit * 200) == _reference_clean(unit * 200)
+    text = unit * repeat
+    start = time.perf_counter()
+    _clean_markdown(text)
+    assert time.perf_counter() - start < 0.5
+
+
+def test_iter_markdown_docs_recursive_matches_load(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.md").write_text("# A\ntop", encoding="utf-8")
+    (tmp_path / "sub" / "b.md").write_text("# B\nnested", encoding="utf-8")
+
+    assert [d["filename"] for d in iter_markdown_docs(str(tmp_path))] == ["a.md"]
+    streamed = list(iter_markdown_docs(str(tmp_path), recursive=True))
+    assert [d["filename"] for d in streamed] == ["a.md", "sub/b.md"]
+    assert streamed == load_markdown_docs(str(tmp_path), recursive=True)
@@ -0,0 +1,81 @@
+import urllib.request
+
+import pytest
+
+from src.metrics import CONTENT_TYPE, MetricsRegistry, serve
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    queries = registry.counter(
+        "rag_queries_total", "Queries handled", ("mode", "status")
+    )
+    queries.inc(mode="single", status="ok")
+    queries.inc(2, mode="batch", status="ok")
+    registry.gauge("rag_index_rows", "Rows in the index").set(1.5)
+    latency = registry.histogram(
+        "rag_query_duration_seconds", "Query latency", ("mode",), buckets=(0.1, 1.0)
+    )
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, mode="single")
+
+    assert registry.render() == (
+        '# HELP rag_index_rows Rows in the index\n'
+        '# TYPE rag_index_rows gauge\n'
+        'rag_index_rows 1.5\n'
+        '# HELP rag_queries_total Queries handled\n'
+        '# TYPE rag_queries_total counter\n'
+        'rag_queries_total{mode="batch",status="ok"} 2\n'
+        'rag_queries_total{mode="single",status="ok"} 1\n'
+        '# HELP rag_query_duration_seconds Query latency\n'
+        '# TYPE rag_query_duration_seconds histogram\n'
+        'rag_query_duration_seconds_bucket{mode="single",le="0.1"} 1\n'
+        'rag_query_duration_seconds_bucket{mode="single",le="1"} 3\n'
+        'rag_query_duration_seconds_bucket{mode="single",le="+Inf"} 4\n'
+        'rag_query_duration_seconds_sum{mode="single"} 4.05\n'
+        'rag_query_duration_seconds_count{mode="single"} 4\n'
+    )
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", 'Errors with "quotes"', ("stage",)).inc(
+        stage='a"b\\c\nd'
+    )
+    assert 'errors_total{stage="a\\"b\\\\c\\nd"} 1' in registry.render()
+    assert '# HELP errors_total Errors with \\"quotes\\"' in registry.render()
+
+
+def test_registration_is_idempotent_and_checked():
+    registry = MetricsRegistry()
+    counter = registry.counter("hits_total", "Hits", ("cache",))
+    assert registry.counter("hits_total", "Hits", ("cache",)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("hits_total", "Hits", ("cache",))
+    with pytest.raises(ValueError):
+        counter.inc(result="hit")
+
+
+def test_reset_keeps_registrations():
+    registry = MetricsRegistry()
+    registry.counter("hits_total", "Hits").inc()
+    registry.reset()
+    assert registry.render() == "# HELP hits_total Hits\n# TYPE hits_total counter\n"
+
+
+def test_dump_and_http_endpoint(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("hits_total", "Hits").inc(3)
+    path = tmp_path / "rag.prom"
+    registry.dump(str(path))
+    assert path.read_text(encoding="utf-8") == registry.render()
+
+    server = serve(port=0, addr="127.0.0.1", registry=registry)
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5
+        ) as resp:
+            assert resp.headers["Content-Type"] == CONTENT_TYPE
+            assert resp.read().decode("utf-8") == registry.render()
+    finally:
+        server.shutdown()
@@ -0,0 +1,155 @@
+import re
+import time
+
+import pytest
+
+import src.orchestrator as orchestrator
+
+
+class _Backend:
+    """Retrieval stand-in: one chunk per query, named after the query."""
+
+    name = "fake"
+
+    def __init__(self):
+        self.batches = []
+
+    def fingerprint(self):
+        return "fake:1"
+
+    def _chunks(self, query):
+        return [
+            {
+                "id": f"{query}.md::0",
+                "score": 0.9,
+                "metadata": {},
+                "text": f"text about {query}",
+            }
+        ]
+
+    def search(self, query, top_k=5):
+        return self._chunks(query)
+
+    def search_batch(self, queries, top_k=5):
+        self.batches.append(list(queries))
+        return [self._chunks(q) for q in queries]
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    backend = _Backend()
+    calls = []
+
+    def call_llm(prompt, **kwargs):
+        query = re.search(r"User query:\n(.*)\n", prompt).group(1)
+        calls.append(query)
+        # Later queries finish first
+        time.sleep(0.05 * (5 - int(query[1:])) if query[1:].isdigit() else 0)
+        return {
+            "text": f"answer to {query} ID:{query}.md::0",
+            "meta": {"provider": "fake"},
+        }
+
+    monkeypatch.setattr(orchestrator, "get_backend", lambda: backend)
+    monkeypatch.setattr(orchestrator, "call_llm", call_llm)
+    orchestrator.ANSWER_CACHE.clear()
+    yield backend, calls
+    orchestrator.ANSWER_CACHE.clear()
+
+
+def test_orchestrate_queries_keeps_input_order(pipeline):
+    backend, calls = pipeline
+    # q2 is answered from the cache, "" is invalid; the rest finish in reverse order
+    orchestrator.orchestrate_query("q2", top_k=1)
+    queries = ["q0", "q1", "", "q2", "q3", "q4"]
+
+    out = orchestrator.orchestrate_queries(queries, top_k=1, max_concurrency=4)
+
+    results = out["results"]
+    assert len(results) == len(queries)
+    assert results[2]["llm_meta"]["error"] == "invalid_query"
+    assert results[3]["llm_meta"]["cache"] == "hit"
+    for i in (0, 1, 3, 4, 5):
+        query = queries[i]
+        assert results[i]["answer"] == f"answer to {query} ID:{query}.md::0"
+        assert [c["id"] for c in results[i]["citations"]] == [f"{query}.md::0"]
+    # One retrieval batch for the uncached queries, one LLM call each
+    assert backend.batches == [["q0", "q1", "q3", "q4"]]
+    assert sorted(calls) == ["q0", "q1", "q2", "q3", "q4"]
+    assert set(out["timings"]) >= {
+        "cache",
+        "retrieval",
+        "prompt",
+        "llm",
+        "finalize",
+        "total",
+    }
+
+
+def test_orchestrate_queries_reports_retrieval_failure_per_query(pipeline, monkeypatch):
+    backend, _ = pipeline
+
+    def fail(queries, top_k=5):
+        raise RuntimeError("index offline")
+
+    monkeypatch.setattr(backend, "search_batch", fail)
+
+    out = orchestrator.orchestrate_queries(["a", "b"], top_k=1)
+
+    assert [r["llm_meta"]["error"] for r in out["results"]] == [
+        "retrieval_failed: index offline"
+    ] * 2
+
+
+def test_orchestrate_query_reports_stage_timings(pipeline):
+    result = orchestrator.orchestrate_query(
+        "q1", top_k=1, llm_params={"temperature": 0.5, "max_tokens": 64}
+    )
+
+    timings = result["timings"]
+    assert {"answer_cache", "retrieval", "prompt", "llm", "citations", "total"} <= set(
+        timings
+    )
+    assert timings["llm"] >= 0.2  # the fake LLM sleeps 0.2 s for q1
+    stages = sum(v for k, v in timings.items() if k != "total" and "/" not in k)
+    assert stages <= timings["total"]
+
+
+def test_chunks_map_follows_active_backend_path(monkeypatch, tmp_path):
+    from src.ingestion.embedding_store import write_store
+
+    def write(text):
+        write_store(
+            str(path),
+            [
+                {
+                    "id": "a.md::0",
+                    "filename": "a.md",
+                    "chunk_id": 0,
+                    "text": text,
+                    "chars": len(text),
+                    "embedding": [1.0, 0.0],
+                }
+            ],
+        )
+
+    path = tmp_path / "chunks_semantic.store"
+    write("first version")
+    backend = _Backend()
+    backend.path = str(path)
+    monkeypatch.setattr(orchestrator, "get_backend", lambda: backend)
+
+    assert orchestrator._default_chunks_path() == str(path)
+    assert orchestrator._chunks_map()["a.md::0"] == "first version"
+
+    write("second version")
+    assert orchestrator._chunks_map()["a.md::0"] == "second version"
+
+
+def test_chunks_map_defaults_to_local_index_path(monkeypatch, tmp_path):
+    path = tmp_path / "configured.jsonl"
+    path.write_text('{"id": "b.md::0", "text": "configured"}\n', encoding="utf-8")
+    monkeypatch.setattr(orchestrator, "get_backend", lambda: _Backend())
+    monkeypatch.setattr(orchestrator.cfg, "LOCAL_INDEX_PATH", str(path))
+
+    assert orchestrator._chunks_map() == {"b.md::0": "configured"}
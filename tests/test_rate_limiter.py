@@ -0,0 +1,224 @@
+import asyncio
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.rate_limiter import RateLimiter, RateLimitExceeded
+
+
+def test_unlimited_limiter_never_waits():
+    limiter = RateLimiter()
+    assert not limiter.enabled
+    assert limiter.acquire(10 ** 6) == 0.0
+
+
+def test_token_bucket_allows_burst_then_paces():
+    limiter = RateLimiter(tpm=600)  # 10 tokens/s
+    assert limiter.acquire(600) == 0.0
+    waited = limiter.acquire(2)
+    assert 0.1 < waited <= 0.25
+
+
+def test_over_reservation_is_returned():
+    limiter = RateLimiter(tpm=600, max_wait_s=0.5)
+    limiter.acquire(600)
+    limiter.adjust(590)  # only 10 were used
+    assert limiter.acquire(500) == 0.0
+
+
+def test_wait_beyond_max_is_rejected():
+    limiter = RateLimiter(rpm=60, max_wait_s=0.5)  # one request per second
+    for _ in range(60):
+        limiter.acquire()
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire()
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_wait_queue_is_bounded():
+    limiter = RateLimiter(tpm=600, max_queue=1)
+    limiter.acquire(600)
+    waiter = threading.Thread(target=limiter.acquire, args=(3,))
+    waiter.start()
+    deadline = time.monotonic() + 1
+    while limiter.stats()["waiting"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    with pytest.raises(RateLimitExceeded, match="queue full"):
+        limiter.acquire(1)
+    waiter.join()
+
+
+def test_retry_after_blocks_all_callers():
+    limiter = RateLimiter(max_wait_s=1.0)
+    limiter.penalize(0.15)
+    start = time.monotonic()
+    asyncio.run(limiter.aacquire())
+    assert time.monotonic() - start >= 0.14
+
+    limiter.penalize(5.0)
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire()
+
+
+class _HTTPError(Exception):
+    def __init__(self, status, headers):
+        super().__init__(f"HTTP {status}")
+        self.code = status
+        self.headers = headers
+
+
+@pytest.mark.parametrize("status, headers, expected", [
+    (429, {"Retry-After": "2"}, 2.0),
+    (429, {}, 1.0),
+    (503, {"Retry-After": "3"}, 3.0),
+    (503, {}, None),
+    (500, {"Retry-After": "3"}, None),
+    (429, {"Retry-After": "soon"}, 1.0),
+])
+def test_retry_after_parsing(status, headers, expected):
+    from src.llm_providers import _retry_after
+    assert _retry_after(_HTTPError(status, headers)) == expected
+
+
+def test_retry_after_http_date():
+    from src.llm_providers import _retry_after
+    value = _retry_after(
+        _HTTPError(429, {"Retry-After": formatdate(time.time() + 30, usegmt=True)})
+    )
+    assert 28 <= value <= 30
+
+
+def _reply(status=200, text="ok", total_tokens=5, headers=None):
+    body = b""
+    if status == 200:
+        body = json.dumps({
+            "choices": [{"message": {"content": text}}],
+            "usage": {"total_tokens": total_tokens},
+        }).encode("utf-8")
+    return status, dict(headers or {}), body
+
+
+@pytest.fixture
+def openrouter(monkeypatch):
+    """
+    Local OpenRouter stand-in answering with the scripted replies in turn (the
+    last one repeats).
+    """
+    import src.llm_providers as llm
+
+    replies = []
+    hits = []
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            hits.append(time.monotonic())
+            status, headers, body = replies[min(len(hits), len(replies)) - 1]
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for key in ("GEMINI_API_KEY", "GROQ_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    monkeypatch.setenv(
+        "OPENROUTER_URL",
+        f"http://127.0.0.1:{server.server_address[1]}/chat/completions",
+    )
+    llm.reset_provider_health()
+    try:
+        yield replies, hits
+    finally:
+        server.shutdown()
+
+
+def _use_limiter(monkeypatch, limiter):
+    import src.llm_providers as llm
+    monkeypatch.setitem(llm._LIMITERS, "openrouter", limiter)
+    return limiter
+
+
+def test_reservation_is_capped_at_bucket_capacity():
+    assert RateLimiter().reservation(500) == 0
+    limiter = RateLimiter(tpm=100)
+    assert limiter.reservation(40) == 40
+    assert limiter.reservation(500) == 100
+    limiter.acquire(500)
+    limiter.adjust(limiter.reservation(500))
+    assert limiter.tokens.level == pytest.approx(100)
+
+
+def test_call_llm_waits_out_retry_after_and_retries(monkeypatch, openrouter):
+    import src.llm_providers as llm
+
+    replies, hits = openrouter
+    replies.extend([_reply(429, headers={"Retry-After": "0.2"}), _reply()])
+    _use_limiter(monkeypatch, RateLimiter(max_wait_s=1.0))
+
+    resp = llm.call_llm("hi")
+
+    assert resp["text"] == "ok"
+    assert resp["meta"]["rate_limit_wait_s"] >= 0.15
+    assert hits[1] - hits[0] >= 0.15
+    # Throttling is not counted against the provider's health
+    assert llm.provider_health()["openrouter"]["failures"] == 0
+
+
+def test_retry_after_429_returns_first_reservation(monkeypatch, openrouter):
+    import src.llm_providers as llm
+
+    replies, _ = openrouter
+    replies.extend(
+        [_reply(429, headers={"Retry-After": "0.05"}), _reply(total_tokens=5)]
+    )
+    # One reservation (~512 tokens) fits the bucket; a leaked one would make the
+    # retry wait ~40s
+    limiter = _use_limiter(monkeypatch, RateLimiter(tpm=600, max_wait_s=1.0))
+
+    assert llm.call_llm("hi")["text"] == "ok"
+    assert limiter.stats()["rejected"] == 0
+    assert limiter.tokens.level >= 594
+
+
+@pytest.mark.parametrize("api", ["call", "acall", "stream"])
+def test_failed_call_returns_reservation(monkeypatch, openrouter, api):
+    import src.llm_providers as llm
+
+    replies, _ = openrouter
+    replies.append(_reply(500))
+    limiter = _use_limiter(monkeypatch, RateLimiter(tpm=600))
+
+    if api == "stream":
+        resp = list(llm.stream_llm("hi"))[-1]
+    elif api == "acall":
+        resp = asyncio.run(llm.acall_llm("hi"))
+    else:
+        resp = llm.call_llm("hi")
+    assert resp["meta"]["provider"] == "local-fallback"
+    assert limiter.tokens.level == pytest.approx(600)
+
+
+def test_usage_is_settled_against_capped_reservation(monkeypatch, openrouter):
+    import src.llm_providers as llm
+
+    replies, _ = openrouter
+    replies.append(_reply(total_tokens=50))
+    # The estimate (~512 tokens) exceeds the bucket: only 100 were reserved
+    limiter = _use_limiter(monkeypatch, RateLimiter(tpm=100))
+
+    assert llm.call_llm("hi")["text"] == "ok"
+    assert 49 < limiter.tokens.level < 55
@@ -0,0 +1,150 @@
+import pytest
+
+import src.retrieval.retriever as retriever
+
+
+class _Index:
+    def __init__(self, host, fail=0):
+        self.host = host
+        self.fail = fail
+        self.queries = 0
+
+    def query(self, **kwargs):
+        self.queries += 1
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("connection reset")
+        return {
+            "matches": [
+                {"id": "a.md::0", "score": 0.5, "metadata": {"filename": "a.md"}}
+            ]
+        }
+
+
+class _Client:
+    """Counts control-plane calls; hosts[name] is the host describe_index reports."""
+
+    def __init__(self):
+        self.hosts = {"docs": "host-1"}
+        self.describes = 0
+        self.opened = []
+
+    def describe_index(self, name):
+        self.describes += 1
+        return {"host": self.hosts[name]}
+
+    def Index(self, host):
+        index = _Index(host)
+        self.opened.append(index)
+        return index
+
+
+@pytest.fixture
+def client(monkeypatch):
+    clients = []
+
+    def new_client(api_key):
+        clients.append(_Client())
+        return clients[-1]
+
+    monkeypatch.setattr(retriever, "_new_pinecone_client", new_client)
+    retriever.clear_index_cache()
+    yield clients
+    retriever.clear_index_cache()
+
+
+def test_index_handle_is_pooled(client):
+    first = retriever.get_pinecone_index("docs", "key")
+    assert retriever.get_pinecone_index("docs", "key") is first
+    assert len(client) == 1 and client[0].describes == 1
+
+    # Another key gets its own client
+    retriever.get_pinecone_index("docs", "other-key")
+    assert len(client) == 2
+
+
+def test_host_is_re_resolved_after_ttl(client, monkeypatch):
+    first = retriever.get_pinecone_index("docs", "key")
+    monkeypatch.setattr(retriever, "INDEX_HOST_TTL_S", 0.0)
+
+    # Same host: described again, but the warm handle is kept
+    assert retriever.get_pinecone_index("docs", "key") is first
+    assert client[0].describes == 2
+
+    client[0].hosts["docs"] = "host-2"
+    moved = retriever.get_pinecone_index("docs", "key")
+    assert moved is not first and moved.host == "host-2"
+    assert len(client) == 1  # the client itself is reused
+
+
+def test_connection_error_re_resolves_and_retries_once(client, monkeypatch):
+    monkeypatch.setenv("PINECONE_API_KEY", "key")
+    retriever.get_pinecone_index("docs", "key")
+    client[0].opened[0].fail = 1
+
+    results = retriever.query_pinecone(
+        "what is gdpr", top_k=1, index_name="docs", use_semantic=False
+    )
+
+    assert [r["id"] for r in results] == ["a.md::0"]
+    assert client[0].describes == 2
+    assert len(client[0].opened) == 2
+
+
+def _embedder(calls):
+    def compute(text):
+        calls.append(text)
+        return [float(len(text)), 1.0]
+    return compute
+
+
+def test_query_embedding_cache_evicts_least_recently_used():
+    cache = retriever.QueryEmbeddingCache(maxsize=2)
+    calls = []
+    compute = _embedder(calls)
+
+    cache.get_or_compute("ns", "a", compute)
+    cache.get_or_compute("ns", "b", compute)
+    cache.get_or_compute("ns", "a", compute)  # a is now most recent
+    cache.get_or_compute("ns", "c", compute)  # evicts b
+    cache.get_or_compute("ns", "a", compute)
+    cache.get_or_compute("ns", "b", compute)
+
+    assert calls == ["a", "b", "c", "b"]
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["hits"] == 2
+
+
+def test_query_embedding_cache_keys_on_namespace_and_normalized_text():
+    cache = retriever.QueryEmbeddingCache(maxsize=8)
+    calls = []
+    compute = _embedder(calls)
+
+    cache.get_or_compute(("semantic", "m1"), "what  is\tgdpr ", compute)
+    cache.get_or_compute(("semantic", "m1"), "what is gdpr", compute)
+    cache.get_or_compute(("semantic", "m2"), "what is gdpr", compute)
+
+    assert calls == ["what is gdpr", "what is gdpr"]
+
+
+def test_query_embedding_cache_batch_computes_misses_once():
+    cache = retriever.QueryEmbeddingCache(maxsize=8)
+    cache.get_or_compute("ns", "a", _embedder([]))
+    batches = []
+
+    def compute_many(texts):
+        batches.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    out = cache.get_or_compute_many("ns", ["bb", "a", "ccc", "bb "], compute_many)
+
+    assert batches == [["bb", "ccc"]]
+    assert out == [[2.0, 1.0], [1.0, 1.0], [3.0, 1.0], [2.0, 1.0]]
+
+
+def test_query_embedding_cache_size_zero_disables_storage():
+    cache = retriever.QueryEmbeddingCache(maxsize=0)
+    calls = []
+    cache.get_or_compute("ns", "a", _embedder(calls))
+    cache.get_or_compute("ns", "a", _embedder(calls))
+    assert calls == ["a", "a"]
@@ -0,0 +1,66 @@
+import math
+
+import pytest
+
+from src.semantic_cache import SemanticCache
+
+
+def _unit(angle_deg):
+    a = math.radians(angle_deg)
+    return [math.cos(a), math.sin(a)]
+
+
+def test_hit_requires_similarity_above_threshold():
+    cache = SemanticCache(threshold=0.95)
+    cache.add(_unit(0), ["a", "b"], "ctx", {"answer": "x"})
+
+    # cos(10°) ≈ 0.985, cos(30°) ≈ 0.866
+    assert cache.lookup(_unit(10), ["b", "a"], "ctx") == {"answer": "x"}
+    assert cache.lookup(_unit(30), ["a", "b"], "ctx") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["lookups"] == 2
+
+
+def test_hit_requires_same_chunks_and_context():
+    cache = SemanticCache(threshold=0.9)
+    cache.add(_unit(0), ["a", "b"], "ctx", {"answer": "x"})
+
+    assert cache.lookup(_unit(0), ["a", "c"], "ctx") is None
+    assert cache.lookup(_unit(0), ["a", "b"], "other") is None
+    assert cache.lookup([0.0, 0.0], ["a", "b"], "ctx") is None
+
+
+def test_returned_answer_is_a_copy():
+    cache = SemanticCache()
+    cache.add(_unit(0), ["a"], "ctx", {"answer": "x"})
+    cache.lookup(_unit(0), ["a"], "ctx")["answer"] = "changed"
+    assert cache.lookup(_unit(0), ["a"], "ctx") == {"answer": "x"}
+
+
+def test_ring_buffer_overwrites_oldest_entries():
+    cache = SemanticCache(threshold=0.999, maxsize=3)
+    for i in range(5):
+        cache.add(_unit(20 * i), [f"c{i}"], "ctx", {"answer": i})
+
+    assert cache.stats()["size"] == 3
+    # Entries 0 and 1 were overwritten by 3 and 4
+    for i in range(5):
+        found = cache.lookup(_unit(20 * i), [f"c{i}"], "ctx")
+        assert found == ({"answer": i} if i >= 2 else None)
+
+
+def test_dimension_change_resets_buffer():
+    cache = SemanticCache(threshold=0.9)
+    cache.add(_unit(0), ["a"], "ctx", {"answer": "2d"})
+    cache.add([1.0, 0.0, 0.0], ["a"], "ctx", {"answer": "3d"})
+
+    assert cache.stats()["size"] == 1
+    assert cache.lookup(_unit(0), ["a"], "ctx") is None
+    assert cache.lookup([1.0, 0.0, 0.0], ["a"], "ctx") == {"answer": "3d"}
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"threshold": 0.0}, {"threshold": 1.5}, {"maxsize": 0}]
+)
+def test_invalid_settings_raise(kwargs):
+    with pytest.raises(ValueError):
+        SemanticCache(**kwargs)
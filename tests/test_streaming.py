@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from src.ingestion.embedding_store import EmbeddingStore
+from src.ingestion.streaming import run_streaming_ingestion
+
+# 4 documents x 10 chunks, written in batches of 3 (batches straddle documents)
+_SETTINGS = {"dim": 8, "max_tokens": 20, "overlap": 0, "batch_size": 3}
+
+
+class _Crash(Exception):
+    pass
+
+
+def _docs(path, n_docs=4):
+    path.mkdir(exist_ok=True)
+    for i in range(n_docs):
+        text = " ".join(f"Doc {i} sentence {k} has some words." for k in range(20))
+        (path / f"d{i}.md").write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def _crash_at(n, sent):
+    def upsert(records):
+        if len(sent) == n - 1:
+            raise _Crash()
+        sent.append([r["id"] for r in records])
+    return upsert
+
+
+def test_resume_after_crash_matches_clean_run(tmp_path):
+    docs = _docs(tmp_path / "docs")
+    clean = str(tmp_path / "clean.store")
+    run_streaming_ingestion(docs, clean, **_SETTINGS)
+    expected = EmbeddingStore(clean)
+    assert len(expected) == 40
+
+    store = str(tmp_path / "chunks.store")
+    sent = []
+    with pytest.raises(_Crash):
+        run_streaming_ingestion(docs, store, upsert=_crash_at(4, sent), **_SETTINGS)
+    assert len(sent) == 3
+
+    summary = run_streaming_ingestion(
+        docs, store, upsert=lambda r: sent.append([x["id"] for x in r]), **_SETTINGS
+    )
+
+    assert summary["resumed"] is True
+    assert summary["ok"] == 4 and summary["chunks"] == 40
+    assert summary["batches"] == 14 - 3
+    got = EmbeddingStore(store)
+    assert got.ids == expected.ids
+    assert np.array_equal(np.asarray(got.matrix), np.asarray(expected.matrix))
+    # The interrupted batch is sent again by the resumed run; completed ones are not
+    assert sorted(i for ids in sent for i in ids) == sorted(expected.ids)
+
+
+def test_changed_inputs_discard_checkpoint_and_start_over(tmp_path):
+    docs = _docs(tmp_path / "docs", n_docs=3)
+    store = str(tmp_path / "chunks.store")
+    with pytest.raises(_Crash):
+        run_streaming_ingestion(docs, store, upsert=_crash_at(4, []), **_SETTINGS)
+
+    _docs(tmp_path / "docs", n_docs=4)
+    summary = run_streaming_ingestion(docs, store, **_SETTINGS)
+
+    assert summary["resumed"] is False
+    assert summary["batches"] == 14
+    assert len(EmbeddingStore(store)) == 40
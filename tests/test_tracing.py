@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from src.tracing import Span, activate, current_span, set_exporter, span, start_trace
+
+
+def test_spans_nest_and_flatten_into_timings():
+    with start_trace("query") as root:
+        with span("retrieval", backend="local") as retrieval:
+            with span("embed_query"):
+                pass
+        for _ in range(2):
+            with span("llm"):
+                pass
+
+    assert [c.name for c in root.children] == ["retrieval", "llm", "llm"]
+    assert [c.name for c in retrieval.children] == ["embed_query"]
+    assert retrieval.attrs == {"backend": "local"}
+
+    timings = root.breakdown()
+    assert set(timings) == {"retrieval", "retrieval/embed_query", "llm", "total"}
+    # Repeated stages are summed; children never exceed their parent
+    assert timings["llm"] == pytest.approx(sum(c.duration_s for c in root.children[1:]))
+    assert timings["retrieval/embed_query"] <= timings["retrieval"] <= timings["total"]
+
+
+def test_span_outside_trace_is_noop():
+    with span("retrieval") as s:
+        assert s is None
+    assert current_span() is None
+
+
+def test_error_is_recorded_and_reraised():
+    with pytest.raises(ValueError):
+        with start_trace("query") as root:
+            with span("llm"):
+                raise ValueError("boom")
+    assert root.children[0].attrs["error"] == "ValueError: boom"
+    assert root.end is not None
+
+
+def test_activate_resumes_span_without_ending_it():
+    with start_trace("query") as root:
+        stream = Span("stream")
+        with activate(stream):
+            with span("chunk"):
+                pass
+        assert stream.end is None and current_span() is root
+        stream.finish(root)
+
+    assert root.breakdown().keys() >= {"stream", "stream/chunk"}
+
+
+def test_threads_do_not_inherit_the_current_span():
+    seen = []
+    with start_trace("query"):
+        t = threading.Thread(target=lambda: seen.append(current_span()))
+        t.start()
+        t.join()
+    assert seen == [None]
+
+
+def test_exporter_receives_finished_roots_only():
+    exported = []
+    set_exporter(exported.append)
+    try:
+        with start_trace("query"):
+            with span("retrieval"):
+                pass
+    finally:
+        set_exporter(None)
+
+    assert [s.name for s in exported] == ["query"]
+    assert exported[0].to_dict()["children"][0]["name"] == "retrieval"